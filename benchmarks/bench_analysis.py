@@ -0,0 +1,56 @@
+import numpy as np
+from toybox.analysis.matching import TemplateBank
+from toybox.analysis.peaks import find_peaks
+from toybox.analysis.radial import radial_profile
+from toybox.toys.core import Points, Pattern
+
+
+class Match:
+    """Benchmarks scoring frames against a :class:`TemplateBank`."""
+
+    params = ([10, 100], [100, 1000])
+    param_names = ['n_templates', 'n_frames']
+
+    def setup(self, n_templates, n_frames):
+        random_state = np.random.RandomState(0)
+        self.bank = TemplateBank(random_state.uniform(size=(n_templates, 64, 64)))
+        self.frames = random_state.uniform(size=(n_frames, 64, 64))
+
+    def time_match(self, n_templates, n_frames):
+        self.bank.match(self.frames, n_best=5)
+
+    def peakmem_match(self, n_templates, n_frames):
+        self.bank.match(self.frames, n_best=5)
+
+
+class FindPeaks:
+    """Benchmarks :func:`toybox.analysis.peaks.find_peaks` on a stack."""
+
+    params = [1, 100]
+    param_names = ['n_frames']
+
+    def setup(self, n_frames):
+        points = Points([(0., 0., 1.), (1., 0.3, 0.5), (0.5, 0.5, 0.2)],
+                        symmetry='4mm', auto_zero=False)
+        pattern = Pattern.from_points(points, shape=(128, 128), scale=0.8)
+        self.stack = np.tile(pattern, (n_frames, 1, 1))
+
+    def time_find_peaks(self, n_frames):
+        find_peaks(self.stack)
+
+    def peakmem_find_peaks(self, n_frames):
+        find_peaks(self.stack)
+
+
+class RadialProfile:
+    """Benchmarks :func:`toybox.analysis.radial.radial_profile`."""
+
+    params = [1, 100]
+    param_names = ['n_frames']
+
+    def setup(self, n_frames):
+        self.stack = np.random.RandomState(0).uniform(size=(n_frames, 128, 128))
+        radial_profile(self.stack)  # Populate the bin cache.
+
+    def time_radial_profile(self, n_frames):
+        radial_profile(self.stack)
@@ -0,0 +1,72 @@
+import numpy as np
+from toybox.diffraction.electrons import electron_wavelength
+from toybox.diffraction.ewald import ReciprocalLattice, excitation_errors
+from toybox.diffraction.precession import Precession, _radial_weights
+from toybox.diffraction.structure import Structure
+from toybox.toys.core import Points
+
+
+def lattice_points(n_max, symmetry='4mm'):
+    """Creates the points of a square lattice within `n_max` of the origin."""
+    i, j = np.mgrid[0: n_max + 1, 0: n_max + 1]
+    inside = (j <= i) & (np.hypot(i, j) <= n_max)
+    starting_points = np.column_stack((i[inside], j[inside],
+                                       np.ones(inside.sum())))
+    return Points(starting_points, symmetry=symmetry, auto_zero=False)
+
+
+class PrecessionWeights:
+    """Benchmarks :meth:`toybox.diffraction.precession.Precession.weights`."""
+
+    params = ([10, 40], [90, 360])
+    param_names = ['n_max', 'n_steps']
+
+    def setup(self, n_max, n_steps):
+        self.points = lattice_points(n_max)
+        self.precession = Precession(1., n_steps=n_steps)
+
+    def time_weights(self, n_max, n_steps):
+        _radial_weights.cache_clear()
+        self.precession.weights(self.points, reciprocal_scale=0.25)
+
+    def time_weights_cached(self, n_max, n_steps):
+        self.precession.weights(self.points, reciprocal_scale=0.25)
+
+
+class StructureIntensities:
+    """Benchmarks :meth:`Structure.intensities`."""
+
+    params = ([4, 64], [1000, 100000])
+    param_names = ['n_atoms', 'n_g']
+
+    def setup(self, n_atoms, n_g):
+        random_state = np.random.RandomState(0)
+        self.structure = Structure(random_state.uniform(size=(n_atoms, 3)),
+                                   random_state.uniform(1., 10., n_atoms))
+        self.hkl = random_state.randint(-20, 21, size=(n_g, 3))
+
+    def time_intensities(self, n_atoms, n_g):
+        self.structure._cached_intensities.cache_clear()
+        self.structure.intensities(self.hkl)
+
+
+class EwaldCulling:
+    """Benchmarks :meth:`ReciprocalLattice.near_sphere` against computing the
+    excitation error of every reflection.
+
+    """
+
+    params = [3., 12.]
+    param_names = ['g_max']
+
+    def setup(self, g_max):
+        self.lattice = ReciprocalLattice.from_cell(4. * np.eye(3), g_max)
+        self.lattice.cells
+        self.wavelength = electron_wavelength(200.)
+
+    def time_near_sphere(self, g_max):
+        self.lattice.near_sphere(self.wavelength, (1, 1, 2), 0.02)
+
+    def time_brute_force(self, g_max):
+        errors = excitation_errors(self.lattice.g, self.wavelength, (1, 1, 2))
+        np.flatnonzero(np.abs(errors) <= 0.02)
@@ -0,0 +1,10 @@
+class Import:
+    """Benchmarks the time taken to import toybox in a fresh interpreter."""
+
+    repeat = 10
+
+    def timeraw_import_toybox(self):
+        return "import toybox.toys.core"
+
+    def timeraw_import_crystals(self):
+        return "import toybox.toys.crystals"
@@ -0,0 +1,41 @@
+import numpy as np
+from toybox.symmetry.operators import propagate, generate_group, group_orbits
+from toybox.symmetry.parsers import parse_hermann_mauguin
+
+
+def random_points(n_points, seed=0):
+    """Generates `n_points` random (x, y, intensity) points."""
+    random_state = np.random.RandomState(seed)
+    return random_state.uniform(-1., 1., size=(n_points, 3))
+
+
+class Propagate:
+    """Benchmarks :func:`toybox.symmetry.operators.propagate`."""
+
+    timeout = 600
+    params = (['1', '2', '4', '6', '4mm', '6mm'], [10, 100, 1000])
+    param_names = ['symmetry', 'n_points']
+
+    def setup(self, symmetry, n_points):
+        self.points = random_points(n_points)
+        self.operations = parse_hermann_mauguin(symmetry)
+
+    def time_propagate(self, symmetry, n_points):
+        propagate(self.points, *self.operations)
+
+    def peakmem_propagate(self, symmetry, n_points):
+        propagate(self.points, *self.operations)
+
+
+class GroupOrbits:
+    """Benchmarks :func:`toybox.symmetry.operators.group_orbits`."""
+
+    params = (['1', '4mm', '6mm'], [1000, 100000])
+    param_names = ['symmetry', 'n_points']
+
+    def setup(self, symmetry, n_points):
+        self.positions = random_points(n_points)[:, :2]
+        self.group = generate_group(*parse_hermann_mauguin(symmetry))
+
+    def time_group_orbits(self, symmetry, n_points):
+        group_orbits(self.positions, self.group)
@@ -0,0 +1,41 @@
+import numpy as np
+from toybox.tools import equivalent, sort_points, argsort_points
+
+
+class Equivalent:
+    """Benchmarks :func:`toybox.tools.equivalent` on large point sets."""
+
+    timeout = 600
+    params = [1000, 10000, 100000]
+    param_names = ['n_points']
+
+    def setup(self, n_points):
+        random_state = np.random.RandomState(0)
+        self.points1 = random_state.uniform(-1., 1., size=(n_points, 3))
+        self.points2 = self.points1[random_state.permutation(n_points)]
+
+    def time_equivalent(self, n_points):
+        equivalent(self.points1, self.points2)
+
+    def peakmem_equivalent(self, n_points):
+        equivalent(self.points1, self.points2)
+
+
+class SortPoints:
+    """Benchmarks :func:`toybox.tools.sort_points` on large point sets."""
+
+    params = [1000, 10000, 100000]
+    param_names = ['n_points']
+
+    def setup(self, n_points):
+        random_state = np.random.RandomState(0)
+        self.points = random_state.uniform(-1., 1., size=(n_points, 3))
+
+    def time_sort_points(self, n_points):
+        sort_points(self.points)
+
+    def peakmem_sort_points(self, n_points):
+        sort_points(self.points)
+
+    def time_argsort_points(self, n_points):
+        argsort_points(self.points[:, :2])
@@ -0,0 +1,203 @@
+import numpy as np
+from toybox.toys.core import Points, Pattern
+from toybox.toys.crystals import BiCrystal, Mixture
+from toybox.toys.incremental import IncrementalPattern
+from toybox.toys.rendering import set_backend
+from toybox.toys.strain import StrainMap
+
+
+def random_points(n_points, symmetry=1, seed=0):
+    """Creates a :class:`Points` from `n_points` random starting points."""
+    random_state = np.random.RandomState(seed)
+    starting_points = random_state.uniform(-1., 1., size=(n_points, 3))
+    return Points(starting_points, symmetry=symmetry, auto_zero=False)
+
+
+class FromPoints:
+    """Benchmarks :meth:`toybox.toys.core.Pattern.from_points`."""
+
+    params = ([(64, 64), (128, 128), (256, 256)], [10, 100],
+              ['sample', 'area'])
+    param_names = ['shape', 'n_peaks', 'mode']
+
+    def setup(self, shape, n_peaks, mode):
+        self.points = random_points(n_peaks)
+
+    def time_from_points(self, shape, n_peaks, mode):
+        Pattern.from_points(self.points, shape=shape, scale=0.9, mode=mode)
+
+    def peakmem_from_points(self, shape, n_peaks, mode):
+        Pattern.from_points(self.points, shape=shape, scale=0.9, mode=mode)
+
+
+class IncrementalUpdate:
+    """Benchmarks editing an :class:`IncrementalPattern` against rendering
+    the edited points from scratch.
+
+    """
+
+    params = ([(128, 128), (512, 512)], [10, 100])
+    param_names = ['shape', 'n_points']
+
+    def setup(self, shape, n_points):
+        self.points = random_points(n_points, '4mm')
+        self.pattern = IncrementalPattern(self.points, shape=shape, scale=0.9)
+
+    def time_set_intensity(self, shape, n_points):
+        self.pattern.set_intensity(0, 0.5)
+
+    def time_from_points(self, shape, n_points):
+        Pattern.from_points(self.points, shape=shape, scale=0.9)
+
+
+class PointsEquality:
+    """Benchmarks hashing and comparing :class:`Points`."""
+
+    params = ([1, '6mm'], [10, 100])
+    param_names = ['symmetry', 'n_points']
+
+    def setup(self, symmetry, n_points):
+        self.points1 = random_points(n_points, symmetry)
+        self.points2 = random_points(n_points, symmetry)
+
+    def time_canonical(self, symmetry, n_points):
+        # A fresh object, so that nothing is cached.
+        Points(self.points1.starting_points, symmetry=symmetry,
+               auto_zero=False).canonical
+
+    def time_eq(self, symmetry, n_points):
+        self.points1 == self.points2
+
+    def time_hash(self, symmetry, n_points):
+        hash(self.points1)
+
+
+class RenderBackends:
+    """Benchmarks :meth:`Pattern.from_points` with each rendering backend."""
+
+    params = (['numpy', 'numba'], [(256, 256), (1024, 1024)], [100, 1000],
+              ['sample', 'area'])
+    param_names = ['backend', 'shape', 'n_peaks', 'mode']
+
+    def setup(self, backend, shape, n_peaks, mode):
+        try:
+            set_backend(backend)
+        except ImportError:
+            raise NotImplementedError("numba is not installed.")
+        self.points = random_points(n_peaks)
+        # Compiles the kernels outside of the timings.
+        Pattern.from_points(self.points, shape=shape, scale=0.9, mode=mode)
+
+    def teardown(self, backend, shape, n_peaks, mode):
+        set_backend('auto')
+
+    def time_from_points(self, backend, shape, n_peaks, mode):
+        Pattern.from_points(self.points, shape=shape, scale=0.9, mode=mode)
+
+
+class BiCrystalAccess:
+    """Benchmarks indexing and iterating over a :class:`BiCrystal`."""
+
+    params = ([(64, 64), (256, 256)], [11, 101])
+    param_names = ['shape', 'n_frames']
+
+    def setup(self, shape, n_frames):
+        random_state = np.random.RandomState(0)
+        self.bicrystal = BiCrystal(random_state.uniform(size=shape),
+                                   random_state.uniform(size=shape),
+                                   profile=np.linspace(0, 1, n_frames))
+
+    def time_getitem(self, shape, n_frames):
+        self.bicrystal[n_frames // 2]
+
+    def time_iterate(self, shape, n_frames):
+        for _ in self.bicrystal:
+            pass
+
+    def peakmem_iterate(self, shape, n_frames):
+        for _ in self.bicrystal:
+            pass
+
+
+class StrainMapRender:
+    """Benchmarks rendering a :class:`StrainMap` whose strain is confined to
+    a band across an otherwise unstrained scan.
+
+    """
+
+    params = [0.1, 1.]
+    param_names = ['strained_fraction']
+
+    def setup(self, strained_fraction):
+        tensors = np.tile(np.eye(2), (32, 32, 1, 1))
+        n_strained = int(round(strained_fraction * 32))
+        strain = np.linspace(0., 0.02, n_strained * 32).reshape(n_strained, 32)
+        tensors[:n_strained, :, 0, 0] += strain
+        self.strain_map = StrainMap(random_points(10, '4mm'), tensors,
+                                    shape=(64, 64), scale=0.9)
+
+    def time_to_array(self, strained_fraction):
+        self.strain_map.to_array()
+
+
+class MixtureMap:
+    """Benchmarks a :class:`Mixture` against weighting the phases of each
+    position in Python.
+
+    """
+
+    params = ([2, 3, 6], [(64, 64), (128, 128)])
+    param_names = ['n_phases', 'shape']
+
+    def setup(self, n_phases, shape):
+        random_state = np.random.RandomState(0)
+        weights = random_state.uniform(size=(16, 16, n_phases))
+        weights /= weights.sum(axis=-1, keepdims=True)
+        self.mixture = Mixture(random_state.uniform(size=(n_phases,) + shape),
+                               weights)
+
+    def time_to_array(self, n_phases, shape):
+        self.mixture.to_array()
+
+    def time_chunks(self, n_phases, shape):
+        for _ in self.mixture.chunks():
+            pass
+
+    def time_loop(self, n_phases, shape):
+        patterns = self.mixture.phases
+        np.array([sum(w[k] * patterns[k] for k in range(n_phases))
+                  for w in self.mixture.weights.reshape(-1, n_phases)])
+
+
+class Pyramid:
+    """Benchmarks binning a pattern into a pyramid against rendering each
+    level independently.
+
+    Both draw the same spots, two full-resolution pixels wide, in 'area'
+    mode without blur, so each independent level holds the same intensity
+    as the binned level of the same size. The two grids are offset by a
+    fraction of a pixel, so their pixels are close but not equal.
+
+    """
+
+    params = ([(256, 256), (512, 512)], [3])
+    param_names = ['shape', 'levels']
+
+    def setup(self, shape, levels):
+        points = random_points(100, '4mm')
+        n = len(points.starting_points)
+        self.points = [
+            Points(points.starting_points, symmetry='4mm', auto_zero=False,
+                   spots=np.tile((2 * 0.5 ** level, 2 * 0.5 ** level, 0.),
+                                 (n, 1)))
+            for level in range(levels)]
+
+    def time_pyramid(self, shape, levels):
+        Pattern.from_points(self.points[0], shape=shape, scale=0.9,
+                            mode='area', blur=0).pyramid(levels)
+
+    def time_independent(self, shape, levels):
+        for level in range(levels):
+            Pattern.from_points(self.points[level],
+                                shape=tuple(s >> level for s in shape),
+                                scale=0.9, mode='area', blur=0)
@@ -1,5 +1,5 @@
 from toybox import __version__
-from distutils.core import setup
+from setuptools import setup
 
 setup(
     name='diffraction-toybox',
@@ -7,7 +7,16 @@ setup(
     packages=[
         'tests',
         'toybox',
+        'toybox.analysis',
+        'toybox.diffraction',
+        'toybox.symmetry',
+        'toybox.toys',
     ],
+    entry_points={
+        'console_scripts': [
+            'toybox = toybox.cli:main',
+        ],
+    },
     url='',
     license='MIT',
     author='bm424',
@@ -0,0 +1,5 @@
+import os
+
+# The suite renders with numba and then forks worker processes, which only
+# the workqueue threading layer survives reliably. See set_backend.
+os.environ.setdefault('NUMBA_THREADING_LAYER', 'workqueue')
@@ -0,0 +1,97 @@
+import asyncio
+from unittest import TestCase
+
+import numpy as np
+from toybox.toys.asynchronous import from_points_async, render_batch_async, \
+    PatternStream
+from toybox.toys.core import Points, Pattern
+
+
+class AsyncTestCase(TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.points = Points([(0., 0., 1.), (1., 0., 1.)], symmetry=4,
+                             auto_zero=False)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def run_async(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+
+class TestFromPointsAsync(AsyncTestCase):
+
+    def test_matches_sync(self):
+        pattern = self.run_async(from_points_async(self.points, shape=(20, 20),
+                                                   blur=2.))
+        expected = Pattern.from_points(self.points, shape=(20, 20), blur=2.)
+        self.assertIsInstance(pattern, Pattern)
+        np.testing.assert_array_almost_equal(pattern, expected)
+
+
+class TestPatternStream(AsyncTestCase):
+
+    def specs(self, n):
+        for blur in np.linspace(0.5, 2., n):
+            yield dict(points=self.points, shape=(16, 16), blur=blur)
+
+    def test_render_batch(self):
+        patterns = self.run_async(render_batch_async(self.specs(5)))
+        self.assertEqual(len(patterns), 5)
+        expected = Pattern.from_points(self.points, shape=(16, 16), blur=2.)
+        np.testing.assert_array_almost_equal(patterns[-1], expected)
+
+    def test_backpressure(self):
+        consumed = []
+
+        def specs():
+            for i, spec in enumerate(self.specs(10)):
+                # No more than max_pending specs may be taken ahead.
+                self.assertLessEqual(i - len(consumed), 2)
+                yield spec
+
+        async def consume():
+            async for pattern in PatternStream(specs(), max_pending=2):
+                consumed.append(pattern)
+                await asyncio.sleep(0)
+
+        self.run_async(consume())
+        self.assertEqual(len(consumed), 10)
+
+    def test_close_cancels_pending(self):
+        async def consume():
+            stream = PatternStream(self.specs(10), max_pending=3)
+            async with stream:
+                async for _ in stream:
+                    break
+            return stream
+
+        stream = self.run_async(consume())
+        self.assertEqual(len(stream._pending), 0)
+        with self.assertRaises(StopAsyncIteration):
+            self.run_async(stream.__anext__())
+
+    def test_cancellation(self):
+        async def consume(stream):
+            async for _ in stream:
+                pass
+
+        stream = PatternStream(self.specs(4), max_pending=2)
+
+        async def cancel():
+            task = self.loop.create_task(consume(stream))
+            await asyncio.sleep(0)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        self.run_async(cancel())
+        self.assertEqual(len(stream._pending), 0)
+
+    def test_invalid_max_pending(self):
+        with self.assertRaises(ValueError):
+            PatternStream([], max_pending=0)
@@ -0,0 +1,84 @@
+from unittest import TestCase, skipIf
+
+import numpy as np
+from toybox.toys.batch import map_patterns, render_batch, render_pyramids, \
+    generate, add_noise
+from toybox.toys.core import Points, Pattern
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def _num_threads(_):
+    return numba.get_num_threads()
+
+
+class TestRenderBatch(TestCase):
+
+    def setUp(self):
+        self.points = Points([(0., 0., 1.), (1., 0., 1.)], symmetry=4,
+                             auto_zero=False)
+        self.specs = [dict(points=self.points, shape=(20, 20), blur=blur)
+                      for blur in (0.5, 1., 2.)]
+
+    def test_serial(self):
+        patterns = list(render_batch(self.specs))
+        self.assertEqual(len(patterns), 3)
+        expected = Pattern.from_points(self.points, shape=(20, 20), blur=1.)
+        np.testing.assert_array_almost_equal(patterns[1], expected)
+
+    def test_parallel_matches_serial(self):
+        serial = list(render_batch(self.specs))
+        parallel = list(render_batch(self.specs, processes=2))
+        np.testing.assert_array_almost_equal(serial, parallel)
+
+    @skipIf(numba is None, "numba is not installed.")
+    def test_workers_single_threaded(self):
+        self.assertEqual(list(map_patterns(_num_threads, range(4),
+                                           processes=2)), [1] * 4)
+
+    def test_pyramids(self):
+        pyramids = list(render_pyramids(self.specs, levels=3))
+        self.assertEqual(len(pyramids), 3)
+        expected = Pattern.from_points(self.points, shape=(20, 20), blur=1.)
+        self.assertEqual([level.shape for level in pyramids[1]],
+                         [(20, 20), (10, 10), (5, 5)])
+        np.testing.assert_array_almost_equal(pyramids[1][0], expected)
+        np.testing.assert_array_almost_equal(pyramids[1][2],
+                                             expected.bin(4))
+        self.assertIsInstance(pyramids[1][2], Pattern)
+
+
+class TestGenerate(TestCase):
+
+    def setUp(self):
+        points = Points([(0., 0., 1.), (1., 0., 1.)], symmetry=4,
+                        auto_zero=False)
+        self.specs = [dict(points=points, shape=(20, 20), count=3, noise=0.1),
+                      dict(points=points, shape=(20, 20), count=2)]
+
+    def test_count(self):
+        frames = list(generate(self.specs, seed=0))
+        self.assertEqual(len(frames), 5)
+        self.assertIsInstance(frames[0], Pattern)
+
+    def test_seeded(self):
+        frames1 = list(generate(self.specs, seed=0))
+        frames2 = list(generate(self.specs, seed=0, processes=2))
+        np.testing.assert_array_almost_equal(frames1, frames2)
+
+    def test_noise_differs_between_frames(self):
+        frames = list(generate(self.specs, seed=0))
+        self.assertFalse(np.allclose(frames[0], frames[1]))
+        np.testing.assert_array_almost_equal(frames[3], frames[4])
+
+
+class TestAddNoise(TestCase):
+
+    def test_no_noise_copies(self):
+        pattern = np.ones((5, 5))
+        noisy = add_noise(pattern, 0.)
+        noisy[0, 0] = 2.
+        self.assertEqual(pattern[0, 0], 1.)
@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+from toybox.toys.batch import render_batch
+from toybox.toys.cache import PatternCache
+from toybox.toys.core import Points, Pattern
+
+
+class TestPatternCache(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = PatternCache(self.directory)
+        self.points = Points([(0., 0., 1.), (1., 0., 1.)], symmetry=4,
+                             auto_zero=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_key_ignores_order_of_starting_points(self):
+        reordered = Points([(1., 0., 1.), (0., 0., 1.)], symmetry=4,
+                           auto_zero=False)
+        self.assertEqual(self.cache.key(self.points), self.cache.key(reordered))
+
+    def test_key_depends_on_parameters(self):
+        self.assertNotEqual(self.cache.key(self.points, blur=1.),
+                            self.cache.key(self.points, blur=2.))
+        self.assertNotEqual(self.cache.key(self.points, shape=(10, 10)),
+                            self.cache.key(self.points, shape=(10, 20)))
+
+    def test_key_depends_on_spots(self):
+        elongated = Points([(0., 0., 1.), (1., 0., 1.)], symmetry=4,
+                           auto_zero=False, spots=[(1., 1., 0.), (2., 1., 0.)])
+        self.assertNotEqual(self.cache.key(self.points),
+                            self.cache.key(elongated))
+
+    def test_miss(self):
+        self.assertIsNone(self.cache.get('missing'))
+
+    def test_from_points(self):
+        expected = Pattern.from_points(self.points, shape=(20, 20))
+        first = self.cache.from_points(self.points, shape=(20, 20))
+        second = self.cache.from_points(self.points, shape=(20, 20))
+        self.assertEqual(len(self.cache), 1)
+        self.assertIsInstance(second, Pattern)
+        self.assertIsInstance(second.base, np.memmap)
+        np.testing.assert_array_almost_equal(first, expected)
+        np.testing.assert_array_almost_equal(second, expected)
+
+    def test_evicts_least_recently_used(self):
+        pattern = np.zeros((10, 10))
+        self.cache.put('a', pattern)
+        self.cache.max_bytes = 2 * self.cache.nbytes
+        os.utime(os.path.join(self.directory, 'a.npy'), (0, 0))
+        self.cache.put('b', pattern)
+        os.utime(os.path.join(self.directory, 'b.npy'), (1, 1))
+        self.cache.get('a')
+        self.cache.put('c', pattern)
+        self.assertIn('a', self.cache)
+        self.assertNotIn('b', self.cache)
+        self.assertIn('c', self.cache)
+
+    def test_clear(self):
+        self.cache.put('a', np.zeros((10, 10)))
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+
+    def test_render_batch(self):
+        specs = [dict(points=self.points, shape=(20, 20))] * 3
+        patterns = list(render_batch(specs, cache=self.cache))
+        self.assertEqual(len(self.cache), 1)
+        for pattern in patterns:
+            np.testing.assert_array_almost_equal(pattern, patterns[0])
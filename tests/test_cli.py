@@ -0,0 +1,78 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+from toybox.cli import main, parse_job
+
+
+class TestParseJob(TestCase):
+
+    def test_defaults(self):
+        job = {'shape': [20, 30], 'blur': 2.,
+               'patterns': [{'points': [[1, 0, 1]], 'symmetry': 4},
+                            {'points': [[1, 0, 1]], 'blur': 1.}]}
+        specs = parse_job(job)
+        self.assertEqual(len(specs), 2)
+        self.assertEqual(specs[0]['shape'], (20, 30))
+        self.assertEqual(specs[0]['blur'], 2.)
+        self.assertEqual(specs[1]['blur'], 1.)
+        self.assertEqual(specs[0]['points'].symmetry, 4)
+
+    def test_single_pattern(self):
+        specs = parse_job({'points': [[1, 0, 1]], 'count': 3})
+        self.assertEqual(len(specs), 1)
+        self.assertEqual(specs[0]['count'], 3)
+
+    def test_unknown_key(self):
+        with self.assertRaises(ValueError):
+            parse_job({'patterns': [{'points': [[1, 0, 1]], 'spam': 1}]})
+
+    def test_no_patterns(self):
+        with self.assertRaises(ValueError):
+            parse_job({'shape': [10, 10], 'patterns': []})
+
+    def test_mismatched_shapes(self):
+        with self.assertRaises(ValueError):
+            parse_job({'patterns': [{'points': [[1, 0, 1]], 'shape': [10, 10]},
+                                    {'points': [[1, 0, 1]], 'shape': [20, 20]}]})
+
+
+class TestMain(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.job = os.path.join(self.directory, 'job.json')
+        self.output = os.path.join(self.directory, 'patterns.npy')
+        with open(self.job, 'w') as f:
+            json.dump({'shape': [16, 16], 'seed': 1, 'output': self.output,
+                       'patterns': [{'points': [[0, 0, 1], [1, 0, 1]],
+                                     'symmetry': '4mm', 'count': 4,
+                                     'noise': 0.1}]}, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_writes_frames(self):
+        main([self.job])
+        frames = np.load(self.output)
+        self.assertEqual(frames.shape, (4, 16, 16))
+
+    def test_deterministic(self):
+        main([self.job])
+        frames1 = np.load(self.output)
+        main([self.job, '-j', '2'])
+        frames2 = np.load(self.output)
+        np.testing.assert_array_almost_equal(frames1, frames2)
+
+    def test_cache(self):
+        cache = os.path.join(self.directory, 'cache')
+        main([self.job])
+        frames1 = np.load(self.output)
+        main([self.job, '--cache', cache])
+        main([self.job, '--cache', cache])
+        frames2 = np.load(self.output)
+        self.assertEqual(len(os.listdir(cache)), 1)
+        np.testing.assert_array_almost_equal(frames1, frames2)
@@ -0,0 +1,60 @@
+from unittest import TestCase
+
+import numpy as np
+from toybox.toys.dataset import PatternDataset, random_points
+
+
+class TestRandomPoints(TestCase):
+
+    def test_within_unit_disc(self):
+        random_state = np.random.RandomState(0)
+        points = random_points(random_state, '4mm', 3)
+        self.assertEqual(len(points.starting_points), 4)
+        radii = np.hypot(*points.positions.T)
+        self.assertTrue(np.all(radii <= 1.))
+
+
+class TestPatternDataset(TestCase):
+
+    def setUp(self):
+        self.kwargs = dict(shape=(16, 16), batch_size=3, n_batches=5,
+                           n_points=(1, 2), seed=1)
+
+    def collect(self, dataset):
+        return [(patterns.copy(), labels.copy()) for patterns, labels in dataset]
+
+    def test_shapes(self):
+        dataset = PatternDataset(processes=0, **self.kwargs)
+        batches = self.collect(dataset)
+        self.assertEqual(len(batches), len(dataset))
+        patterns, labels = batches[0]
+        self.assertEqual(patterns.shape, (3, 16, 16))
+        self.assertEqual(patterns.dtype, np.float32)
+        self.assertEqual(labels.shape, (3,))
+
+    def test_deterministic_across_processes(self):
+        serial = self.collect(PatternDataset(processes=0, **self.kwargs))
+        parallel = self.collect(PatternDataset(processes=2, n_slots=2,
+                                               **self.kwargs))
+        self.assertEqual(len(parallel), 5)
+        for (patterns1, labels1), (patterns2, labels2) in zip(serial, parallel):
+            np.testing.assert_array_equal(patterns1, patterns2)
+            np.testing.assert_array_equal(labels1, labels2)
+
+    def test_batches_differ(self):
+        batches = self.collect(PatternDataset(processes=0, **self.kwargs))
+        self.assertFalse(np.allclose(batches[0][0], batches[1][0]))
+
+    def test_zero_copy(self):
+        dataset = PatternDataset(processes=1, n_slots=2, **self.kwargs)
+        for patterns, labels in dataset:
+            self.assertFalse(patterns.flags.owndata)
+            break
+
+    def test_infinite(self):
+        dataset = PatternDataset(processes=1, shape=(8, 8), batch_size=1)
+        with self.assertRaises(TypeError):
+            len(dataset)
+        for i, _ in enumerate(dataset):
+            if i == 6:
+                break
@@ -0,0 +1,121 @@
+from unittest import TestCase
+
+import numpy as np
+from toybox.diffraction.electrons import electron_wavelength
+from toybox.diffraction.ewald import ReciprocalLattice, beam_frame, \
+    excitation_errors, rocking_curve
+from toybox.diffraction.structure import Structure
+
+FCC = [(0., 0., 0.), (0.5, 0.5, 0.), (0.5, 0., 0.5), (0., 0.5, 0.5)]
+
+
+class TestBeamFrame(TestCase):
+
+    def test_orthonormal(self):
+        frame = beam_frame([1., 1., 0.])
+        np.testing.assert_array_almost_equal(np.dot(frame, frame.T), np.eye(3))
+        np.testing.assert_array_almost_equal(frame[2], [0.5 ** 0.5] * 2 + [0.])
+
+    def test_x_axis(self):
+        frame = beam_frame([0., 0., 1.], x_axis=[1., 1., 5.])
+        np.testing.assert_array_almost_equal(frame[0], [0.5 ** 0.5] * 2 + [0.])
+
+    def test_parallel_x_axis(self):
+        with self.assertRaises(ValueError):
+            beam_frame([0., 0., 1.], x_axis=[0., 0., 2.])
+
+
+class TestExcitationErrors(TestCase):
+
+    def test_origin(self):
+        errors = excitation_errors([[0., 0., 0.]], 0.025, [0., 0., 1.])
+        self.assertAlmostEqual(errors[0], 0.)
+
+    def test_zero_order(self):
+        wavelength = electron_wavelength(200.)
+        errors = excitation_errors([[1., 0., 0.]], wavelength, [0., 0., 1.])
+        self.assertAlmostEqual(errors[0], -wavelength / 2, places=5)
+
+    def test_on_sphere(self):
+        k = 40.
+        g = np.array([[0., 2., np.sqrt(k ** 2 - 4.) - k]])
+        self.assertAlmostEqual(excitation_errors(g, 1 / k, [0, 0, 1])[0], 0.)
+
+    def test_several_beams(self):
+        g = np.random.RandomState(0).uniform(-1., 1., size=(5, 3))
+        beams = [[0., 0., 1.], [0.1, 0., 1.], [0., 1., 1.]]
+        errors = excitation_errors(g, 0.025, beams)
+        self.assertEqual(errors.shape, (5, 3))
+        for i, beam in enumerate(beams):
+            np.testing.assert_array_almost_equal(
+                errors[:, i], excitation_errors(g, 0.025, beam))
+
+    def test_rocking_curve(self):
+        self.assertEqual(rocking_curve(0., 100.), 1.)
+        self.assertAlmostEqual(rocking_curve(0.01, 100.), 0.)
+
+
+class TestReciprocalLattice(TestCase):
+
+    def setUp(self):
+        self.cell = 4. * np.eye(3)
+        self.lattice = ReciprocalLattice.from_cell(self.cell, g_max=2.)
+
+    def test_from_cell(self):
+        self.assertEqual(len(self.lattice), len(self.lattice.hkl))
+        norms = np.linalg.norm(self.lattice.g, axis=1)
+        self.assertLessEqual(norms.max(), 2.)
+        np.testing.assert_array_almost_equal(self.lattice.g,
+                                             self.lattice.hkl / 4.)
+
+    def test_structure_intensities(self):
+        lattice = ReciprocalLattice.from_cell(self.cell, 1.,
+                                              Structure(FCC, np.ones(4)))
+        allowed = np.all(lattice.hkl % 2 == lattice.hkl[:, :1] % 2, axis=1)
+        np.testing.assert_array_almost_equal(lattice.intensities,
+                                             np.where(allowed, 16., 0.))
+
+    def test_near_sphere_matches_brute_force(self):
+        wavelength = electron_wavelength(200.)
+        for zone_axis in ([0, 0, 1], [1, 1, 0], [1, 2, 3]):
+            indices, errors = self.lattice.near_sphere(wavelength, zone_axis,
+                                                       s_max=0.03)
+            all_errors = excitation_errors(self.lattice.g, wavelength,
+                                           zone_axis)
+            expected = np.flatnonzero(np.abs(all_errors) <= 0.03)
+            np.testing.assert_array_equal(indices, expected)
+            np.testing.assert_array_almost_equal(errors, all_errors[expected])
+
+    def test_near_sphere_scattered(self):
+        g = np.random.RandomState(0).uniform(-3., 3., size=(5000, 3))
+        lattice = ReciprocalLattice(g)
+        expected = np.flatnonzero(np.abs(excitation_errors(g, 0.1, [1, 0, 1]))
+                                  <= 0.05)
+        indices, _ = lattice.near_sphere(0.1, [1, 0, 1], s_max=0.05)
+        self.assertGreater(len(indices), 0)
+        np.testing.assert_array_equal(indices, expected)
+
+    def test_hkl(self):
+        self.assertIsNone(ReciprocalLattice(np.ones((2, 3))).hkl)
+        with self.assertRaises(ValueError):
+            ReciprocalLattice(np.ones((2, 3)), hkl=[(1, 0, 0)])
+
+    def test_intensity_mismatch(self):
+        with self.assertRaises(ValueError):
+            ReciprocalLattice(np.zeros((3, 3)), intensities=[1., 2.])
+
+    def test_points_zero_order(self):
+        indices, _ = self.lattice.near_sphere(electron_wavelength(200.),
+                                              [0, 0, 1], s_max=0.03)
+        # Only the zero-order Laue zone is close enough at this energy.
+        self.assertTrue(np.all(self.lattice.hkl[indices, 2] == 0))
+        points = self.lattice.points(zone_axis=[0, 0, 1], s_max=0.03)
+        self.assertEqual(len(points.points), len(indices))
+        self.assertTrue(np.all(points.intensities == 1.))
+
+    def test_points_attenuated(self):
+        culled = self.lattice.points(s_max=0.03)
+        attenuated = self.lattice.points(s_max=0.03, thickness=100.)
+        self.assertEqual(len(culled.points), len(attenuated.points))
+        self.assertTrue(np.all(attenuated.intensities <= 1.))
+        self.assertTrue(np.any(attenuated.intensities < 1.))
@@ -0,0 +1,74 @@
+from unittest import TestCase
+
+import numpy as np
+from toybox.toys.core import Points, Pattern
+from toybox.toys.incremental import IncrementalPattern
+from toybox.toys.sparse import SparsePattern
+
+
+class TestIncrementalPattern(TestCase):
+
+    def setUp(self):
+        self.points = Points([(0., 0., 1.), (1., 0., 1.), (0.5, 0.3, 0.5)],
+                             symmetry='4mm', auto_zero=False)
+        self.kwargs = dict(shape=(40, 40), scale=0.8, blur=1.)
+        self.pattern = IncrementalPattern(self.points, **self.kwargs)
+
+    def assertMatches(self, points, pattern):
+        expected = SparsePattern.from_points(points, **self.kwargs).to_dense()
+        np.testing.assert_array_almost_equal(pattern.pattern, expected)
+
+    def test_initial(self):
+        self.assertIsInstance(self.pattern.pattern, Pattern)
+        self.assertMatches(self.points, self.pattern)
+
+    def test_matches_dense_away_from_edges(self):
+        dense = Pattern.from_points(self.points, **self.kwargs)
+        np.testing.assert_allclose(self.pattern.pattern[5:-5, 5:-5],
+                                   dense[5:-5, 5:-5], atol=1e-4)
+
+    def test_set_intensity(self):
+        self.pattern.set_intensity(2, 2.)
+        expected = Points([(0., 0., 1.), (1., 0., 1.), (0.5, 0.3, 2.)],
+                          symmetry='4mm', auto_zero=False)
+        self.assertMatches(expected, self.pattern)
+
+    def test_move_point(self):
+        self.pattern.move_point(2, (0.2, 0.6))
+        expected = Points([(0., 0., 1.), (1., 0., 1.), (0.2, 0.6, 0.5)],
+                          symmetry='4mm', auto_zero=False)
+        self.assertMatches(expected, self.pattern)
+
+    def test_move_point_changes_extent(self):
+        self.pattern.move_point(1, (0.8, 0.))
+        expected = Points([(0., 0., 1.), (0.8, 0., 1.), (0.5, 0.3, 0.5)],
+                          symmetry='4mm', auto_zero=False)
+        self.assertMatches(expected, self.pattern)
+
+    def test_append_point(self):
+        self.pattern.append_point((0.4, 0.4, 0.2), spot=(2., 1., 0.))
+        expected = Points([(0., 0., 1.), (1., 0., 1.), (0.5, 0.3, 0.5),
+                           (0.4, 0.4, 0.2)], symmetry='4mm', auto_zero=False,
+                          spots=[(1., 1., 0.)] * 3 + [(2., 1., 0.)])
+        self.assertMatches(expected, self.pattern)
+
+    def test_append_point_changes_extent(self):
+        self.pattern.append_point((1.5, 0., 0.2))
+        expected = Points([(0., 0., 1.), (1., 0., 1.), (0.5, 0.3, 0.5),
+                           (1.5, 0., 0.2)], symmetry='4mm', auto_zero=False)
+        self.assertMatches(expected, self.pattern)
+
+    def test_unknown_intensities(self):
+        # The origin appended by default has no intensity.
+        with self.assertRaises(ValueError):
+            IncrementalPattern(Points([(1., 0., 1.)], symmetry=4),
+                               **self.kwargs)
+        with self.assertRaises(ValueError):
+            self.pattern.set_intensity(1, None)
+        with self.assertRaises(ValueError):
+            self.pattern.append_point((0.2, 0.2))
+        self.assertMatches(self.points, self.pattern)
+
+    def test_does_not_modify_points(self):
+        self.pattern.set_intensity(0, 3.)
+        self.assertEqual(self.points.starting_points[0, 2], 1.)
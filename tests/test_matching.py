@@ -0,0 +1,82 @@
+from unittest import TestCase
+
+import numpy as np
+from toybox.analysis.matching import TemplateBank, rotate_points, normalise
+from toybox.toys.core import Points, Pattern
+
+
+class TestRotatePoints(TestCase):
+
+    def test_rotate(self):
+        points = Points([(1., 0., 1.)], symmetry=1, auto_zero=False)
+        rotated = rotate_points(points, 90)
+        np.testing.assert_array_almost_equal(rotated.positions, [[0., 1.]])
+        self.assertEqual(rotated.symmetry, 1)
+
+
+class TestNormalise(TestCase):
+
+    def test_unit_norm(self):
+        frames = np.random.RandomState(0).uniform(size=(3, 4, 4))
+        normalised = normalise(frames)
+        np.testing.assert_array_almost_equal(normalised.mean(axis=1), 0.)
+        np.testing.assert_array_almost_equal(
+            np.linalg.norm(normalised, axis=1), 1.)
+
+    def test_constant_frame(self):
+        normalised = normalise(np.ones((1, 4, 4)))
+        np.testing.assert_array_equal(normalised, 0.)
+
+
+class TestTemplateBank(TestCase):
+
+    def setUp(self):
+        self.points = Points([(0., 0., 1.), (1., 0., 1.), (0.5, 0.2, 0.5)],
+                             symmetry=2, auto_zero=False)
+        self.angles = np.arange(0, 180, 15)
+        self.bank = TemplateBank.from_points(self.points, self.angles,
+                                             shape=(32, 32), scale=0.8)
+
+    def test_len(self):
+        self.assertEqual(len(self.bank), len(self.angles))
+
+    def test_recovers_orientation(self):
+        frame = Pattern.from_points(rotate_points(self.points, 45),
+                                    shape=(32, 32), scale=0.8)
+        indices, scores = self.bank.match(frame)
+        self.assertEqual(self.bank.labels[indices[0]], 45)
+        self.assertAlmostEqual(scores[0], 1.)
+
+    def test_stack(self):
+        frames = np.array([Pattern.from_points(rotate_points(self.points, a),
+                                               shape=(32, 32), scale=0.8)
+                           for a in (30, 90, 150)]).reshape(3, 1, 32, 32)
+        indices, scores = self.bank.match(frames, n_best=3, chunk_size=2)
+        self.assertEqual(indices.shape, (3, 1, 3))
+        np.testing.assert_array_equal(self.bank.labels[indices[:, 0, 0]],
+                                      [30, 90, 150])
+        self.assertTrue(np.all(np.diff(scores, axis=-1) <= 0))
+
+    def test_matches_naive_loop(self):
+        frames = np.random.RandomState(0).uniform(size=(5, 32, 32))
+        scores = self.bank.scores(frames)
+        for i, frame in enumerate(frames):
+            for j, template in enumerate(self.bank.matrix):
+                expected = np.corrcoef(frame.ravel(), template)[0, 1]
+                self.assertAlmostEqual(scores[i, j], expected)
+
+    def test_symmetric_orientations_reused(self):
+        points = Points([(1., 0., 1.), (0.5, 0.2, 0.5)], symmetry=4,
+                        auto_zero=False)
+        bank = TemplateBank.from_points(points, [0., 30., 90., 120.],
+                                        shape=(32, 32), scale=0.8)
+        self.assertEqual(len(bank), 4)
+        np.testing.assert_array_equal(bank.matrix[0], bank.matrix[2])
+        np.testing.assert_array_equal(bank.matrix[1], bank.matrix[3])
+        direct = TemplateBank([Pattern.from_points(rotate_points(points, 90.),
+                                                   shape=(32, 32), scale=0.8)])
+        np.testing.assert_array_almost_equal(bank.matrix[2], direct.matrix[0])
+
+    def test_wrong_shape(self):
+        with self.assertRaises(ValueError):
+            self.bank.match(np.zeros((16, 16)))
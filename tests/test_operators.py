@@ -4,7 +4,9 @@ from unittest import TestCase
 
 import numpy as np
 from random import random
-from toybox.symmetry.operators import BaseOperator, Rotation, Reflection, propagate
+from toybox.symmetry.operators import BaseOperator, Rotation, Reflection, \
+    propagate, generate_group, orbit_representatives, group_orbits
+from toybox.symmetry.parsers import parse_hermann_mauguin
 from toybox.tools import equivalent
 
 ROOT2 = sqrt(2)
@@ -237,3 +239,40 @@ class TestPropagate(TestCase):
         result = propagate(self.pts1, rotation)
         self.assertTrue(equivalent(result, expected),
                         msg="Expected {},\ngot {}".format(expected, result))
+
+
+class TestGenerateGroup(unittest.TestCase):
+
+    def test_orders(self):
+        for symmetry, order in ((1, 1), (2, 2), (3, 3), (4, 4), (6, 6),
+                                ('m', 2), ('2mm', 4), ('3m', 6), ('4mm', 8),
+                                ('6mm', 12)):
+            group = generate_group(*parse_hermann_mauguin(symmetry))
+            self.assertEqual(len(group), order, msg=symmetry)
+
+    def test_starts_with_identity(self):
+        group = generate_group(Rotation.from_angle(90))
+        np.testing.assert_array_almost_equal(group[0], IDENTITY)
+
+
+class TestGroupOrbits(unittest.TestCase):
+
+    def setUp(self):
+        self.group = generate_group(*parse_hermann_mauguin(4))
+
+    def test_representatives(self):
+        positions = np.array([[1., 0.], [0., 1.], [0., -1.], [2., 1.]])
+        representatives, elements = orbit_representatives(positions,
+                                                           self.group)
+        np.testing.assert_array_almost_equal(
+            representatives, [[-1., 0.], [-1., 0.], [-1., 0.], [-2., -1.]])
+        images = np.einsum('nij,nj->ni', self.group[elements], positions)
+        np.testing.assert_array_almost_equal(images, representatives)
+
+    def test_labels(self):
+        positions = np.array([[1., 0.], [2., 1.], [0., 1.], [0., 0.],
+                              [-1., 2.]])
+        labels, representatives = group_orbits(positions, self.group)
+        np.testing.assert_array_equal(labels, [1, 0, 1, 2, 0])
+        np.testing.assert_array_almost_equal(
+            representatives, [[-2., -1.], [-1., 0.], [0., 0.]])
@@ -0,0 +1,52 @@
+from unittest import TestCase
+
+import numpy as np
+from toybox.analysis.peaks import find_peaks
+from toybox.toys.core import Points, Pattern
+from toybox.tools import sort_points
+
+
+class TestFindPeaks(TestCase):
+
+    def setUp(self):
+        self.points = Points([(0., 0., 1.), (1., 0.3, 0.5)], symmetry=4,
+                             auto_zero=False)
+        self.shape = (64, 64)
+        self.pattern = Pattern.from_points(self.points, self.shape, scale=0.7)
+
+    def test_round_trip(self):
+        peaks = find_peaks(self.pattern)
+        expected = self.points.to_shape(self.shape, scale=0.7)
+        self.assertEqual(len(peaks), len(expected))
+        found = sort_points(peaks - (32., 32., 0.))[:, :2]
+        expected = sort_points(np.column_stack((expected - 32., np.zeros(5))))
+        np.testing.assert_allclose(found, expected[:, :2], atol=0.05)
+
+    def test_usable_as_points(self):
+        peaks = find_peaks(self.pattern)
+        points = Points(peaks, auto_zero=False)
+        np.testing.assert_array_equal(points.starting_points, peaks)
+
+    def test_stack(self):
+        stack = np.array([self.pattern, 2 * self.pattern, np.zeros(self.shape)])
+        stack = stack.reshape((3, 1) + self.shape)
+        frames, peaks = find_peaks(stack)
+        self.assertEqual(frames.shape, (10, 2))
+        np.testing.assert_array_equal(np.bincount(frames[:, 0]), [5, 5])
+        single = find_peaks(self.pattern)
+        np.testing.assert_allclose(peaks[frames[:, 0] == 1, 2],
+                                   2 * single[:, 2])
+
+    def test_threshold_abs(self):
+        peaks = find_peaks(self.pattern, threshold_abs=np.inf)
+        self.assertEqual(peaks.shape, (0, 3))
+
+    def test_gaussian_subpixel(self):
+        x, y = np.mgrid[0:16, 0:16]
+        frame = np.exp(-((x - 7.3) ** 2 + (y - 8.8) ** 2) / 4.)
+        peaks = find_peaks(frame)
+        np.testing.assert_allclose(peaks[0, :2], [7.3, 8.8])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            find_peaks(np.zeros(5))
@@ -0,0 +1,93 @@
+from unittest import TestCase
+
+import numpy as np
+from toybox.diffraction.electrons import electron_wavelength
+from toybox.diffraction.ewald import excitation_errors
+from toybox.diffraction.precession import Precession, precession_directions, \
+    tilted_beams, _radial_weights
+from toybox.toys.core import Points, Pattern
+
+
+class TestElectronWavelength(TestCase):
+
+    def test_known_values(self):
+        self.assertAlmostEqual(electron_wavelength(200.), 0.02508, places=5)
+        self.assertAlmostEqual(electron_wavelength(300.), 0.01969, places=5)
+
+
+class TestTiltedBeams(TestCase):
+
+    def test_untilted(self):
+        wavelength = electron_wavelength(200.)
+        errors = excitation_errors([[1., 0., 0.]], wavelength,
+                                   tilted_beams([[0., 0.]]))
+        self.assertAlmostEqual(errors[0, 0], -wavelength / 2, places=5)
+
+    def test_on_sphere(self):
+        # A beam tilted towards -g by sin(tilt) = g λ / 2 excites g exactly.
+        wavelength = electron_wavelength(200.)
+        tilt = -0.5 * wavelength
+        errors = excitation_errors([[1., 0., 0.]], wavelength,
+                                   tilted_beams([[tilt, 0.]]))
+        self.assertAlmostEqual(errors[0, 0], 0.)
+
+
+class TestPrecession(TestCase):
+
+    def setUp(self):
+        self.points = Points([(0., 0., 1.), (1., 0., 1.), (0.5, 0.5, 1.)],
+                             symmetry='4mm', auto_zero=False)
+
+    def test_direct_beam(self):
+        weights = Precession(1.).weights(self.points)
+        self.assertAlmostEqual(weights[0], 1.)
+        self.assertTrue(np.all((weights >= 0) & (weights <= 1)))
+
+    def test_no_precession(self):
+        precession = Precession(0., thickness=100.)
+        weights = precession.weights(self.points, reciprocal_scale=2.)
+        positions = self.points.starting_points[:, :2].astype(float)
+        radii = 2 * np.hypot(positions[:, 0], positions[:, 1])
+        g = np.column_stack((radii, 0 * radii, 0 * radii))
+        errors = excitation_errors(g, precession.wavelength, [0., 0., 1.])
+        np.testing.assert_array_almost_equal(
+            weights, np.square(np.sinc(100. * errors)))
+
+    def test_precession_excites_outer_reflections(self):
+        static = Precession(0.).weights(self.points)
+        precessed = Precession(1.).weights(self.points)
+        self.assertGreater(precessed[1], static[1])
+
+    def test_matches_averaged_tilts(self):
+        precession = Precession(1., n_steps=90)
+        weights = precession.weights(self.points)
+        tilts = np.sin(np.radians(1.)) * precession_directions(90)
+        g = self.points.starting_points[:, :2].astype(float)
+        g = np.column_stack((g, np.zeros(len(g))))
+        errors = excitation_errors(g, precession.wavelength,
+                                   tilted_beams(tilts))
+        expected = np.mean(np.square(np.sinc(500. * errors)), axis=1)
+        np.testing.assert_array_almost_equal(weights, expected)
+
+    def test_cached(self):
+        precession = Precession(1.5)
+        precession.weights(self.points)
+        hits = _radial_weights.cache_info().hits
+        precession.weights(Points([(0., 1., 1.), (0.5, -0.5, 1.)],
+                                  symmetry='4mm', auto_zero=False))
+        self.assertEqual(_radial_weights.cache_info().hits, hits)
+        precession.weights(self.points)
+        self.assertEqual(_radial_weights.cache_info().hits, hits + 1)
+
+    def test_apply(self):
+        precession = Precession(1.)
+        weighted = precession.apply(self.points)
+        np.testing.assert_array_almost_equal(
+            weighted.starting_points[:, 2].astype(float),
+            precession.weights(self.points))
+        self.assertEqual(weighted.symmetry, '4mm')
+
+    def test_from_points(self):
+        pattern = Precession(1.).from_points(self.points, shape=(32, 32))
+        self.assertIsInstance(pattern, Pattern)
+        self.assertEqual(pattern.shape, (32, 32))
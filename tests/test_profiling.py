@@ -0,0 +1,53 @@
+from unittest import TestCase
+
+import numpy as np
+from toybox.profiling import instrument, stage, Report
+from toybox.toys.core import Points, Pattern
+
+
+class TestInstrument(TestCase):
+
+    def setUp(self):
+        self.points = Points([(1., 0., 1.), (0., 0., 1.)], symmetry=4,
+                             auto_zero=False)
+
+    def test_records_stages(self):
+        with instrument() as report:
+            Pattern.from_points(self.points, shape=(20, 20))
+        self.assertIsInstance(report, Report)
+        for name in ('propagate', 'render', 'blur'):
+            self.assertIn(name, report)
+            self.assertGreater(report[name].calls, 0)
+            self.assertGreaterEqual(report[name].time, 0.)
+
+    def test_records_check_points(self):
+        with instrument() as report:
+            points = Points([(1., 0., 1.), (0., 0., 1.)], auto_zero=False)
+            Pattern.from_points(points, shape=(20, 20))
+        self.assertEqual(report['check_points'].calls, 1)
+
+    def test_memory(self):
+        with instrument(memory=True) as report:
+            with stage('allocate'):
+                data = np.ones(100000)
+        self.assertGreaterEqual(report['allocate'].allocated, data.nbytes)
+
+    def test_memory_disabled(self):
+        with instrument() as report:
+            with stage('allocate'):
+                np.ones(10)
+        self.assertIsNone(report['allocate'].allocated)
+
+    def test_disabled_records_nothing(self):
+        with instrument() as report:
+            pass
+        Pattern.from_points(self.points, shape=(20, 20))
+        self.assertEqual(report.as_dict(), {})
+
+    def test_as_dict(self):
+        with instrument() as report:
+            with stage('spam'):
+                pass
+            with stage('spam'):
+                pass
+        self.assertEqual(report.as_dict()['spam']['calls'], 2)
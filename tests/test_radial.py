@@ -0,0 +1,60 @@
+from unittest import TestCase
+
+import numpy as np
+from toybox.analysis.radial import radial_bins, radial_profile
+from toybox.toys.core import Points, Pattern
+
+
+class TestRadialBins(TestCase):
+
+    def test_cached(self):
+        self.assertIs(radial_bins((10, 10)), radial_bins((10, 10)))
+        self.assertIsNot(radial_bins((10, 10)), radial_bins((10, 10), None, 3))
+
+    def test_counts(self):
+        bins = radial_bins((10, 12), (4.5, 5.), 7)
+        self.assertEqual(bins.counts.sum(), 120)
+        self.assertEqual(len(bins.radii), 7)
+
+
+class TestRadialProfile(TestCase):
+
+    def setUp(self):
+        x, y = np.mgrid[0:32, 0:32]
+        self.distances = np.hypot(x - 16, y - 16)
+
+    def test_constant(self):
+        profile = radial_profile(np.ones((32, 32)))
+        np.testing.assert_array_almost_equal(profile, 1.)
+
+    def test_sum(self):
+        data = np.random.RandomState(0).uniform(size=(32, 32))
+        profile = radial_profile(data, average=False)
+        self.assertAlmostEqual(profile.sum(), data.sum())
+
+    def test_matches_naive(self):
+        data = np.random.RandomState(0).uniform(size=(32, 32))
+        profile = radial_profile(data, nbins=8)
+        bins = radial_bins((32, 32), None, 8)
+        index = bins.index.reshape(32, 32)
+        expected = [data[index == i].mean() for i in range(8)]
+        np.testing.assert_array_almost_equal(profile, expected)
+
+    def test_ring(self):
+        data = (np.abs(self.distances - 10) < 0.5).astype(float)
+        profile = radial_profile(data)
+        self.assertEqual(np.argmax(profile), 10)
+
+    def test_stack_matches_single(self):
+        stack = np.random.RandomState(0).uniform(size=(2, 3, 32, 32))
+        profiles = radial_profile(stack, centre=(15.5, 15.5), nbins=10)
+        self.assertEqual(profiles.shape, (2, 3, 10))
+        np.testing.assert_array_almost_equal(
+            profiles[1, 2], radial_profile(stack[1, 2], (15.5, 15.5), 10))
+
+    def test_pattern_method(self):
+        points = Points([(0., 0., 1.), (1., 0., 1.)], symmetry=6,
+                        auto_zero=False)
+        pattern = Pattern.from_points(points, (64, 64), scale=0.5)
+        profile = pattern.radial_profile()
+        self.assertEqual(np.argmax(profile[5:]) + 5, 16)
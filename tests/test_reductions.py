@@ -0,0 +1,84 @@
+from unittest import TestCase
+
+import numpy as np
+from toybox.analysis.reductions import RunningMean, RunningMax, RunningMin, \
+    RunningVariance, tap, reduce_frames
+from toybox.toys.batch import generate, render_batch
+from toybox.toys.core import Points
+
+
+class TestReducers(TestCase):
+
+    def setUp(self):
+        self.frames = np.random.RandomState(0).normal(3., 2., size=(50, 4, 5))
+
+    def test_mean(self):
+        mean, = reduce_frames(self.frames, RunningMean())
+        np.testing.assert_array_almost_equal(mean, self.frames.mean(axis=0))
+
+    def test_max_min(self):
+        maximum, minimum = reduce_frames(self.frames, RunningMax(), RunningMin())
+        np.testing.assert_array_equal(maximum, self.frames.max(axis=0))
+        np.testing.assert_array_equal(minimum, self.frames.min(axis=0))
+
+    def test_variance(self):
+        variance = RunningVariance(ddof=1)
+        reduce_frames(self.frames, variance)
+        np.testing.assert_array_almost_equal(variance.result,
+                                             self.frames.var(axis=0, ddof=1))
+        np.testing.assert_array_almost_equal(variance.std,
+                                             self.frames.std(axis=0, ddof=1))
+
+    def test_does_not_modify_frames(self):
+        frames = self.frames.copy()
+        reduce_frames(frames, RunningMean(), RunningMax(), RunningVariance())
+        np.testing.assert_array_equal(frames, self.frames)
+
+    def test_merge(self):
+        for reducer_type in (RunningMean, RunningMax, RunningMin,
+                             RunningVariance):
+            first, second, full = reducer_type(), reducer_type(), reducer_type()
+            reduce_frames(self.frames[:20], first)
+            reduce_frames(self.frames[20:], second)
+            reduce_frames(self.frames, full)
+            first.merge(second)
+            self.assertEqual(first.count, full.count)
+            np.testing.assert_array_almost_equal(first.result, full.result)
+
+    def test_merge_empty(self):
+        mean = RunningMean().merge(RunningMean())
+        self.assertIsNone(mean.result)
+        variance = RunningVariance().merge(
+            RunningVariance().update(self.frames[0]))
+        np.testing.assert_array_equal(variance.result, 0.)
+
+    def test_tap(self):
+        mean = RunningMean()
+        frames = list(tap(iter(self.frames), mean))
+        self.assertEqual(len(frames), 50)
+        self.assertEqual(mean.count, 50)
+
+
+class TestBatchReductions(TestCase):
+
+    def setUp(self):
+        points = Points([(0., 0., 1.), (1., 0., 1.)], symmetry=4,
+                        auto_zero=False)
+        self.specs = [dict(points=points, shape=(16, 16), count=10, noise=0.1)]
+
+    def test_generate(self):
+        mean, variance = RunningMean(), RunningVariance()
+        frames = np.array(list(generate(self.specs, seed=0,
+                                        reducers=(mean, variance))))
+        np.testing.assert_array_almost_equal(mean.result, frames.mean(axis=0))
+        np.testing.assert_array_almost_equal(variance.result,
+                                             frames.var(axis=0))
+
+    def test_render_batch_parallel(self):
+        specs = [dict(points=self.specs[0]['points'], shape=(16, 16), blur=b)
+                 for b in (0.5, 1., 1.5)]
+        maximum = RunningMax()
+        frames = np.array(list(render_batch(specs, processes=2,
+                                            reducers=(maximum,))))
+        np.testing.assert_array_almost_equal(maximum.result,
+                                             frames.max(axis=0))
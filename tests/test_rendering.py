@@ -0,0 +1,294 @@
+import subprocess
+import sys
+from unittest import TestCase, skipIf
+
+import numpy as np
+from scipy.special import erf
+from scipy.stats import multivariate_normal
+from toybox.toys.core import Points, Pattern
+from toybox.toys.rendering import window_indices, integrated_profile, \
+    accumulate, peak_windows, spot_covariances, \
+    inverse_covariances, render, blend, set_backend, get_backend, \
+    covariance_spots, bin_frames, pyramid
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+class TestIntegratedProfile(TestCase):
+
+    def test_sums_to_one(self):
+        centres = np.array([10.3, 20.5, 30.9])
+        indices = window_indices(centres, 8)
+        profile = integrated_profile(indices, centres, sigma=1.5)
+        np.testing.assert_array_almost_equal(profile.sum(axis=1), np.ones(3))
+
+    def test_symmetric_about_pixel_centre(self):
+        indices = window_indices(np.array([5.]), 3)
+        profile = integrated_profile(indices, np.array([5.]))[0]
+        np.testing.assert_array_almost_equal(profile, profile[::-1])
+
+
+class TestAccumulate(TestCase):
+
+    def test_discards_out_of_bounds(self):
+        rows = np.array([[-1, 0]])
+        cols = np.array([[0, 1]])
+        values = np.ones((1, 2, 2))
+        frame = accumulate(rows, cols, values, (2, 2))
+        np.testing.assert_array_equal(frame, [[1., 1.], [0., 0.]])
+
+    def test_overlapping_windows_add(self):
+        rows = np.array([[0], [0]])
+        cols = np.array([[1], [1]])
+        values = np.array([[[1.]], [[2.]]])
+        frame = accumulate(rows, cols, values, (1, 2))
+        np.testing.assert_array_equal(frame, [[0., 3.]])
+
+
+class TestRenderArea(TestCase):
+
+    def test_conserves_intensity(self):
+        positions = np.array([[10.2, 12.7], [20.5, 5.5]])
+        frame = render(positions, [1., 2.], (32, 32), sigma=0.5, mode='area')
+        self.assertAlmostEqual(frame.sum(), 3.)
+
+    def test_matches_supersampled_reference(self):
+        position = np.array([7.3, 8.6])
+        sigma = 0.6
+        frame = render([position], [1.], (16, 16), sigma=sigma, mode='area')
+        factor = 15
+        fine = (np.arange(16 * factor) + 0.5) / factor - 0.5
+        x, y = np.meshgrid(fine, fine, indexing='ij')
+        pdf = multivariate_normal.pdf(np.dstack((x, y)), mean=position,
+                                      cov=sigma ** 2)
+        reference = pdf.reshape(16, factor, 16, factor).sum(axis=(1, 3))
+        reference /= factor ** 2
+        np.testing.assert_allclose(frame, reference, atol=2e-3)
+
+
+class TestFromPointsArea(TestCase):
+
+    def setUp(self):
+        self.points = Points([(0., 0., 1.), (1., 0., 1.)], symmetry=4,
+                             auto_zero=False)
+
+    def test_close_to_sampled(self):
+        sampled = Pattern.from_points(self.points, shape=(40, 40), scale=0.8)
+        area = Pattern.from_points(self.points, shape=(40, 40), scale=0.8,
+                                   mode='area')
+        self.assertIsInstance(area, Pattern)
+        np.testing.assert_allclose(area, sampled, atol=5e-3)
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            Pattern.from_points(self.points, mode='spam')
+
+
+class TestSpotCovariances(TestCase):
+
+    def test_circular(self):
+        covariances = spot_covariances([(2., 2., 30.)])
+        np.testing.assert_array_almost_equal(covariances[0], 4 * np.eye(2))
+
+    def test_rotated(self):
+        covariances = spot_covariances([(2., 1., 90.)])
+        np.testing.assert_array_almost_equal(covariances[0], [[1., 0.], [0., 4.]])
+
+    def test_inverse(self):
+        covariances = spot_covariances([(2., 1., 30.), (1., 3., -10.)])
+        inverses, determinants = inverse_covariances(covariances)
+        np.testing.assert_array_almost_equal(inverses,
+                                             np.linalg.inv(covariances))
+        np.testing.assert_array_almost_equal(determinants,
+                                             np.linalg.det(covariances))
+
+    def test_covariance_spots(self):
+        covariances = spot_covariances([(2., 1., 30.), (1., 3., -10.)])
+        spots = covariance_spots(covariances)
+        np.testing.assert_array_almost_equal(spot_covariances(spots),
+                                             covariances)
+        np.testing.assert_array_almost_equal(spots[:, :2], [(1., 2.), (1., 3.)])
+
+
+class TestAnisotropicPeakWindows(TestCase):
+
+    def test_matches_scipy(self):
+        positions = np.array([[10.3, 12.1], [20.7, 18.4]])
+        covariances = spot_covariances([(2., 0.8, 30.), (1.5, 1., -60.)])
+        rows, cols, values = peak_windows(positions, [1., 2.], mode='sample',
+                                          truncate=6., covariances=covariances)
+        frame = accumulate(rows, cols, values, (32, 32))
+        x, y = np.mgrid[0:32, 0:32]
+        grid = np.dstack((x, y))
+        expected = (multivariate_normal.pdf(grid, positions[0], covariances[0])
+                    + 2 * multivariate_normal.pdf(grid, positions[1],
+                                                  covariances[1]))
+        np.testing.assert_allclose(frame, expected, atol=1e-7)
+
+    def test_isotropic_matches_sigma(self):
+        positions = np.array([[10.3, 12.1]])
+        for mode in ('sample', 'area'):
+            _, _, expected = peak_windows(positions, [1.], sigma=1.5, mode=mode)
+            _, _, values = peak_windows(positions, [1.], mode=mode,
+                                        covariances=[2.25 * np.eye(2)])
+            np.testing.assert_array_almost_equal(values, expected)
+
+    def test_area_requires_aligned(self):
+        covariances = spot_covariances([(2., 1., 30.)])
+        with self.assertRaises(ValueError):
+            peak_windows([[5., 5.]], [1.], mode='area', covariances=covariances)
+
+
+class TestBinning(TestCase):
+
+    def test_bin_frames(self):
+        frame = np.arange(16.).reshape(4, 4)
+        np.testing.assert_array_equal(bin_frames(frame),
+                                      [[10., 18.], [42., 50.]])
+
+    def test_bin_stack_drops_remainder(self):
+        frames = np.ones((3, 7, 10))
+        binned = bin_frames(frames, 3)
+        self.assertEqual(binned.shape, (3, 2, 3))
+        self.assertTrue(np.all(binned == 9.))
+
+    def test_bin_does_not_wrap(self):
+        binned = bin_frames(np.full((4, 4), 255, dtype=np.uint8))
+        np.testing.assert_array_equal(binned, [[1020, 1020], [1020, 1020]])
+        self.assertEqual(binned.dtype, np.int64)
+
+    def test_bad_factor(self):
+        for factor in (0, -2, 1.5):
+            with self.assertRaises(ValueError):
+                bin_frames(np.ones((4, 4)), factor)
+
+    def test_pyramid(self):
+        frame = np.random.RandomState(0).uniform(size=(64, 64))
+        levels = pyramid(frame, 3)
+        self.assertEqual([level.shape for level in levels],
+                         [(64, 64), (32, 32), (16, 16)])
+        np.testing.assert_array_almost_equal(levels[2], bin_frames(frame, 4))
+        for level in levels:
+            self.assertAlmostEqual(level.sum(), frame.sum())
+
+
+class BackendParity:
+    """Tests run against every rendering backend."""
+
+    backend = None
+
+    def setUp(self):
+        set_backend(self.backend)
+        self.positions = np.array([[10.3, 12.1], [20.7, 18.4], [0.2, 30.6]])
+        self.intensities = np.array([1., 2., 0.5])
+        self.x, self.y = np.mgrid[0:32, 0:32]
+
+    def tearDown(self):
+        set_backend('auto')
+
+    def test_backend(self):
+        self.assertEqual(get_backend(), self.backend)
+
+    def test_render_sample(self):
+        covariances = spot_covariances([(2., 0.8, 30.), (1.5, 1., -60.),
+                                        (1., 1., 0.)])
+        frame = render(self.positions, self.intensities, (32, 32),
+                       truncate=8., mode='sample', covariances=covariances)
+        grid = np.dstack((self.x, self.y))
+        expected = sum(i * multivariate_normal.pdf(grid, p, c) for p, i, c in
+                       zip(self.positions, self.intensities, covariances))
+        np.testing.assert_allclose(frame, expected, atol=1e-12)
+
+    def test_render_area(self):
+        sigmas = np.array([[1., 2.], [1.5, 1.5], [0.5, 1.]])
+        covariances = np.array([np.diag(np.square(s)) for s in sigmas])
+        frame = render(self.positions, self.intensities, (32, 32),
+                       truncate=10., mode='area', covariances=covariances)
+
+        def profile(indices, centre, sigma):
+            distances = (indices - centre) / (sigma * np.sqrt(2))
+            half_pixel = 0.5 / (sigma * np.sqrt(2))
+            return 0.5 * (erf(distances + half_pixel)
+                          - erf(distances - half_pixel))
+
+        expected = sum(i * profile(self.x, p[0], s[0])
+                       * profile(self.y, p[1], s[1])
+                       for p, i, s in zip(self.positions, self.intensities,
+                                          sigmas))
+        np.testing.assert_allclose(frame, expected, atol=1e-12)
+
+    def test_render_isotropic(self):
+        for mode in ('sample', 'area'):
+            frame = render(self.positions, self.intensities, (32, 32),
+                           sigma=1.5, mode=mode)
+            expected = render(self.positions, self.intensities, (32, 32),
+                              mode=mode, covariances=[2.25 * np.eye(2)] * 3)
+            np.testing.assert_allclose(frame, expected, atol=1e-12)
+
+    def test_render_requires_aligned(self):
+        covariances = spot_covariances([(2., 1., 30.)] * 3)
+        with self.assertRaises(ValueError):
+            render(self.positions, self.intensities, (32, 32), mode='area',
+                   covariances=covariances)
+
+    def test_unknown_intensities(self):
+        # The origin appended by default has no intensity.
+        points = Points([(1., 0., 1.)], symmetry=4)
+        for mode in ('sample', 'area'):
+            with self.assertRaises(ValueError):
+                Pattern.from_points(points, shape=(32, 32), mode=mode)
+        with self.assertRaises(ValueError):
+            render(self.positions, [1., np.nan, 1.], (32, 32), mode='sample')
+
+    def test_accumulate(self):
+        rows = np.array([[-1, 0, 1], [1, 2, 3]])
+        cols = np.array([[0, 1], [3, 4]])
+        values = np.arange(12.).reshape(2, 3, 2)
+        expected = np.zeros((3, 4))
+        for k in range(2):
+            for i, r in enumerate(rows[k]):
+                for j, c in enumerate(cols[k]):
+                    if 0 <= r < 3 and 0 <= c < 4:
+                        expected[r, c] += values[k, i, j]
+        np.testing.assert_array_equal(accumulate(rows, cols, values, (3, 4)),
+                                      expected)
+
+    def test_blend(self):
+        pattern1 = np.random.uniform(size=(8, 6))
+        pattern2 = np.random.uniform(size=(8, 6))
+        np.testing.assert_allclose(blend(pattern1, pattern2, 0.25),
+                                   0.75 * pattern1 + 0.25 * pattern2)
+        frames = blend(pattern1, pattern2, [[0., 1.], [0.5, 1.]])
+        self.assertEqual(frames.shape, (2, 2, 8, 6))
+        np.testing.assert_allclose(frames[0, 1], pattern2)
+        np.testing.assert_allclose(frames[1, 0], 0.5 * (pattern1 + pattern2))
+
+
+class TestNumpyBackend(BackendParity, TestCase):
+
+    backend = 'numpy'
+
+
+@skipIf(numba is None, "numba is not installed.")
+class TestNumbaBackend(BackendParity, TestCase):
+
+    backend = 'numba'
+
+
+class TestSetBackend(TestCase):
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            set_backend('fortran')
+
+    @skipIf(numba is None, "numba is not installed.")
+    def test_import_keeps_threading_layer(self):
+        code = ("import os; os.environ.pop('NUMBA_THREADING_LAYER', None); "
+                "import numba; layer = numba.config.THREADING_LAYER; "
+                "import toybox.toys.kernels; "
+                "print(layer == numba.config.THREADING_LAYER)")
+        output = subprocess.check_output([sys.executable, '-c', code])
+        self.assertEqual(output.strip(), b'True')
@@ -0,0 +1,91 @@
+from unittest import TestCase
+
+import numpy as np
+from toybox.toys.core import Points, Pattern
+from toybox.toys.crystals import BiCrystal
+from toybox.toys.sparse import SparsePattern
+
+
+class TestSparsePattern(TestCase):
+
+    def setUp(self):
+        self.points = Points([(0., 0., 1.), (1., 0., 1.)], symmetry=4,
+                             auto_zero=False)
+
+    def test_discards_out_of_bounds(self):
+        pattern = SparsePattern((2, 2), [0, 2, -1], [0, 0, 1], [1., 1., 1.])
+        self.assertEqual(pattern.nnz, 1)
+
+    def test_to_dense_sums_duplicates(self):
+        pattern = SparsePattern((2, 2), [0, 0], [1, 1], [1., 2.])
+        dense = pattern.to_dense()
+        self.assertIsInstance(dense, Pattern)
+        np.testing.assert_array_equal(dense, [[0., 3.], [0., 0.]])
+
+    def test_coalesce(self):
+        pattern = SparsePattern((2, 2), [0, 0, 1], [1, 1, 0], [1., 2., 4.])
+        coalesced = pattern.coalesce()
+        self.assertEqual(coalesced.nnz, 2)
+        np.testing.assert_array_equal(coalesced.to_dense(), pattern.to_dense())
+
+    def test_from_dense_round_trip(self):
+        dense = np.zeros((5, 5))
+        dense[1, 2] = 3.
+        dense[4, 0] = 1.
+        pattern = SparsePattern.from_dense(dense)
+        self.assertEqual(pattern.nnz, 2)
+        np.testing.assert_array_equal(pattern.to_dense(), dense)
+
+    def test_from_points_matches_dense(self):
+        shape = (64, 64)
+        sparse = SparsePattern.from_points(self.points, shape, scale=0.7)
+        dense = Pattern.from_points(self.points, shape, scale=0.7)
+        np.testing.assert_allclose(sparse.to_dense(), dense, atol=1e-3)
+
+    def test_memory_independent_of_shape(self):
+        small = SparsePattern.from_points(self.points, (64, 64), scale=0.5)
+        large = SparsePattern.from_points(self.points, (1024, 1024), scale=0.5)
+        self.assertEqual(small.nbytes, large.nbytes)
+
+    def test_sum(self):
+        pattern1 = SparsePattern((2, 2), [0], [0], [1.])
+        pattern2 = SparsePattern((2, 2), [1], [1], [2.])
+        total = sum([pattern1, pattern2])
+        np.testing.assert_array_equal(total.to_dense(), [[1., 0.], [0., 2.]])
+
+    def test_add_mismatched_shapes(self):
+        with self.assertRaises(ValueError):
+            SparsePattern((2, 2)) + SparsePattern((3, 3))
+
+    def test_blend(self):
+        pattern1 = SparsePattern((2, 2), [0], [0], [1.])
+        pattern2 = SparsePattern((2, 2), [1], [1], [2.])
+        blended = pattern1.blend(pattern2, np.float64(0.25))
+        np.testing.assert_array_equal(blended.to_dense(),
+                                      [[0.75, 0.], [0., 0.5]])
+
+
+class TestSparseBiCrystal(TestCase):
+
+    def setUp(self):
+        self.pattern1 = SparsePattern((4, 4), [0], [0], [1.])
+        self.pattern2 = SparsePattern((4, 4), [3], [3], [1.])
+        self.bicrystal = BiCrystal(self.pattern1, self.pattern2)
+
+    def test_getitem(self):
+        frame = self.bicrystal[3]
+        self.assertIsInstance(frame, SparsePattern)
+        dense = frame.to_dense()
+        self.assertAlmostEqual(dense[0, 0], 0.7)
+        self.assertAlmostEqual(dense[3, 3], 0.3)
+
+    def test_matches_dense(self):
+        dense = BiCrystal(self.pattern1.to_dense(), self.pattern2.to_dense())
+        for sparse_frame, dense_frame in zip(self.bicrystal, dense):
+            np.testing.assert_array_almost_equal(sparse_frame.to_dense(),
+                                                 dense_frame)
+
+    def test_mixed(self):
+        bicrystal = BiCrystal(self.pattern1, self.pattern2.to_dense())
+        with self.assertRaises(ValueError):
+            bicrystal[3]
@@ -0,0 +1,79 @@
+from unittest import TestCase
+
+import numpy as np
+from toybox.toys.core import Points, Pattern
+from toybox.toys.strain import StrainMap, deform
+
+
+class TestDeform(TestCase):
+
+    def test_deform(self):
+        tensors = np.array([np.eye(2), [[1., 0.5], [0., 2.]]])
+        deformed = deform([(1., 1.), (2., 0.)], tensors)
+        self.assertEqual(deformed.shape, (2, 2, 2))
+        np.testing.assert_array_equal(deformed[0], [(1., 1.), (2., 0.)])
+        np.testing.assert_array_equal(deformed[1], [(1.5, 2.), (2., 0.)])
+
+
+class TestStrainMap(TestCase):
+
+    def setUp(self):
+        self.points = Points([(1., 0., 1.), (0.5, 0.5, 0.5)], symmetry=4,
+                             auto_zero=False)
+        self.tensors = np.tile(np.eye(2), (3, 4, 1, 1))
+        self.kwargs = dict(shape=(40, 40), scale=0.5, blur=1.)
+
+    def test_unstrained(self):
+        strain_map = StrainMap(self.points, self.tensors, **self.kwargs)
+        self.assertEqual(len(strain_map), 1)
+        array = strain_map.to_array()
+        self.assertEqual(array.shape, (3, 4, 40, 40))
+        expected = Pattern.from_points(self.points, **self.kwargs)
+        for pattern in array.reshape(-1, 40, 40):
+            np.testing.assert_array_almost_equal(pattern, expected)
+
+    def test_deduplicated(self):
+        self.tensors[1:, 2:] = [[1.1, 0.], [0., 1.]]
+        self.tensors[0, 0] = [[1., 0.05], [0., 1.]]
+        strain_map = StrainMap(self.points, self.tensors, **self.kwargs)
+        self.assertEqual(len(strain_map), 3)
+        array = strain_map.to_array()
+        np.testing.assert_array_equal(array[1, 2], array[2, 3])
+        self.assertFalse(np.allclose(array[0, 0], array[0, 1]))
+
+    def test_expansion(self):
+        points = Points([(1., 0., 1.)], auto_zero=False)
+        tensors = np.tile(1.2 * np.eye(2), (1, 1, 1, 1))
+        strain_map = StrainMap(points, tensors, **self.kwargs)
+        pattern = strain_map.to_array()[0, 0]
+        # The reference peak is at 20 + 0.5 * 20 = 30 rows, and 1.2 times
+        # further out once strained.
+        self.assertEqual(np.unravel_index(np.argmax(pattern), pattern.shape),
+                         (32, 20))
+
+    def test_spots(self):
+        points = Points([(1., 0., 1.), (0.5, 0.5, 0.5)], symmetry=4,
+                        auto_zero=False, spots=[(2., 1., 0.), (1., 1., 0.)])
+        strain_map = StrainMap(points, np.tile(np.eye(2), (1, 2, 1, 1)),
+                               **self.kwargs)
+        np.testing.assert_array_almost_equal(
+            strain_map.to_array()[0, 1],
+            Pattern.from_points(points, **self.kwargs))
+
+    def test_invalid_tensors(self):
+        with self.assertRaises(ValueError):
+            StrainMap(self.points, np.eye(2))
+        singular = self.tensors.copy()
+        singular[1, 1] = [[1., 2.], [0.5, 1.]]
+        with self.assertRaises(ValueError):
+            StrainMap(self.points, singular)
+        with self.assertRaises(ValueError):
+            StrainMap(self.points, np.zeros((1, 1, 2, 2)))
+
+    def test_unknown_intensity(self):
+        with self.assertRaises(ValueError):
+            StrainMap(Points([(1., 0., 1.)], symmetry=4), self.tensors)
+
+    def test_origin_only(self):
+        with self.assertRaises(ValueError):
+            StrainMap(Points([(0., 0., 1.)], auto_zero=False), self.tensors)
@@ -0,0 +1,66 @@
+from unittest import TestCase
+
+import numpy as np
+from toybox.diffraction.structure import CACHE_SIZE, Structure
+from toybox.toys.core import Points
+
+FCC = [(0., 0., 0.), (0.5, 0.5, 0.), (0.5, 0., 0.5), (0., 0.5, 0.5)]
+
+
+class TestStructure(TestCase):
+
+    def setUp(self):
+        self.structure = Structure(FCC, np.ones(4))
+
+    def test_extinctions(self):
+        hkl = [(0, 0, 0), (1, 1, 1), (2, 0, 0), (1, 0, 0), (1, 1, 0),
+               (2, 2, 0), (2, 1, 0)]
+        np.testing.assert_array_almost_equal(self.structure.intensities(hkl),
+                                             [16., 16., 16., 0., 0., 16., 0.])
+
+    def test_matches_loop(self):
+        structure = Structure([(0.1, 0.2, 0.3), (0.7, 0.4, 0.9)], [2., 5.])
+        hkl = np.random.RandomState(0).randint(-5, 6, size=(20, 3))
+        atoms = list(zip(structure.positions, structure.scattering_factors))
+        expected = [abs(sum(f * np.exp(2j * np.pi * np.dot(g, r))
+                            for r, f in atoms)) ** 2 for g in hkl]
+        np.testing.assert_array_almost_equal(structure.intensities(hkl),
+                                             expected)
+
+    def test_gaussian_form_factors(self):
+        coefficients = np.tile([[2., 10.], [1., 1.]], (4, 1, 1))
+        structure = Structure(FCC, coefficients, cell=4. * np.eye(3))
+        factors = structure.form_factors([(0, 0, 0), (2, 0, 0)])
+        np.testing.assert_array_almost_equal(factors[0], 3.)
+        s_squared = (2 / 4. / 2) ** 2
+        np.testing.assert_array_almost_equal(
+            factors[1], 2 * np.exp(-10 * s_squared) + np.exp(-s_squared))
+
+    def test_gaussian_form_factors_need_cell(self):
+        with self.assertRaises(ValueError):
+            Structure(FCC, np.ones((4, 1, 2)))
+
+    def test_wrong_number_of_factors(self):
+        with self.assertRaises(ValueError):
+            Structure(FCC, np.ones(3))
+
+    def test_cached(self):
+        hkl = [(1, 1, 1), (2, 0, 0)]
+        self.assertIs(self.structure.intensities(hkl),
+                      self.structure.intensities(np.array(hkl)))
+
+    def test_cache_bounded(self):
+        for h in range(CACHE_SIZE + 10):
+            self.structure.intensities([(h, 0, 0)])
+        info = self.structure._cached_intensities.cache_info()
+        self.assertEqual(info.currsize, CACHE_SIZE)
+
+    def test_apply(self):
+        points = Points([(0., 0., 1.), (1., 0., 1.), (2., 0., 1.),
+                         (1., 1., 1.), (2., 2., 1.)], symmetry='4mm',
+                        auto_zero=False)
+        result = self.structure.apply(points, basis=[(1, 0, 0), (0, 1, 0)])
+        np.testing.assert_array_almost_equal(
+            result.starting_points[:, 2].astype(float),
+            [16., 0., 16., 0., 16.])
+        self.assertEqual(result.symmetry, '4mm')
@@ -54,4 +54,47 @@ class TestSortPoints(TestCase):
             [1., 0.]
         ])
         result = sort_points(points)
-        np.testing.assert_array_almost_equal(result, expected)
\ No newline at end of file
+        np.testing.assert_array_almost_equal(result, expected)
+
+    def test_sort_points_opposite_quadrants(self):
+        points = np.array([
+            [1., 1.],
+            [-1., -1.],
+            [-2., -2.],
+        ])
+        expected = np.array([
+            [-1., -1.],
+            [-2., -2.],
+            [1., 1.],
+        ])
+        result = sort_points(points)
+        np.testing.assert_array_almost_equal(result, expected)
+
+    def test_sort_points_return_index(self):
+        points = np.random.uniform(-1., 1., size=(10, 3))
+        result, index = sort_points(points, return_index=True)
+        np.testing.assert_array_equal(result, points[index])
+
+    def test_argsort_points_object_array(self):
+        points = np.array([(0., -1., None), (0., 1., 1.)], dtype=object)
+        np.testing.assert_array_equal(argsort_points(points[:, :2]), [0, 1])
+
+    def test_argsort_points_negative_zero(self):
+        positions = np.array([[-1., -0.], [-2., 0.]])
+        np.testing.assert_array_equal(argsort_points(positions), [0, 1])
+
+
+class TestUniqueRows(TestCase):
+
+    def test_first_appearance(self):
+        array = np.array([[2., 1.], [0., 0.], [2., 1.], [-0., 1e-12]])
+        unique, inverse = unique_rows(array)
+        np.testing.assert_array_equal(unique, [[2., 1.], [0., 0.]])
+        np.testing.assert_array_equal(inverse, [0, 1, 0, 1])
+
+    def test_matrices(self):
+        array = np.tile(np.eye(2), (5, 1, 1))
+        array[3] *= 2
+        unique, inverse = unique_rows(array)
+        self.assertEqual(unique.shape, (2, 2, 2))
+        np.testing.assert_array_equal(unique[inverse], array)
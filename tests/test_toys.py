@@ -1,8 +1,10 @@
+import subprocess
+import sys
 import unittest
 
 import numpy as np
-from toybox.toys.crystals import BiCrystal
-from toybox.toys.core import Points
+from toybox.toys.crystals import BiCrystal, Mixture
+from toybox.toys.core import Points, Pattern
 
 
 class TestPoints(unittest.TestCase):
@@ -51,6 +53,134 @@ class TestPoints(unittest.TestCase):
         np.testing.assert_array_almost_equal(result, expected)
 
 
+class TestSpots(unittest.TestCase):
+
+    def test_default_spots(self):
+        points = Points([(1., 0., 1.)], symmetry=4)
+        np.testing.assert_array_equal(points.spots, [[1., 1., 0.], [1., 1., 0.]])
+        np.testing.assert_array_equal(points.covariances,
+                                      np.tile(np.eye(2), (5, 1, 1)))
+
+    def test_wrong_number_of_spots(self):
+        with self.assertRaises(ValueError):
+            Points([(1., 0., 1.)], spots=[(1., 1., 0.), (1., 1., 0.)])
+
+    def test_append_spot(self):
+        points = Points([(1., 0., 1.)], auto_zero=False)
+        points.append_point((0., 1., 1.), spot=(2., 1., 0.))
+        np.testing.assert_array_equal(points.spots[-1], [2., 1., 0.])
+
+    def test_covariances_follow_symmetry(self):
+        points = Points([(1., 0., 1.)], symmetry=4, auto_zero=False,
+                        spots=[(2., 1., 0.)])
+        covariances = points.covariances
+        for position, covariance in zip(points.positions, covariances):
+            if abs(position[0]) > 0.5:
+                np.testing.assert_array_almost_equal(covariance, [[4., 0.], [0., 1.]])
+            else:
+                np.testing.assert_array_almost_equal(covariance, [[1., 0.], [0., 4.]])
+
+    def test_covariances_averaged_on_symmetry_elements(self):
+        points = Points([(1., 0., 1.)], symmetry='m', auto_zero=False,
+                        spots=[(2., 1., 45.)])
+        self.assertEqual(len(points.positions), 1)
+        np.testing.assert_array_almost_equal(points.covariances[0],
+                                             [[2.5, 0.], [0., 2.5]])
+
+    def test_edit_keeps_spots(self):
+        spots = [(2., 1., 30.), (3., 1., 0.)]
+        points = Points([(1., 0., 1.), (0., 1., 1.)], auto_zero=False,
+                        spots=spots)
+        starting_points = points.starting_points.copy()
+        starting_points[0, 2] = 2.
+        points.starting_points = starting_points
+        np.testing.assert_array_equal(points.spots, spots)
+        self.assertEqual(points.intensities[0], 2.)
+        with self.assertRaises(ValueError):
+            points.starting_points = starting_points[:1]
+
+    def test_elongated_pattern(self):
+        points = Points([(0., 0., 1.), (1., 1., 0.)], auto_zero=False,
+                        spots=[(3., 1., 0.), (1., 1., 0.)])
+        pattern = Pattern.from_points(points, shape=(41, 41), blur=0.1)
+        row, col = np.round(points.to_shape((41, 41))[0]).astype(int)
+        self.assertGreater(pattern[row + 3, col], pattern[row, col + 3])
+
+
+class TestCanonical(unittest.TestCase):
+
+    def setUp(self):
+        self.points = Points([(1., 0., 1.), (1., 1., 0.5)], symmetry=4,
+                             auto_zero=False)
+
+    def test_orbit_reduced(self):
+        rotated = Points([(-1., 1., 0.5), (0., -1., 1.)], symmetry=4,
+                         auto_zero=False)
+        np.testing.assert_array_equal(self.points.canonical, rotated.canonical)
+        self.assertEqual(self.points, rotated)
+
+    def test_repeated_orbit(self):
+        repeated = Points([(1., 0., 1.), (0., 1., 1.), (1., 1., 0.5)],
+                          symmetry=4, auto_zero=False)
+        self.assertEqual(len(repeated.canonical), 2)
+        self.assertEqual(self.points, repeated)
+
+    def test_unknown_intensity(self):
+        points = Points([(1., 0., 1.)], symmetry=4)
+        self.assertEqual(np.isnan(points.canonical[:, 2]).sum(), 1)
+        self.assertEqual(points, Points([(0., 1., 1.)], symmetry=4))
+
+    def test_not_equal(self):
+        self.assertNotEqual(self.points, Points([(1., 0., 1.), (1., 1., 0.5)],
+                                                symmetry='4mm', auto_zero=False))
+        self.assertNotEqual(self.points, Points([(1., 0., 1.), (1., 1., 0.4)],
+                                                symmetry=4, auto_zero=False))
+        self.assertNotEqual(self.points, Points([(1., 0., 1.), (1., 1., 0.5)],
+                                                symmetry=4, auto_zero=False,
+                                                spots=[(2., 1., 0.)] * 2))
+
+    def test_hash(self):
+        rotated = Points([(-1., 1., 0.5), (0., -1., 1.)], symmetry=4,
+                         auto_zero=False)
+        self.assertEqual(hash(self.points), hash(rotated))
+        self.assertEqual(len({self.points, rotated}), 1)
+        patterns = {self.points: 'pattern'}
+        self.assertEqual(patterns[rotated], 'pattern')
+        self.assertNotIn(Points([(1., 0., 1.)], symmetry=4, auto_zero=False),
+                         patterns)
+
+    def test_hash_invalidated(self):
+        before = hash(self.points)
+        self.points.symmetry = '4mm'
+        self.assertNotEqual(hash(self.points), before)
+
+    def test_invalidated(self):
+        before = Points(self.points.starting_points, symmetry=4,
+                        auto_zero=False)
+        self.assertEqual(self.points, before)
+        self.points.symmetry = 2
+        self.assertNotEqual(self.points, before)
+        self.assertEqual(len(self.points.points), 4)
+        self.points.append_point((0., 0., 1.))
+        self.assertEqual(len(self.points.canonical), 3)
+        self.points.intensities = [1., 1., 1.]
+        np.testing.assert_array_equal(self.points.intensities, np.ones(5))
+
+    def test_orbit_labels(self):
+        labels = self.points.orbit_labels
+        self.assertEqual(len(labels), len(self.points.points))
+        self.assertEqual(sorted(np.bincount(labels)), [4, 4])
+        for label in (0, 1):
+            intensities = self.points.intensities[labels == label]
+            self.assertEqual(len(set(intensities)), 1)
+
+    def test_read_only(self):
+        with self.assertRaises(ValueError):
+            self.points.starting_points[0, 2] = 2.
+        with self.assertRaises(ValueError):
+            self.points.points[0, 2] = 2.
+
+
 class TestBiCrystal(unittest.TestCase):
 
     def setUp(self):
@@ -86,7 +216,98 @@ class TestBiCrystal(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.bicrystal[1] = 1.2
 
+    def test_slice(self):
+        frames = self.bicrystal[2:4]
+        self.assertEqual(frames.shape, (2, 100, 100))
+        self.assertTrue(np.allclose(frames[1], 0.3))
+
+    def test_patterns(self):
+        self.assertEqual(self.bicrystal.patterns.shape, (11, 100, 100))
+
+
+class TestMixture(unittest.TestCase):
+
+    def setUp(self):
+        random_state = np.random.RandomState(0)
+        self.patterns = random_state.uniform(size=(3, 20, 20))
+        weights = random_state.uniform(size=(4, 5, 3))
+        self.weights = weights / weights.sum(axis=-1, keepdims=True)
+        self.mixture = Mixture(self.patterns, self.weights)
+
+    def test_phases(self):
+        np.testing.assert_array_equal(self.mixture.phases, self.patterns)
+        self.assertEqual(self.mixture.n_phases, 3)
+        self.assertEqual(self.mixture.map_shape, (4, 5))
 
+    def test_to_array(self):
+        array = self.mixture.to_array()
+        self.assertEqual(array.shape, (4, 5, 20, 20))
+        expected = sum(self.weights[2, 3, k] * self.patterns[k]
+                       for k in range(3))
+        np.testing.assert_array_almost_equal(array[2, 3], expected)
+
+    def test_chunks(self):
+        chunks = list(self.mixture.chunks(chunksize=6))
+        self.assertEqual([len(chunk) for chunk in chunks], [6, 6, 6, 2])
+        np.testing.assert_array_almost_equal(
+            np.concatenate(chunks),
+            self.mixture.to_array().reshape(-1, 20, 20))
+
+    def test_getitem(self):
+        self.assertEqual(self.mixture[1].shape, (5, 20, 20))
+        self.assertIsInstance(self.mixture[1], Pattern)
+        np.testing.assert_array_almost_equal(self.mixture[1:3],
+                                             self.mixture.to_array()[1:3])
+
+    def test_matches_bicrystal(self):
+        bicrystal = BiCrystal(self.patterns[0], self.patterns[1])
+        profile = bicrystal.profile
+        mixture = Mixture(self.patterns[:2],
+                          np.column_stack((1 - profile, profile)))
+        np.testing.assert_array_almost_equal(mixture.to_array(),
+                                             bicrystal.patterns)
+
+    def test_from_labels(self):
+        labels = np.array([[0, 1], [2, 2]])
+        mixture = Mixture.from_labels(self.patterns, labels)
+        np.testing.assert_array_equal(mixture.to_array()[1, 0],
+                                      self.patterns[2])
+
+    def test_editing(self):
+        mixture = Mixture(self.patterns, np.eye(3))
+        mixture.insert(1, [0.5, 0.5, 0.])
+        self.assertEqual(len(mixture), 4)
+        np.testing.assert_array_almost_equal(
+            mixture[1], 0.5 * (self.patterns[0] + self.patterns[1]))
+        del mixture[0]
+        np.testing.assert_array_equal(mixture[2], self.patterns[2])
+        mixture[0] = [0., 0., 1.]
+        np.testing.assert_array_equal(mixture[0], self.patterns[2])
+
+    def test_empty(self):
+        mixture = Mixture(self.patterns, np.empty((0, 3)))
+        self.assertEqual(len(mixture), 0)
+        self.assertEqual(mixture.to_array().shape, (0, 20, 20))
+        mixture.append([0., 1., 0.])
+        np.testing.assert_array_equal(mixture.pop(), self.patterns[1])
+        mixture.extend(np.eye(3))
+        mixture.clear()
+        self.assertEqual(len(mixture), 0)
+
+    def test_invalid_weights(self):
+        with self.assertRaises(ValueError):
+            Mixture(self.patterns, np.ones((4, 2)) / 2)
+        with self.assertRaises(ValueError):
+            Mixture(self.patterns, [[0.5, 0.6, -0.1]])
+        with self.assertRaises(ValueError):
+            self.mixture[0, 0] = [0.5, 0.2, 0.2]
 
 
+class TestLazyImports(unittest.TestCase):
 
+    def test_heavy_modules_not_imported(self):
+        code = ("import sys, toybox.toys.core, toybox.toys.crystals; "
+                "print(' '.join(m for m in ('matplotlib', 'scipy.stats', "
+                "'skimage') if m in sys.modules))")
+        output = subprocess.check_output([sys.executable, '-c', code])
+        self.assertEqual(output.strip(), b'')
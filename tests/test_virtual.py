@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+from toybox.analysis.virtual import aperture, virtual_image, \
+    virtual_image_from_points
+from toybox.toys.core import Points, Pattern
+
+
+class TestAperture(TestCase):
+
+    def test_disc(self):
+        mask = aperture((11, 11), 2., centre=(5, 5))
+        self.assertEqual(mask.sum(), 13)
+
+    def test_annulus(self):
+        disc = aperture((32, 32), 8.)
+        annulus = aperture((32, 32), 8., inner_radius=4.)
+        self.assertTrue(np.all(disc[annulus]))
+        self.assertFalse(annulus[16, 16])
+
+
+class TestVirtualImage(TestCase):
+
+    def setUp(self):
+        self.data = np.random.RandomState(0).uniform(size=(5, 7, 16, 16))
+        self.mask = aperture((16, 16), 5.)
+        self.expected = (self.data * self.mask).sum(axis=(-2, -1))
+
+    def test_array(self):
+        image = virtual_image(self.data, self.mask, chunk_size=2)
+        np.testing.assert_array_almost_equal(image, self.expected)
+
+    def test_memmap(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'data.npy')
+            np.save(path, self.data)
+            data = np.load(path, mmap_mode='r')
+            image = virtual_image(data, self.mask, chunk_size=3)
+            del data
+        finally:
+            shutil.rmtree(directory)
+        np.testing.assert_array_almost_equal(image, self.expected)
+
+    def test_generator(self):
+        frames = (frame for frame in self.data.reshape(-1, 16, 16))
+        image = virtual_image(frames, self.mask)
+        np.testing.assert_array_almost_equal(image, self.expected.ravel())
+
+    def test_single_frame(self):
+        with self.assertRaises(ValueError):
+            virtual_image(self.data[0, 0], self.mask)
+
+
+class TestVirtualImageFromPoints(TestCase):
+
+    def test_matches_rendered(self):
+        shape = (48, 48)
+        points_map = np.empty((2, 3), dtype=object)
+        for i in range(2):
+            for j in range(3):
+                points_map[i, j] = Points([(0., 0., 1.),
+                                           (1., 0.1 * j, 0.2 + i)],
+                                          symmetry=4, auto_zero=False)
+        mask = aperture(shape, 14., inner_radius=4.)
+        image = virtual_image_from_points(points_map, mask, shape, scale=0.5)
+        stack = np.array([[Pattern.from_points(p, shape, scale=0.5)
+                           for p in row] for row in points_map])
+        expected = virtual_image(stack, mask)
+        np.testing.assert_allclose(image, expected, rtol=1e-2)
+        chunked = virtual_image_from_points(points_map, mask, shape,
+                                            scale=0.5, chunk_size=4)
+        np.testing.assert_array_almost_equal(chunked, image)
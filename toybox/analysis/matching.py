@@ -0,0 +1,186 @@
+"""Template matching of frames against banks of generated patterns."""
+import numpy as np
+from toybox.symmetry.operators import Rotation
+from toybox.toys.batch import render_batch
+from toybox.toys.core import Points
+
+
+def rotate_points(points, angle):
+    """Rotates the starting points of a :class:`Points` about the origin.
+
+    Parameters
+    ----------
+    points : Points
+    angle : float
+        Angle of rotation in degrees.
+
+    Returns
+    -------
+    Points
+        A new set of points with the same symmetry.
+
+    """
+    starting_points = points.starting_points.copy()
+    positions = starting_points[:, :2].astype(float)
+    starting_points[:, :2] = Rotation.from_angle(angle).apply(positions)
+    spots = points.spots.copy()
+    spots[:, 2] += angle
+    return Points(starting_points, symmetry=points.symmetry, auto_zero=False,
+                  spots=spots)
+
+
+def normalise(frames):
+    """Flattens frames and scales them to zero mean and unit norm.
+
+    Parameters
+    ----------
+    frames : array_like
+        (n_frames, ...)
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        (n_frames, n_pixels)
+
+    """
+    frames = np.asarray(frames, dtype=float)
+    frames = frames.reshape(frames.shape[0], -1)
+    frames = frames - frames.mean(axis=1, keepdims=True)
+    norms = np.sqrt(np.einsum('ij,ij->i', frames, frames))
+    norms[norms == 0] = 1.  # Constant frames correlate with nothing.
+    return frames / norms[:, np.newaxis]
+
+
+class TemplateBank:
+
+    def __init__(self, templates, labels=None):
+        """A bank of normalised templates to match frames against.
+
+        Templates are normalised once, on creation, so that scoring a frame
+        against every template is a single matrix product giving the
+        normalised cross-correlation at zero shift.
+
+        Parameters
+        ----------
+        templates : array_like
+            (n_templates, height, width)
+            The template patterns.
+        labels : array_like, optional
+            (n_templates, ...)
+            A label for each template, such as its orientation. Defaults to
+            the template index.
+
+        """
+        templates = np.asarray(templates)
+        self.shape = templates.shape[1:]
+        self.matrix = normalise(templates)
+        if labels is None:
+            labels = np.arange(len(templates))
+        self.labels = np.asarray(labels)
+
+    @classmethod
+    def from_points(cls, points, angles, shape=(100, 100), scale=1.0,
+                    blur=1., mode='sample', processes=1):
+        """Creates a bank from an orientation sweep of a set of points.
+
+        Parameters
+        ----------
+        points : Points
+            The points to sweep.
+        angles : array_like
+            Orientations, in degrees, at which to render a template.
+        shape, scale, blur, mode
+            See :meth:`Pattern.from_points`.
+        processes : int or None, optional
+            Number of worker processes used for rendering.
+
+        Returns
+        -------
+        TemplateBank
+            A bank labelled by orientation.
+
+        Notes
+        -----
+        Orientations that the symmetry of `points` maps onto each other,
+        such as those 90 degrees apart for symmetry 4, have the same
+        :attr:`Points.canonical` form. They give the same pattern, which is
+        only rendered once.
+
+        """
+        angles = np.asarray(angles, dtype=float)
+        unique = {}
+        rotated = []
+        indices = []
+        for angle in angles:
+            rotated_points = rotate_points(points, angle)
+            key = rotated_points.canonical.tobytes()
+            if key not in unique:
+                unique[key] = len(rotated)
+                rotated.append(rotated_points)
+            indices.append(unique[key])
+        specs = (dict(points=p, shape=shape, scale=scale, blur=blur,
+                      mode=mode) for p in rotated)
+        templates = np.array(list(render_batch(specs, processes)))
+        return cls(templates[indices], labels=angles)
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    def scores(self, frames):
+        """Scores frames against every template.
+
+        Parameters
+        ----------
+        frames : array_like
+            (n_frames, height, width)
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            (n_frames, n_templates)
+            Normalised cross-correlation, between -1 and 1.
+
+        """
+        return np.dot(normalise(frames), self.matrix.T)
+
+    def match(self, frames, n_best=1, chunk_size=256):
+        """Finds the best matching templates for a frame or a stack of frames.
+
+        Parameters
+        ----------
+        frames : array_like
+            (..., height, width)
+            A single frame or a stack with any number of leading dimensions.
+        n_best : int
+            Number of matches to return for each frame.
+        chunk_size : int
+            Number of frames scored at once, which bounds memory use.
+
+        Returns
+        -------
+        indices : :class:`numpy.ndarray`
+            (..., `n_best`)
+            Indices of the best templates, best first.
+        scores : :class:`numpy.ndarray`
+            (..., `n_best`)
+            The corresponding scores.
+
+        """
+        frames = np.asarray(frames)
+        if frames.shape[-2:] != self.shape:
+            raise ValueError("Frames of shape {} do not match templates of "
+                             "shape {}.".format(frames.shape[-2:], self.shape))
+        leading = frames.shape[:-2]
+        frames = frames.reshape((-1,) + self.shape)
+        n_best = min(n_best, len(self))
+        indices = np.empty((len(frames), n_best), dtype=int)
+        scores = np.empty((len(frames), n_best))
+        for start in range(0, len(frames), chunk_size):
+            chunk = self.scores(frames[start:start + chunk_size])
+            rows = np.arange(len(chunk))[:, np.newaxis]
+            best = np.argpartition(-chunk, n_best - 1, axis=1)[:, :n_best]
+            best = best[rows, np.argsort(-chunk[rows, best], axis=1)]
+            indices[start:start + chunk_size] = best
+            scores[start:start + chunk_size] = chunk[rows, best]
+        return (indices.reshape(leading + (n_best,)),
+                scores.reshape(leading + (n_best,)))
@@ -0,0 +1,83 @@
+"""Detection of peaks in patterns and stacks of patterns."""
+import numpy as np
+
+
+def _subpixel_offsets(lower, centre, upper):
+    """Offsets of the vertices of parabolas through the logarithms of three
+    neighbouring pixels, which are exact for Gaussian peaks.
+
+    """
+    tiny = np.finfo(float).tiny
+    lower, centre, upper = (np.log(np.maximum(v, tiny))
+                            for v in (lower, centre, upper))
+    curvature = lower - 2 * centre + upper
+    with np.errstate(invalid='ignore', divide='ignore'):
+        offsets = 0.5 * (lower - upper) / curvature
+    offsets[~np.isfinite(offsets)] = 0.
+    return np.clip(offsets, -0.5, 0.5)
+
+
+def find_peaks(data, min_distance=1, threshold_abs=None, threshold_rel=0.1):
+    """Finds the peaks in a pattern or in every frame of a stack at once.
+
+    A pixel is a peak if it is the maximum within `min_distance` pixels and
+    exceeds the threshold. Its position is then refined to sub-pixel accuracy
+    by fitting a Gaussian through it and its neighbours along each axis.
+
+    Parameters
+    ----------
+    data : array_like
+        (..., height, width)
+        A single pattern or a stack of patterns.
+    min_distance : int
+        Minimum separation of peaks, in pixels.
+    threshold_abs : float, optional
+        Minimum intensity of a peak.
+    threshold_rel : float, optional
+        Minimum intensity of a peak as a fraction of the maximum of its frame.
+
+    Returns
+    -------
+    peaks : :class:`numpy.ndarray`
+        (n_peaks, 3)
+        The peaks as (x, y, intensity), in pixel coordinates along the first
+        and second axes of each frame. This is only returned on its own for a
+        single pattern.
+    frames : :class:`numpy.ndarray`
+        (n_peaks, `data.ndim` - 2)
+        For stacks, the index of the frame containing each peak, returned
+        as ``(frames, peaks)``.
+
+    """
+    from scipy import ndimage
+    data = np.asarray(data, dtype=float)
+    if data.ndim < 2:
+        raise ValueError("Data must be at least two-dimensional.")
+    n_leading = data.ndim - 2
+    size = (1,) * n_leading + (2 * min_distance + 1,) * 2
+    maxima = ndimage.maximum_filter(data, size=size, mode='nearest')
+    threshold = np.full(data.shape[:-2] + (1, 1), -np.inf)
+    if threshold_rel is not None:
+        frame_max = data.max(axis=(-2, -1), keepdims=True)
+        threshold = np.maximum(threshold, threshold_rel * frame_max)
+    if threshold_abs is not None:
+        threshold = np.maximum(threshold, threshold_abs)
+    indices = np.nonzero((data == maxima) & (data > threshold))
+
+    # Gather the neighbours of every peak from an edge-padded copy.
+    padding = ((0, 0),) * n_leading + ((1, 1), (1, 1))
+    padded = np.pad(data, padding, mode='edge')
+    frames = indices[:-2]
+    rows = indices[-2] + 1
+    cols = indices[-1] + 1
+    centre = padded[frames + (rows, cols)]
+    x_offsets = _subpixel_offsets(padded[frames + (rows - 1, cols)], centre,
+                                  padded[frames + (rows + 1, cols)])
+    y_offsets = _subpixel_offsets(padded[frames + (rows, cols - 1)], centre,
+                                  padded[frames + (rows, cols + 1)])
+    peaks = np.column_stack((indices[-2] + x_offsets,
+                             indices[-1] + y_offsets,
+                             centre))
+    if not n_leading:
+        return peaks
+    return np.column_stack(frames), peaks
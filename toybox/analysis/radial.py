@@ -0,0 +1,105 @@
+"""Azimuthal integration of patterns into radial profiles."""
+from functools import lru_cache
+
+import numpy as np
+
+
+class RadialBins:
+
+    def __init__(self, shape, centre=None, nbins=None):
+        """The assignment of every pixel of a frame to a radial bin.
+
+        Parameters
+        ----------
+        shape : :obj:`tuple` of :obj:`int`
+            Shape of the frames.
+        centre : :obj:`tuple` of :obj:`float`, optional
+            Centre of the rings, in pixels. Defaults to the centre used by
+            :meth:`Points.to_shape`, i.e. `shape` / 2.
+        nbins : int, optional
+            Number of bins between the centre and the furthest corner.
+            Defaults to one bin per pixel of radius.
+
+        Attributes
+        ----------
+        index : :class:`numpy.ndarray`
+            (n_pixels,)
+            Bin of each pixel of the flattened frame.
+        counts : :class:`numpy.ndarray`
+            (`nbins`,)
+            Number of pixels in each bin.
+        radii : :class:`numpy.ndarray`
+            (`nbins`,)
+            Radius of the middle of each bin.
+
+        """
+        from scipy import sparse
+        if centre is None:
+            centre = np.array(shape) / 2
+        x, y = np.mgrid[0: shape[0], 0: shape[1]]
+        distances = np.hypot(x - centre[0], y - centre[1]).ravel()
+        r_max = distances.max()
+        if nbins is None:
+            nbins = max(int(np.ceil(r_max)), 1)
+        scale = nbins / r_max if r_max else 0.
+        self.index = np.minimum((distances * scale).astype(int), nbins - 1)
+        self.counts = np.bincount(self.index, minlength=nbins)
+        self.radii = (np.arange(nbins) + 0.5) * (r_max / nbins)
+        self.shape = tuple(shape)
+        self.nbins = nbins
+        self.matrix = sparse.csr_matrix(
+            (np.ones(self.index.size), (np.arange(self.index.size), self.index)),
+            shape=(self.index.size, nbins))
+
+
+@lru_cache(maxsize=32)
+def radial_bins(shape, centre=None, nbins=None):
+    """Returns the cached :class:`RadialBins` for a geometry.
+
+    Arguments must be hashable, e.g. tuples rather than arrays.
+
+    """
+    return RadialBins(shape, centre, nbins)
+
+
+def radial_profile(data, centre=None, nbins=None, average=True):
+    """Integrates a pattern, or a stack of patterns, over rings.
+
+    The pixel-to-bin assignment is computed once per geometry and cached, so
+    repeated calls only cost a :func:`numpy.bincount` for a single pattern,
+    or a sparse matrix product for a stack.
+
+    Parameters
+    ----------
+    data : array_like
+        (..., height, width)
+        A pattern or a stack of patterns.
+    centre : :obj:`tuple` of :obj:`float`, optional
+        Centre of the rings, in pixels. See :class:`RadialBins`.
+    nbins : int, optional
+        Number of radial bins. See :class:`RadialBins`.
+    average : bool
+        If True, return the mean of each ring rather than its sum.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        (..., `nbins`)
+        The radial profile of each pattern.
+
+    """
+    data = np.asarray(data, dtype=float)
+    if centre is not None:
+        centre = tuple(float(c) for c in centre)
+    bins = radial_bins(data.shape[-2:], centre, nbins)
+    if data.ndim == 2:
+        profile = np.bincount(bins.index, weights=data.ravel(),
+                              minlength=bins.nbins)
+    else:
+        flat = data.reshape(-1, bins.index.size)
+        profile = bins.matrix.T.dot(flat.T).T
+        profile = profile.reshape(data.shape[:-2] + (bins.nbins,))
+    if average:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            profile = profile / bins.counts
+    return profile
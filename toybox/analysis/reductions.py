@@ -0,0 +1,193 @@
+"""Streaming reductions over sequences of frames.
+
+Reducers consume frames one at a time and hold only O(frame) memory, so that
+statistics of arbitrarily large generated datasets can be computed while the
+frames are being produced.
+
+Examples
+--------
+>>> mean, variance = RunningMean(), RunningVariance()
+>>> for frame in tap(generate(specs), mean, variance):
+...     pass
+>>> mean.result, variance.result  # doctest: +SKIP
+
+"""
+import numpy as np
+
+
+class RunningMean:
+
+    def __init__(self):
+        """The running mean of a series of frames."""
+        self.count = 0
+        self.mean = None
+
+    def update(self, frame):
+        frame = np.asarray(frame, dtype=float)
+        self.count += 1
+        if self.mean is None:
+            self.mean = frame.copy()
+        else:
+            self.mean += (frame - self.mean) / self.count
+        return self
+
+    def merge(self, other):
+        """Combines the frames seen by `other` into this reducer."""
+        if other.count:
+            if self.mean is None:
+                self.mean = other.mean.copy()
+            else:
+                self.mean += (other.mean - self.mean) * (
+                    other.count / (self.count + other.count))
+            self.count += other.count
+        return self
+
+    @property
+    def result(self):
+        """:class:`numpy.ndarray` The mean frame."""
+        return self.mean
+
+
+class RunningMax:
+
+    def __init__(self):
+        """The running element-wise maximum of a series of frames."""
+        self.count = 0
+        self.value = None
+
+    def update(self, frame):
+        frame = np.asarray(frame, dtype=float)
+        self.count += 1
+        if self.value is None:
+            self.value = frame.copy()
+        else:
+            np.maximum(self.value, frame, out=self.value)
+        return self
+
+    def merge(self, other):
+        """Combines the frames seen by `other` into this reducer."""
+        if other.count:
+            self.count += other.count - 1
+            self.update(other.value)
+        return self
+
+    @property
+    def result(self):
+        """:class:`numpy.ndarray` The maximum frame."""
+        return self.value
+
+
+class RunningMin(RunningMax):
+    """The running element-wise minimum of a series of frames."""
+
+    def update(self, frame):
+        frame = np.asarray(frame, dtype=float)
+        self.count += 1
+        if self.value is None:
+            self.value = frame.copy()
+        else:
+            np.minimum(self.value, frame, out=self.value)
+        return self
+
+    @property
+    def result(self):
+        """:class:`numpy.ndarray` The minimum frame."""
+        return self.value
+
+
+class RunningVariance:
+
+    def __init__(self, ddof=0):
+        """The running variance of a series of frames.
+
+        Uses Welford's algorithm, which is numerically stable, and Chan's
+        parallel update to merge reducers.
+
+        Parameters
+        ----------
+        ddof : int
+            Delta degrees of freedom. The variance is divided by
+            `count` - `ddof`.
+
+        """
+        self.ddof = ddof
+        self.count = 0
+        self.mean = None
+        self.m2 = None
+
+    def update(self, frame):
+        frame = np.asarray(frame, dtype=float)
+        self.count += 1
+        if self.mean is None:
+            self.mean = frame.copy()
+            self.m2 = np.zeros_like(self.mean)
+        else:
+            delta = frame - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (frame - self.mean)
+        return self
+
+    def merge(self, other):
+        """Combines the frames seen by `other` into this reducer."""
+        if other.count:
+            if self.mean is None:
+                self.mean = other.mean.copy()
+                self.m2 = other.m2.copy()
+            else:
+                count = self.count + other.count
+                delta = other.mean - self.mean
+                self.mean += delta * (other.count / count)
+                self.m2 += other.m2 + np.square(delta) * (
+                    self.count * other.count / count)
+            self.count += other.count
+        return self
+
+    @property
+    def result(self):
+        """:class:`numpy.ndarray` The variance frame."""
+        if self.m2 is None:
+            return None
+        return self.m2 / (self.count - self.ddof)
+
+    @property
+    def std(self):
+        """:class:`numpy.ndarray` The standard deviation frame."""
+        if self.m2 is None:
+            return None
+        return np.sqrt(self.result)
+
+
+def tap(frames, *reducers):
+    """Passes frames through unchanged, updating `reducers` with each one.
+
+    Parameters
+    ----------
+    frames : iterable
+        The frames.
+    reducers
+        Any number of reducers.
+
+    Yields
+    ------
+    frame
+        Each frame of `frames`.
+
+    """
+    for frame in frames:
+        for reducer in reducers:
+            reducer.update(frame)
+        yield frame
+
+
+def reduce_frames(frames, *reducers):
+    """Consumes every frame of `frames`, updating `reducers` with each one.
+
+    Returns
+    -------
+    list
+        The result of each reducer.
+
+    """
+    for _ in tap(frames, *reducers):
+        pass
+    return [reducer.result for reducer in reducers]
@@ -0,0 +1,136 @@
+"""Virtual detector imaging of scan datasets.
+
+A virtual image has one pixel per scan position, whose value is the sum of
+the pattern at that position over a detector aperture. The functions here
+never hold the full four-dimensional dataset in memory.
+
+"""
+import numpy as np
+from toybox.toys.rendering import peak_windows
+
+
+def aperture(shape, radius, inner_radius=0., centre=None):
+    """Creates a disc or annular detector mask.
+
+    Parameters
+    ----------
+    shape : :obj:`tuple` of :obj:`int`
+        Shape of the patterns.
+    radius : float
+        Outer radius of the aperture, in pixels.
+    inner_radius : float
+        Inner radius of the aperture, in pixels. If non-zero, the aperture is
+        an annulus, e.g. for annular dark-field imaging.
+    centre : :obj:`tuple` of :obj:`float`, optional
+        Centre of the aperture. Defaults to `shape` / 2, the centre used by
+        :meth:`Points.to_shape`.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        A boolean mask of shape `shape`.
+
+    """
+    if centre is None:
+        centre = np.array(shape) / 2
+    x, y = np.mgrid[0: shape[0], 0: shape[1]]
+    distances = np.hypot(x - centre[0], y - centre[1])
+    return (distances <= radius) & (distances >= inner_radius)
+
+
+def virtual_image(data, mask, chunk_size=64):
+    """Computes a virtual image by streaming over a scan dataset.
+
+    Parameters
+    ----------
+    data : array_like or iterable
+        Either an array-like of shape (..., height, width) that supports
+        slicing along its first axis, such as a :class:`numpy.memmap` or an
+        HDF5 dataset, or an iterable of (height, width) frames such as a
+        generator.
+    mask : array_like
+        (height, width)
+        The detector aperture. May be boolean or hold per-pixel weights.
+    chunk_size : int
+        Number of rows of the first axis read at a time when `data` is
+        array-like.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        The virtual image, with the leading shape of `data`, or one value
+        per frame if `data` is an iterable.
+
+    """
+    mask = np.asarray(mask, dtype=float)
+    if not hasattr(data, 'shape'):
+        return np.array([np.sum(np.asarray(frame) * mask) for frame in data])
+    if len(data.shape) < 3:
+        raise ValueError("Data must hold at least one scan axis before the "
+                         "pattern axes.")
+    image = np.empty(data.shape[:-2])
+    for start in range(0, data.shape[0], chunk_size):
+        chunk = np.asarray(data[start:start + chunk_size], dtype=float)
+        image[start:start + chunk_size] = np.tensordot(chunk, mask, axes=2)
+    return image
+
+
+def _virtual_values(points, mask, shape, scale, blur, mode, truncate):
+    """The virtual image value of each of a sequence of Points."""
+    positions = [p.to_shape(shape, scale) for p in points]
+    intensities = [p.intensities for p in points]
+    covariances = [p.covariances for p in points]
+    owners = np.repeat(np.arange(len(points)), [len(p) for p in positions])
+    covariances = np.concatenate(covariances) + blur ** 2 * np.eye(2)
+    rows, cols, values = peak_windows(np.concatenate(positions),
+                                      np.concatenate(intensities),
+                                      truncate=truncate, mode=mode,
+                                      covariances=covariances)
+    rows = np.broadcast_to(rows[:, :, np.newaxis], values.shape)
+    cols = np.broadcast_to(cols[:, np.newaxis, :], values.shape)
+    inside = (rows >= 0) & (rows < shape[0]) & (cols >= 0) & (cols < shape[1])
+    weights = np.where(inside, mask[np.clip(rows, 0, shape[0] - 1),
+                                    np.clip(cols, 0, shape[1] - 1)], 0.)
+    per_peak = np.einsum('ijk,ijk->i', values, weights)
+    return np.bincount(owners, weights=per_peak, minlength=len(points))
+
+
+def virtual_image_from_points(points_map, mask, shape=(100, 100), scale=1.0,
+                              blur=1., mode='sample', truncate=4.,
+                              chunk_size=64):
+    """Computes a virtual image of synthetic data directly from its points.
+
+    The pattern at each scan position is never rendered. Instead, the window
+    around every peak is evaluated and weighted by the mask, as in
+    :meth:`SparsePattern.from_points`, one vectorised pass per chunk of scan
+    positions, so that memory use is bounded by the chunk rather than the
+    scan.
+
+    Parameters
+    ----------
+    points_map : array_like of Points
+        The points at each scan position, e.g. an object array of shape
+        (scan_y, scan_x).
+    mask : array_like
+        (height, width)
+        The detector aperture.
+    shape, scale, blur, mode, truncate
+        Rendering parameters. See :meth:`SparsePattern.from_points`.
+    chunk_size : int
+        Number of scan positions evaluated at a time.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        The virtual image, with the shape of `points_map`.
+
+    """
+    mask = np.asarray(mask, dtype=float)
+    points_map = np.asarray(points_map, dtype=object)
+    flat_points = points_map.ravel()
+    image = np.empty(flat_points.size)
+    for start in range(0, flat_points.size, chunk_size):
+        chunk = flat_points[start:start + chunk_size]
+        image[start:start + chunk_size] = _virtual_values(
+            chunk, mask, shape, scale, blur, mode, truncate)
+    return image.reshape(points_map.shape)
@@ -0,0 +1,165 @@
+"""Command-line batch generation of patterns.
+
+A job is described by a JSON file such as::
+
+    {
+        "output": "patterns.npy",
+        "seed": 0,
+        "shape": [128, 128],
+        "blur": 1.0,
+        "patterns": [
+            {"symmetry": "4mm", "points": [[0, 0, 1], [1, 0, 0.5]],
+             "count": 100, "noise": 0.05},
+            {"symmetry": 6, "points": [[0, 0, 1], [1, 0, 0.5]], "count": 100}
+        ]
+    }
+
+Keys given at the top level are defaults for every entry of ``patterns``. If
+``patterns`` is missing, the top level describes a single pattern. The
+recognised pattern keys are ``symmetry``, ``points``, ``auto_zero``,
+``shape``, ``scale``, ``blur``, ``count`` and ``noise``. All frames are
+written, as they are produced, to a single ``.npy`` file of shape
+``(n_frames,) + shape``.
+
+Unlike :class:`~toybox.toys.core.Points`, ``auto_zero`` defaults to false:
+the origin it appends has an unknown intensity, which cannot be rendered,
+so jobs list the central point, with its intensity, like any other.
+
+With ``--cache``, noise-free patterns are kept in a
+:class:`~toybox.toys.cache.PatternCache` so that later jobs reuse them.
+
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+from toybox.toys.batch import generate
+from toybox.toys.cache import PatternCache
+from toybox.toys.core import Points
+
+PATTERN_KEYS = ('symmetry', 'points', 'auto_zero', 'shape', 'scale', 'blur',
+                'count', 'noise')
+
+
+def parse_job(job):
+    """Converts a job description into specs for :func:`generate`.
+
+    Parameters
+    ----------
+    job : dict
+        The decoded JSON job description.
+
+    Returns
+    -------
+    specs : list of dict
+        One spec per pattern.
+
+    """
+    defaults = {key: job[key] for key in PATTERN_KEYS if key in job}
+    entries = job.get('patterns', [{}])
+    if not entries:
+        raise ValueError("A job needs at least one pattern.")
+    specs = []
+    for entry in entries:
+        unknown = set(entry) - set(PATTERN_KEYS)
+        if unknown:
+            raise ValueError("Unknown pattern keys: {}".format(
+                ", ".join(sorted(unknown))))
+        entry = dict(defaults, **entry)
+        if 'points' not in entry:
+            raise ValueError("Every pattern needs a list of points.")
+        points = Points(entry.pop('points'),
+                        symmetry=entry.pop('symmetry', 1),
+                        auto_zero=entry.pop('auto_zero', False))
+        entry['shape'] = tuple(entry.get('shape', (100, 100)))
+        entry['points'] = points
+        specs.append(entry)
+    if len({spec['shape'] for spec in specs}) > 1:
+        raise ValueError("All patterns in a job must have the same shape.")
+    return specs
+
+
+def run(specs, output, seed=None, processes=1, cache=None):
+    """Generates the frames described by `specs` and streams them to disk.
+
+    Parameters
+    ----------
+    specs : list of dict
+        Specs as returned by :func:`parse_job`.
+    output : str
+        Path of the ``.npy`` file to write.
+    seed : int, optional
+        Seed for the noise.
+    processes : int or None, optional
+        Number of worker processes used for rendering.
+    cache : :class:`toybox.toys.cache.PatternCache`, optional
+        Cache of rendered patterns.
+
+    Returns
+    -------
+    n_frames : int
+        Number of frames written.
+
+    """
+    if not specs:
+        raise ValueError("A job needs at least one pattern.")
+    n_frames = sum(spec.get('count', 1) for spec in specs)
+    shape = (n_frames,) + specs[0]['shape']
+    frames = np.lib.format.open_memmap(output, mode='w+', dtype=float,
+                                       shape=shape)
+    frame_generator = generate(specs, seed=seed, processes=processes,
+                               cache=cache)
+    for i, frame in enumerate(frame_generator):
+        frames[i] = frame
+    frames.flush()
+    del frames
+    return n_frames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='toybox',
+        description="Generate toy diffraction patterns from a JSON job spec.")
+    parser.add_argument('job', help="Path of the JSON job spec, or - for stdin.")
+    parser.add_argument('-o', '--output',
+                        help="Output .npy path. Overrides the job spec.")
+    parser.add_argument('-j', '--processes', type=int, default=1,
+                        help="Number of worker processes. 0 uses every CPU.")
+    parser.add_argument('--seed', type=int,
+                        help="Noise seed. Overrides the job spec.")
+    parser.add_argument('--cache', metavar='DIRECTORY',
+                        help="Directory in which to cache rendered patterns.")
+    parser.add_argument('--cache-size', type=float, default=1024.,
+                        help="Size budget of the cache in MiB. Default 1024.")
+    args = parser.parse_args(argv)
+
+    if args.job == '-':
+        job = json.load(sys.stdin)
+    else:
+        with open(args.job) as f:
+            job = json.load(f)
+    output = args.output or job.get('output')
+    if output is None:
+        parser.error("No output path given in the job spec or with --output.")
+    seed = args.seed if args.seed is not None else job.get('seed')
+    try:
+        specs = parse_job(job)
+    except ValueError as e:
+        parser.error(str(e))
+
+    cache = None
+    if args.cache is not None:
+        cache = PatternCache(args.cache, int(args.cache_size * 2 ** 20))
+    start = time.perf_counter()
+    n_frames = run(specs, output, seed=seed, processes=args.processes or None,
+                   cache=cache)
+    elapsed = time.perf_counter() - start
+    print("Wrote {} patterns to {} in {:.3f} s ({:.1f} patterns/s)".format(
+        n_frames, output, elapsed, n_frames / elapsed))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
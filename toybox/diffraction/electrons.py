@@ -0,0 +1,33 @@
+"""Properties of the electron beam."""
+from math import sqrt
+
+# CODATA 2018 values in SI units.
+PLANCK = 6.62607015e-34
+ELECTRON_MASS = 9.1093837015e-31
+ELEMENTARY_CHARGE = 1.602176634e-19
+SPEED_OF_LIGHT = 299792458.
+
+
+def electron_wavelength(energy):
+    """The relativistic wavelength of an electron.
+
+    Parameters
+    ----------
+    energy : float
+        Accelerating voltage, in kV.
+
+    Returns
+    -------
+    float
+        Wavelength, in Å.
+
+    Examples
+    --------
+    >>> round(electron_wavelength(200.), 5)
+    0.02508
+
+    """
+    energy = energy * 1e3 * ELEMENTARY_CHARGE
+    momentum = sqrt(2 * ELECTRON_MASS * energy
+                    * (1 + energy / (2 * ELECTRON_MASS * SPEED_OF_LIGHT ** 2)))
+    return PLANCK / momentum * 1e10
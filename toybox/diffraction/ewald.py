@@ -0,0 +1,284 @@
+"""Selection of reflections by the Ewald sphere.
+
+Only reflections close to the Ewald sphere are excited. For a beam along
+unit vector b with wavenumber k = 1/λ, the sphere passes through the origin
+and is centred at -k b, and the excitation error of reflection g is
+
+    s(g) = k - |g + k b|,
+
+positive for reflections inside the sphere. A :class:`ReciprocalLattice`
+sorts its reflections into a grid of cells, so that for each beam only the
+reflections in the few cells that the sphere passes through are considered.
+
+"""
+import numpy as np
+from toybox.diffraction.electrons import electron_wavelength
+from toybox.toys.core import Points
+
+# The typical number of reflections in a cell of a ReciprocalLattice. Smaller
+# cells cull more tightly, but cost more to cull.
+CELL_SIZE = 8
+
+
+def rocking_curve(errors, thickness):
+    """The kinematic intensity, relative to the exact Bragg condition, of
+    reflections with excitation errors `errors` for a slab of `thickness`.
+
+    Parameters
+    ----------
+    errors : array_like
+        Excitation errors, in Å⁻¹.
+    thickness : float
+        Thickness of the sample, in Å.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        sinc²(π t s), between 0 and 1.
+
+    """
+    return np.square(np.sinc(thickness * np.asarray(errors)))
+
+
+def beam_frame(zone_axis, x_axis=None):
+    """An orthonormal frame with its third axis along the beam.
+
+    Parameters
+    ----------
+    zone_axis : array_like
+        (3,)
+        Direction of the beam, in Cartesian coordinates.
+    x_axis : array_like, optional
+        (3,)
+        A direction whose projection normal to the beam becomes the x-axis
+        of patterns. Defaults to whichever Cartesian axis is furthest from
+        the beam.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        (3, 3)
+        The x-axis, y-axis and beam direction, as rows.
+
+    """
+    beam = np.asarray(zone_axis, dtype=float)
+    beam = beam / np.linalg.norm(beam)
+    if x_axis is None:
+        x_axis = np.eye(3)[np.argmin(np.abs(beam))]
+    x_axis = np.asarray(x_axis, dtype=float)
+    x_axis = x_axis - np.dot(x_axis, beam) * beam
+    norm = np.linalg.norm(x_axis)
+    if norm < 1e-9:
+        raise ValueError("The x-axis must not be parallel to the beam.")
+    x_axis = x_axis / norm
+    return np.array([x_axis, np.cross(beam, x_axis), beam])
+
+
+def excitation_errors(g, wavelength, zone_axis):
+    """Excitation errors of reflections for a beam along `zone_axis`, or for
+    each of several beams.
+
+    Parameters
+    ----------
+    g : array_like
+        (n_g, 3)
+        Reflections, in Cartesian coordinates, in Å⁻¹.
+    wavelength : float
+        Electron wavelength, in Å.
+    zone_axis : array_like
+        (3,) or (n_beams, 3)
+        Direction of the beam, or of each beam, in Cartesian coordinates.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        (n_g,) or (n_g, n_beams)
+        Excitation errors, in Å⁻¹, positive inside the sphere.
+
+    """
+    g = np.asarray(g, dtype=float).reshape(-1, 3)
+    k = 1. / wavelength
+    beams = np.asarray(zone_axis, dtype=float)
+    beams = beams / np.linalg.norm(beams, axis=-1, keepdims=True)
+    # |g + k b|^2 = k^2 + 2 k g.b + g^2
+    squares = np.einsum('ij,ij->i', g, g)
+    if beams.ndim == 2:
+        squares = squares[:, np.newaxis]
+    return k - np.sqrt(k ** 2 + 2 * k * np.dot(g, beams.T) + squares)
+
+
+class ReciprocalLattice:
+
+    def __init__(self, g, intensities=None, hkl=None):
+        """A set of reflections indexed for fast Ewald sphere queries.
+
+        Parameters
+        ----------
+        g : array_like
+            (n_g, 3)
+            Reflections, in Cartesian coordinates, in Å⁻¹.
+        intensities : array_like, optional
+            (n_g,)
+            Kinematic intensity of each reflection. Defaults to 1.
+        hkl : array_like, optional
+            (n_g, 3)
+            Miller indices of the reflections, if known.
+
+        """
+        self.g = np.array(g, dtype=float).reshape(-1, 3)
+        if not len(self.g):
+            raise ValueError("A lattice needs at least one reflection.")
+        if intensities is None:
+            intensities = np.ones(len(self.g))
+        self.intensities = np.array(intensities, dtype=float).reshape(-1)
+        if len(self.intensities) != len(self.g):
+            raise ValueError("There must be one intensity per reflection.")
+        if hkl is not None:
+            hkl = np.array(hkl, dtype=int).reshape(-1, 3)
+            if len(hkl) != len(self.g):
+                raise ValueError("There must be one index per reflection.")
+            hkl.flags.writeable = False
+        self.hkl = hkl
+        self.g.flags.writeable = False
+        self.intensities.flags.writeable = False
+        self.g_max = np.sqrt(np.max(np.sum(np.square(self.g), axis=1)))
+        self._cells = None
+
+    @classmethod
+    def from_cell(cls, cell, g_max, structure=None):
+        """Creates the lattice of every reflection within `g_max` of the
+        origin.
+
+        Parameters
+        ----------
+        cell : array_like
+            (3, 3)
+            Real-space lattice vectors, as rows, in Å.
+        g_max : float
+            Largest reflection, in Å⁻¹.
+        structure : :class:`toybox.diffraction.structure.Structure`, optional
+            If given, reflections take its kinematic intensities.
+
+        Returns
+        -------
+        ReciprocalLattice
+            With the Miller indices of its reflections as `hkl`.
+
+        """
+        reciprocal = np.linalg.inv(np.asarray(cell, dtype=float)).T
+        # The largest index along each axis is g_max times the spacing of
+        # the corresponding lattice planes.
+        limits = np.ceil(g_max * np.linalg.norm(cell, axis=1)).astype(int)
+        ranges = [np.arange(-n, n + 1) for n in limits]
+        hkl = np.array(np.meshgrid(*ranges, indexing='ij')).reshape(3, -1).T
+        g = np.dot(hkl, reciprocal)
+        inside = np.sum(np.square(g), axis=1) <= g_max ** 2
+        hkl, g = hkl[inside], g[inside]
+        intensities = None if structure is None else structure.intensities(hkl)
+        return cls(g, intensities, hkl)
+
+    @property
+    def cells(self):
+        """:obj:`tuple` The spatial index of the reflections, built on first
+        use: the centres of the occupied cells of a cubic grid, the size of
+        the cells, and, in the order of the cells, the indices of the
+        reflections in each along with where each cell starts.
+
+        """
+        if self._cells is None:
+            # Cells of about CELL_SIZE reflections each, by volume.
+            size = max(2 * self.g_max * (CELL_SIZE / len(self.g)) ** (1. / 3),
+                       1e-9)
+            keys = np.floor(self.g / size).astype(np.int64)
+            lower = keys.min(axis=0)
+            keys -= lower
+            extent = keys.max(axis=0) + 1
+            flat = np.ravel_multi_index(keys.T, extent)
+            order = np.argsort(flat, kind='mergesort')
+            occupied, starts = np.unique(flat[order], return_index=True)
+            corners = np.array(np.unravel_index(occupied, extent)).T + lower
+            self._cells = ((corners + 0.5) * size, size, order,
+                           np.append(starts, len(order)))
+        return self._cells
+
+    def near_sphere(self, wavelength, zone_axis, s_max):
+        """Finds the reflections within `s_max` of the Ewald sphere.
+
+        The distance from a point to the sphere changes no faster than the
+        point moves, so a cell whose centre is further from the sphere than
+        `s_max` plus half its diagonal holds no reflection near the sphere.
+        Only the reflections in the remaining cells have their excitation
+        errors computed.
+
+        Parameters
+        ----------
+        wavelength : float
+            Electron wavelength, in Å.
+        zone_axis : array_like
+            (3,)
+            Direction of the beam, in Cartesian coordinates.
+        s_max : float
+            Largest magnitude of excitation error kept, in Å⁻¹.
+
+        Returns
+        -------
+        indices : :class:`numpy.ndarray`
+            (n_near,)
+            Indices of the reflections near the sphere, in increasing order.
+        errors : :class:`numpy.ndarray`
+            (n_near,)
+            Their excitation errors.
+
+        """
+        centres, size, order, starts = self.cells
+        reach = s_max + size * np.sqrt(3) / 2
+        cells = np.flatnonzero(
+            np.abs(excitation_errors(centres, wavelength, zone_axis)) <= reach)
+        # The reflections of the kept cells, as contiguous runs of `order`.
+        lengths = starts[cells + 1] - starts[cells]
+        offsets = np.repeat(starts[cells] - np.cumsum(lengths) + lengths,
+                            lengths)
+        candidates = np.sort(order[offsets + np.arange(lengths.sum())])
+        errors = excitation_errors(self.g[candidates], wavelength, zone_axis)
+        near = np.abs(errors) <= s_max
+        return candidates[near], errors[near]
+
+    def points(self, energy=200., zone_axis=(0, 0, 1), s_max=0.02,
+               thickness=None, x_axis=None):
+        """Projects the reflections near the Ewald sphere into a pattern.
+
+        Parameters
+        ----------
+        energy : float
+            Accelerating voltage, in kV.
+        zone_axis : array_like
+            (3,)
+            Direction of the beam, in Cartesian coordinates.
+        s_max : float
+            Reflections with larger excitation errors are culled, in Å⁻¹.
+        thickness : float, optional
+            Thickness of the sample, in Å. If given, intensities are
+            attenuated by the :func:`rocking_curve`.
+        x_axis : array_like, optional
+            See :func:`beam_frame`.
+
+        Returns
+        -------
+        Points
+            Positions, in Å⁻¹, in the plane normal to the beam, without
+            symmetry.
+
+        """
+        wavelength = electron_wavelength(energy)
+        indices, errors = self.near_sphere(wavelength, zone_axis, s_max)
+        frame = beam_frame(zone_axis, x_axis)
+        # Rounded as by propagation, which would otherwise duplicate them.
+        positions = np.round(np.dot(self.g[indices], frame[:2].T), 9)
+        intensities = self.intensities[indices]
+        if thickness is not None:
+            intensities = intensities * rocking_curve(errors, thickness)
+        return Points(np.column_stack((positions, intensities)),
+                      auto_zero=False)
+
+    def __len__(self):
+        return len(self.g)
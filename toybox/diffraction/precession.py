@@ -0,0 +1,170 @@
+"""Precession electron diffraction.
+
+In precession electron diffraction (PED, or SPED when scanned) the beam is
+tilted away from the zone axis by the precession angle and rotated about it,
+and the pattern is integrated over a full turn. Rather than rendering the
+pattern at many tilts and averaging, the weight of every reflection is
+averaged over the precession circle, and the pattern is rendered once.
+
+Averaging over a full turn is rotationally symmetric, so the weight of a
+reflection only depends on its distance from the origin. Every point of an
+orbit of :class:`Points` therefore has the same weight, and weighting the
+starting points is enough.
+
+"""
+from functools import lru_cache
+
+import numpy as np
+from toybox.diffraction.electrons import electron_wavelength
+from toybox.diffraction.ewald import excitation_errors, rocking_curve
+from toybox.toys.core import Points, Pattern
+
+
+@lru_cache(maxsize=None)
+def precession_directions(n_steps):
+    """Unit vectors of the beam tilt at `n_steps` even steps around the
+    precession circle, as a read-only (`n_steps`, 2) array.
+
+    """
+    angles = np.linspace(0., 2 * np.pi, n_steps, endpoint=False)
+    directions = np.column_stack((np.cos(angles), np.sin(angles)))
+    directions.flags.writeable = False
+    return directions
+
+
+def tilted_beams(tilts):
+    """Unit vectors along beams tilted away from a zone axis along z.
+
+    Parameters
+    ----------
+    tilts : array_like
+        (n_tilts, 2)
+        The component of each unit beam vector normal to the zone axis,
+        i.e. the sine of the tilt times its direction.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        (n_tilts, 3)
+
+    """
+    tilts = np.asarray(tilts, dtype=float).reshape(-1, 2)
+    axial = np.sqrt(1. - np.sum(np.square(tilts), axis=1))
+    return np.column_stack((tilts, axial))
+
+
+@lru_cache(maxsize=1024)
+def _radial_weights(radii, angle, wavelength, thickness, n_steps):
+    """Precession weights of reflections at `radii`, cached per lattice and
+    precession angle.
+
+    """
+    tilts = np.sin(np.radians(angle)) * precession_directions(n_steps)
+    # By symmetry, reflections can be placed along x without loss.
+    g = np.column_stack((radii, np.zeros((len(radii), 2))))
+    errors = excitation_errors(g, wavelength, tilted_beams(tilts))
+    weights = np.mean(rocking_curve(errors, thickness), axis=1)
+    weights.flags.writeable = False
+    return weights
+
+
+class Precession:
+
+    def __init__(self, angle, energy=200., thickness=500., n_steps=360):
+        """A precessing electron beam.
+
+        The weight of a reflection is its kinematic rocking curve,
+        sinc²(π t s) for a slab of thickness t and excitation error s,
+        averaged over the precession circle. Weights are cached per set of
+        points and geometry.
+
+        Parameters
+        ----------
+        angle : float
+            Precession angle, in degrees.
+        energy : float
+            Accelerating voltage, in kV.
+        thickness : float
+            Thickness of the sample, in Å.
+        n_steps : int
+            Number of beam tilts averaged over the precession circle.
+
+        """
+        self.angle = float(angle)
+        self.energy = float(energy)
+        self.thickness = float(thickness)
+        self.n_steps = int(n_steps)
+
+    @property
+    def wavelength(self):
+        """:obj:`float` The electron wavelength, in Å."""
+        return electron_wavelength(self.energy)
+
+    def weights(self, points, reciprocal_scale=1.):
+        """Finds the precession weight of each starting point.
+
+        Parameters
+        ----------
+        points : Points
+        reciprocal_scale : float
+            Length, in Å⁻¹, of a unit of the coordinates of `points`.
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            (n_starting_points,)
+            Weights, between 0 and 1. The direct beam has a weight of 1.
+
+        """
+        positions = points.starting_points[:, :2].astype(float)
+        radii = np.round(np.hypot(positions[:, 0], positions[:, 1])
+                         * reciprocal_scale, 9)
+        unique, inverse = np.unique(radii, return_inverse=True)
+        weights = _radial_weights(tuple(unique), self.angle, self.wavelength,
+                                  self.thickness, self.n_steps)
+        return weights[inverse]
+
+    def apply(self, points, reciprocal_scale=1.):
+        """Weights the intensities of a set of points by precession.
+
+        Parameters
+        ----------
+        points : Points
+            Every intensity must be known.
+        reciprocal_scale : float
+            See :meth:`weights`.
+
+        Returns
+        -------
+        Points
+            A copy of `points` with weighted intensities.
+
+        """
+        starting_points = points.starting_points.copy()
+        starting_points[:, 2] = (starting_points[:, 2].astype(float)
+                                 * self.weights(points, reciprocal_scale))
+        return Points(starting_points, symmetry=points.symmetry,
+                      auto_zero=False, spots=points.spots)
+
+    def from_points(self, points, reciprocal_scale=1., **kwargs):
+        """Renders the precession pattern of a set of points.
+
+        Parameters
+        ----------
+        points : Points
+        reciprocal_scale : float
+            See :meth:`weights`.
+        kwargs
+            Any other arguments of :meth:`Pattern.from_points`.
+
+        Returns
+        -------
+        Pattern
+
+        """
+        return Pattern.from_points(self.apply(points, reciprocal_scale),
+                                   **kwargs)
+
+    def __repr__(self):
+        return ("Precession(angle={}, energy={}, thickness={}, n_steps={})"
+                .format(self.angle, self.energy, self.thickness, self.n_steps))
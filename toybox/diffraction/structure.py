@@ -0,0 +1,174 @@
+"""Kinematic intensities of reflections from a crystal structure.
+
+The structure factor of reflection g = (h, k, l) is
+
+    F(g) = sum_j f_j(g) exp(2 pi i g . r_j)
+
+over the atoms j of the unit cell at fractional coordinates r_j. It is
+computed for every reflection at once from an (n_g, n_atoms) phase matrix.
+
+"""
+from functools import lru_cache
+
+import numpy as np
+from toybox.toys.core import Points
+
+# The number of sets of reflections whose intensities each structure keeps.
+CACHE_SIZE = 32
+
+
+class Structure:
+
+    def __init__(self, positions, scattering_factors, cell=None):
+        """The atoms of a unit cell.
+
+        Parameters
+        ----------
+        positions : array_like
+            (n_atoms, 3)
+            Fractional coordinates of the atoms.
+        scattering_factors : array_like
+            Either (n_atoms,) constant scattering factors, or
+            (n_atoms, n_terms, 2) coefficients (a, b) of a sum of Gaussians,
+            f(s) = sum a exp(-b s²) with s = |g| / 2 in Å⁻¹, such as the
+            Doyle-Turner or Peng parametrisations. The latter need `cell`.
+        cell : array_like, optional
+            (3, 3)
+            Real-space lattice vectors, as rows, in Å. Only needed for
+            scattering factors that depend on |g|.
+
+        """
+        positions = np.array(positions, dtype=float).reshape(-1, 3)
+        scattering_factors = np.array(scattering_factors, dtype=float)
+        if len(scattering_factors) != len(positions):
+            raise ValueError("There must be one scattering factor per atom.")
+        if scattering_factors.ndim not in (1, 3):
+            raise ValueError("Scattering factors must be constants or "
+                             "Gaussian coefficients.")
+        if scattering_factors.ndim == 3 and cell is None:
+            raise ValueError("Scattering factors that depend on |g| need a "
+                             "unit cell.")
+        if cell is not None:
+            cell = np.array(cell, dtype=float).reshape(3, 3)
+        # The cached intensities are only valid while the structure is
+        # unchanged, so its arrays are read-only.
+        for array in (positions, scattering_factors, cell):
+            if array is not None:
+                array.flags.writeable = False
+        self.positions = positions
+        self.scattering_factors = scattering_factors
+        self.cell = cell
+        self._cached_intensities = lru_cache(maxsize=CACHE_SIZE)(
+            self._intensities)
+
+    @property
+    def reciprocal_cell(self):
+        """:class:`numpy.ndarray` (3, 3) The reciprocal lattice vectors, as
+        rows, in Å⁻¹, without a factor of 2 pi.
+
+        """
+        return np.linalg.inv(self.cell).T
+
+    def form_factors(self, hkl):
+        """Evaluates the scattering factor of every atom for every reflection.
+
+        Parameters
+        ----------
+        hkl : array_like
+            (n_g, 3)
+            Miller indices of the reflections.
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            (n_g, n_atoms)
+
+        """
+        hkl = np.asarray(hkl, dtype=float).reshape(-1, 3)
+        if self.scattering_factors.ndim == 1:
+            return np.broadcast_to(self.scattering_factors,
+                                   (len(hkl), len(self.positions)))
+        g = np.dot(hkl, self.reciprocal_cell)
+        s_squared = 0.25 * np.sum(np.square(g), axis=1)
+        a = self.scattering_factors[:, :, 0]
+        b = self.scattering_factors[:, :, 1]
+        return np.sum(a * np.exp(-b * s_squared[:, np.newaxis, np.newaxis]),
+                      axis=2)
+
+    def structure_factors(self, hkl):
+        """Computes the complex structure factor of each reflection.
+
+        Parameters
+        ----------
+        hkl : array_like
+            (n_g, 3)
+            Miller indices of the reflections.
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            (n_g,)
+
+        """
+        hkl = np.asarray(hkl, dtype=float).reshape(-1, 3)
+        phases = 2 * np.pi * np.dot(hkl, self.positions.T)
+        return np.sum(self.form_factors(hkl) * np.exp(1j * phases), axis=1)
+
+    def intensities(self, hkl):
+        """Computes the kinematic intensity, |F|², of each reflection.
+
+        Intensities of the last few sets of reflections are cached, so
+        repeatedly using the same lattice only computes it once.
+
+        Parameters
+        ----------
+        hkl : array_like
+            (n_g, 3)
+            Miller indices of the reflections.
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            (n_g,)
+            A read-only array of intensities.
+
+        """
+        hkl = np.ascontiguousarray(hkl, dtype=float).reshape(-1, 3) + 0.
+        return self._cached_intensities(hkl.tobytes())
+
+    def _intensities(self, key):
+        hkl = np.frombuffer(key, dtype=float).reshape(-1, 3)
+        intensities = np.square(np.abs(self.structure_factors(hkl)))
+        intensities.flags.writeable = False
+        return intensities
+
+    def apply(self, points, basis=((1, 0, 0), (0, 1, 0))):
+        """Sets the intensities of a set of points from the structure.
+
+        Parameters
+        ----------
+        points : Points
+            Points whose coordinates are (fractional) multiples of `basis`.
+        basis : array_like
+            (2, 3)
+            Miller indices of the reflections at (1, 0) and (0, 1), which
+            span the zone of the pattern.
+
+        Returns
+        -------
+        Points
+            A copy of `points` whose starting points have kinematic
+            intensities. The intensities are propagated through the symmetry
+            of `points`, which should therefore be a symmetry of the zone.
+            Use points without symmetry otherwise.
+
+        """
+        starting_points = points.starting_points.copy()
+        hkl = np.dot(starting_points[:, :2].astype(float),
+                     np.asarray(basis, dtype=float))
+        starting_points[:, 2] = self.intensities(np.round(hkl, 9))
+        return Points(starting_points, symmetry=points.symmetry,
+                      auto_zero=False, spots=points.spots)
+
+    def __repr__(self):
+        return "Structure with {} atoms".format(len(self.positions))
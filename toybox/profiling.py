@@ -0,0 +1,201 @@
+"""Opt-in instrumentation of the pattern generation pipeline.
+
+The generation pipeline is split into named stages (``check_points``,
+``propagate``, ``render`` and ``blur``). While an :func:`instrument` block is
+active, every stage records its wall time, number of calls and, optionally,
+the memory it allocated. Outside such a block the stage hooks do nothing.
+
+Examples
+--------
+>>> with instrument(memory=True) as report:
+...     pattern = Pattern.from_points(points)
+>>> report['render'].time  # doctest: +SKIP
+0.0123
+
+"""
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+
+_report = None  # The report currently being recorded, if any.
+
+
+class StageStats:
+
+    def __init__(self, name):
+        """Statistics accumulated for a single pipeline stage.
+
+        Parameters
+        ----------
+        name : str
+            The name of the stage.
+
+        Attributes
+        ----------
+        calls : int
+            Number of times the stage was entered.
+        time : float
+            Total wall time spent in the stage, in seconds.
+        allocated : int or None
+            Net number of bytes allocated by the stage, or `None` if memory
+            was not traced.
+        peak : int or None
+            Largest peak traced memory above the stage's starting usage, in
+            bytes, or `None` if it could not be measured.
+
+        """
+        self.name = name
+        self.calls = 0
+        self.time = 0.
+        self.allocated = None
+        self.peak = None
+
+    def as_dict(self):
+        return {'calls': self.calls, 'time': self.time,
+                'allocated': self.allocated, 'peak': self.peak}
+
+    def __repr__(self):
+        return "{}: {} calls, {:.6f} s, {} bytes".format(
+            self.name, self.calls, self.time, self.allocated)
+
+
+class Report:
+
+    def __init__(self, memory=False):
+        """A structured report of the time spent in each pipeline stage.
+
+        Parameters
+        ----------
+        memory : bool
+            If True, memory allocations are traced with :mod:`tracemalloc`.
+
+        """
+        self.memory = memory
+        self.stages = {}
+        self.total_time = 0.
+
+    def __getitem__(self, name):
+        return self.stages[name]
+
+    def __contains__(self, name):
+        return name in self.stages
+
+    def as_dict(self):
+        """Returns the report as a :obj:`dict` of :obj:`dict` keyed by stage
+        name.
+
+        """
+        return {name: stats.as_dict() for name, stats in self.stages.items()}
+
+    def __repr__(self):
+        lines = ["Report ({:.6f} s)".format(self.total_time)]
+        lines.extend(repr(stats) for stats in self.stages.values())
+        return "\n".join(lines)
+
+
+class _Stage:
+
+    __slots__ = ('report', 'name', 'start', 'memory')
+
+    def __init__(self, report, name):
+        self.report = report
+        self.name = name
+
+    def __enter__(self):
+        if self.report.memory:
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            self.memory = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        stats = self.report.stages.get(self.name)
+        if stats is None:
+            stats = self.report.stages[self.name] = StageStats(self.name)
+        stats.calls += 1
+        stats.time += elapsed
+        if self.report.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            stats.allocated = (stats.allocated or 0) + current - self.memory
+            if hasattr(tracemalloc, 'reset_peak'):
+                stats.peak = max(stats.peak or 0, peak - self.memory)
+        return False
+
+
+class _NullStage:
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name):
+    """Returns a context manager recording the enclosed block as stage `name`.
+
+    When no :func:`instrument` block is active a shared no-op context manager
+    is returned, so the hook is essentially free.
+
+    """
+    if _report is None:
+        return _NULL_STAGE
+    return _Stage(_report, name)
+
+
+def instrumented(name):
+    """Decorates a function so that each call is recorded as stage `name`."""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if _report is None:
+                return function(*args, **kwargs)
+            with _Stage(_report, name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def instrument(memory=False):
+    """Records per-stage statistics for the pipeline within the block.
+
+    Stages are not expected to nest; memory figures of a nested stage are
+    included in those of the enclosing one. Work done in other processes is
+    not recorded.
+
+    Parameters
+    ----------
+    memory : bool
+        If True, also record the bytes allocated in each stage using
+        :mod:`tracemalloc`. This slows the pipeline down noticeably.
+
+    Yields
+    ------
+    Report
+        The report, which is filled in as the block runs.
+
+    """
+    global _report
+    previous = _report
+    report = Report(memory=memory)
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    _report = report
+    start = time.perf_counter()
+    try:
+        yield report
+    finally:
+        report.total_time = time.perf_counter() - start
+        _report = previous
+        if started_tracing:
+            tracemalloc.stop()
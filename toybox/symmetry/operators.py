@@ -2,6 +2,7 @@ from math import degrees
 
 import numpy as np
 from copy import copy
+from toybox.profiling import instrumented
 from toybox.symmetry.matrices import get_rotation_matrix, get_reflection_matrix
 from toybox.tools import equivalent, sort_points, clean_points
 
@@ -130,6 +131,130 @@ class Reflection(BaseOperator):
         return reflection
 
 
+def generate_group(*operators, max_order=1000):
+    """Generates every element of the point group spanned by `operators`.
+
+    Parameters
+    ----------
+    operators : BaseOperator
+        The generators of the group.
+    max_order : int
+        Stop once the group has this many elements.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        (n_elements, 2, 2)
+        The matrices of the group elements, starting with the identity.
+
+    """
+    group = [IDENTITY]
+    new = [IDENTITY]
+    while new and len(group) < max_order:
+        products = [np.dot(operator.matrix, element)
+                    for operator in operators for element in new]
+        new = []
+        for product in products:
+            if not any(np.allclose(product, element) for element in group):
+                group.append(product)
+                new.append(product)
+    return np.array(group[:max_order])
+
+
+def orbit_representatives(positions, group, decimals=9):
+    """Finds the representative of the orbit of each point under a group.
+
+    The representative of an orbit is the image that comes first in
+    lexicographic order of (x, y), after rounding to `decimals` places.
+
+    Parameters
+    ----------
+    positions : array_like
+        (n_points, 2)
+    group : array_like
+        (n_elements, 2, 2)
+        The matrices of the group, e.g. from :func:`generate_group`.
+    decimals : int
+        Number of decimal places to which the images are rounded.
+
+    Returns
+    -------
+    representatives : :class:`numpy.ndarray`
+        (n_points, 2)
+        The representative of the orbit of each point.
+    elements : :class:`numpy.ndarray`
+        (n_points,)
+        Index in `group` of an element mapping each point to its
+        representative.
+
+    """
+    positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+    images = np.einsum('gij,nj->ngi', group, positions)
+    return image_representatives(np.round(images, decimals) + 0.)
+
+
+def image_representatives(images):
+    """Finds the representative of each orbit from images already computed.
+
+    Parameters
+    ----------
+    images : array_like
+        (n_points, n_elements, 2)
+        The image of each point under each element of a group, rounded.
+
+    Returns
+    -------
+    representatives, elements
+        See :func:`orbit_representatives`.
+
+    """
+    images = np.asarray(images)
+    keys = images[:, :, ::-1].transpose(2, 0, 1)
+    elements = np.lexsort(keys, axis=-1)[:, 0]
+    representatives = images[np.arange(len(images)), elements]
+    return representatives, elements
+
+
+def group_orbits(positions, group, decimals=9):
+    """Labels points by the orbit they belong to under a group.
+
+    Parameters
+    ----------
+    positions : array_like
+        (n_points, 2)
+    group : array_like
+        (n_elements, 2, 2)
+        The matrices of the group, e.g. from :func:`generate_group`.
+    decimals : int
+        Number of decimal places to which the images are rounded.
+
+    Returns
+    -------
+    labels : :class:`numpy.ndarray`
+        (n_points,)
+        Index of the orbit of each point. Orbits are numbered in the
+        lexicographic order of their representatives.
+    representatives : :class:`numpy.ndarray`
+        (n_orbits, 2)
+        The representative of each orbit. See :func:`orbit_representatives`.
+
+    Examples
+    --------
+    >>> labels, _ = group_orbits(positions, generate_group(*operators))
+    >>> order = np.argsort(labels, kind='mergesort')  # Points orbit by orbit.
+
+    """
+    representatives, _ = orbit_representatives(positions, group, decimals)
+    order = np.lexsort(representatives.T[::-1])
+    sorted_representatives = representatives[order]
+    new = np.append(True, np.any(sorted_representatives[1:]
+                                 != sorted_representatives[:-1], axis=1))
+    labels = np.empty(len(order), dtype=int)
+    labels[order] = np.cumsum(new) - 1
+    return labels, sorted_representatives[new]
+
+
+@instrumented('propagate')
 def propagate(points, *operators, max_iter=1000):
     new_points = points.copy()
     n = 0
@@ -143,7 +268,7 @@ def propagate(points, *operators, max_iter=1000):
             transformed_coordinates = operator.apply(new_points[:, :-1].astype(float))
             transform = np.hstack((transformed_coordinates, intensities))
             new_points = np.vstack((new_points, transform))
-            new_points = np.vstack({tuple(row) for row in new_points})
+            new_points = np.array(list({tuple(row) for row in new_points}))
             if equivalent(new_points, old_points):
                 break
     return sort_points(new_points)
\ No newline at end of file
@@ -1,4 +1,5 @@
 import numpy as np
+from toybox.profiling import instrumented
 
 
 def check_point(point):
@@ -31,6 +32,7 @@ def check_point(point):
         return point + tuple((intensity,))
 
 
+@instrumented('check_points')
 def check_points(points):
     """Calls :func:`check_point` for every point passed.
 
@@ -80,7 +82,40 @@ def equivalent(points1, points2):
         return False
 
 
-def sort_points(points):
+def argsort_points(positions, decimals=9):
+    """Finds the order that sorts points first by argument, then by modulus.
+
+    Arguments run from -pi to pi, as given by :func:`numpy.arctan2`, and are
+    rounded to `decimals` places first, so that points at the same angle are
+    ordered by modulus whatever the rounding errors in their coordinates.
+
+    Parameters
+    ----------
+    positions : array_like
+        (n_points, 2)
+        The positions to be sorted. Float arrays, and views of them, are used
+        without copying.
+    decimals : int
+        Number of decimal places to which the arguments are rounded.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        (n_points,)
+        The permutation that sorts the points. It can be reused to sort any
+        array aligned with `positions`.
+
+    """
+    positions = np.asarray(positions)
+    if positions.dtype.kind not in 'fiu':
+        positions = positions.astype(float)
+    x, y = positions[:, 0], positions[:, 1] + 0.  # Turns -0. into 0.
+    arguments = np.round(np.arctan2(y, x), decimals)
+    moduli = np.hypot(x, y)
+    return np.lexsort((moduli, arguments))
+
+
+def sort_points(points, return_index=False):
     """Sorts points first by argument, then by modulus.
 
     Parameters
@@ -88,21 +123,25 @@ def sort_points(points):
     points : array_like
         (n_points, 3)
         The points to be sorted: (x, y, intensity)
+    return_index : bool
+        If True, also return the permutation that sorts the points.
 
     Returns
     -------
     points_sorted : :class:`numpy.ndarray`
         (n_points, 3)
         The sorted points.
+    index : :class:`numpy.ndarray`
+        (n_points,)
+        The sorting permutation, only returned if `return_index` is True.
+        See :func:`argsort_points`.
 
     """
-    positions = points[:, :2].astype(float)
-    with np.errstate(invalid='ignore', divide='ignore'):
-        tangents = np.nan_to_num(positions[:, 1]/positions[:, 0])
-    arguments = np.arctan(tangents)
-    moduli = np.sqrt(np.sum(np.square(positions), axis=1))
-    inds = np.lexsort((moduli, arguments))
+    points = np.asarray(points)
+    inds = argsort_points(points[:, :2])
     points_sorted = points[inds]
+    if return_index:
+        return points_sorted, inds
     return points_sorted
 
 
@@ -111,3 +150,41 @@ def clean_points(points):
     points[np.isclose(points, 0.)] = 0  # Dot product has a bad habit of adding small amounts to zero values. Suppress it here.
     points = np.round(points, 9)
     return points
+
+
+def unique_rows(array, decimals=9):
+    """Finds the distinct rows of an array.
+
+    Each row is viewed as a single opaque item, so the rows are compared in
+    one call to :func:`numpy.unique` rather than column by column.
+
+    Parameters
+    ----------
+    array : array_like
+        (n_rows, ...)
+        Floats are rounded to `decimals` places first.
+    decimals : int
+        Number of decimal places to which the rows are rounded.
+
+    Returns
+    -------
+    unique : :class:`numpy.ndarray`
+        (n_unique, ...)
+        The distinct rows, in order of first appearance.
+    inverse : :class:`numpy.ndarray`
+        (n_rows,)
+        The index in `unique` of every row.
+
+    """
+    array = np.asarray(array)
+    if array.dtype.kind == 'f':
+        array = np.round(array, decimals) + 0.  # Turns -0. into 0.
+    rows = np.ascontiguousarray(array.reshape(len(array), -1))
+    items = rows.view(np.dtype((np.void, rows.dtype.itemsize * rows.shape[1])))
+    _, first, inverse = np.unique(items.ravel(), return_index=True,
+                                  return_inverse=True)
+    # np.unique sorts the items; order them by first appearance instead.
+    order = np.argsort(first)
+    ranks = np.empty_like(order)
+    ranks[order] = np.arange(len(order))
+    return array[first[order]], ranks[inverse]
@@ -0,0 +1,123 @@
+"""Pattern generation for :mod:`asyncio` applications.
+
+Rendering is CPU-bound, so it is offloaded to an executor to keep the event
+loop responsive. Any :class:`concurrent.futures.Executor` may be used; the
+default is the event loop's thread pool.
+
+"""
+import asyncio
+import collections
+from functools import partial
+
+from toybox.toys.batch import _render_spec
+from toybox.toys.core import Pattern
+
+
+async def from_points_async(points, executor=None, **kwargs):
+    """Asynchronous counterpart of :meth:`Pattern.from_points`.
+
+    Parameters
+    ----------
+    points : Points, array_like
+        Positions and intensities of the points in the array.
+    executor : :class:`concurrent.futures.Executor`, optional
+        Executor to render in. Defaults to the event loop's default executor.
+    kwargs
+        Any other arguments of :meth:`Pattern.from_points`.
+
+    Returns
+    -------
+    Pattern
+
+    """
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        executor, partial(Pattern.from_points, points, **kwargs))
+
+
+async def render_batch_async(specs, executor=None, max_pending=4):
+    """Asynchronous counterpart of :func:`toybox.toys.batch.render_batch`.
+
+    Returns
+    -------
+    list of Pattern
+        One pattern per spec, in order.
+
+    """
+    patterns = []
+    async with PatternStream(specs, executor, max_pending) as stream:
+        async for pattern in stream:
+            patterns.append(pattern)
+    return patterns
+
+
+class PatternStream:
+
+    def __init__(self, specs, executor=None, max_pending=4):
+        """An asynchronous iterator of patterns rendered in an executor.
+
+        At most `max_pending` patterns are rendered ahead of the consumer, so
+        a slow consumer applies backpressure to the rendering. Closing the
+        stream, or cancelling the task iterating over it, cancels every
+        pattern that has not started rendering yet.
+
+        Parameters
+        ----------
+        specs : iterable of dict
+            Keyword arguments for :meth:`Pattern.from_points`. Consumed
+            lazily.
+        executor : :class:`concurrent.futures.Executor`, optional
+            Executor to render in. A process pool requires picklable specs.
+        max_pending : int
+            Maximum number of patterns submitted but not yet consumed.
+
+        Examples
+        --------
+        >>> async with PatternStream(specs) as stream:
+        ...     async for pattern in stream:
+        ...         await send(pattern)
+
+        """
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1.")
+        self._specs = iter(specs)
+        self._executor = executor
+        self._max_pending = max_pending
+        self._pending = collections.deque()
+        self._closed = False
+
+    def _submit(self):
+        loop = asyncio.get_event_loop()
+        while not self._closed and len(self._pending) < self._max_pending:
+            try:
+                spec = next(self._specs)
+            except StopIteration:
+                break
+            self._pending.append(
+                loop.run_in_executor(self._executor, _render_spec, spec))
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        self._submit()
+        if not self._pending:
+            raise StopAsyncIteration
+        try:
+            return await self._pending.popleft()
+        except asyncio.CancelledError:
+            self.close()
+            raise
+
+    def close(self):
+        """Stops the stream and cancels all pending patterns."""
+        self._closed = True
+        while self._pending:
+            self._pending.popleft().cancel()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+        return False
@@ -0,0 +1,206 @@
+"""Generation of many patterns at once, optionally in parallel."""
+import multiprocessing
+import os
+import sys
+from functools import partial
+
+import numpy as np
+from toybox.analysis.reductions import tap
+from toybox.toys.core import Pattern
+
+
+def _init_worker():
+    # Every worker already has a core to itself, so the compiled kernels run
+    # on a single thread rather than oversubscribing the machine.
+    numba = sys.modules.get('numba')
+    if numba is None:
+        os.environ['NUMBA_NUM_THREADS'] = '1'
+    else:
+        numba.set_num_threads(1)
+
+
+def map_patterns(function, iterable, processes=1, chunksize=1):
+    """Applies `function` to every element of `iterable`, yielding the results
+    in order.
+
+    Parameters
+    ----------
+    function : callable
+        A picklable (i.e. module-level) function.
+    iterable : iterable
+        Arguments for `function`. Consumed lazily.
+    processes : int or None, optional
+        Number of worker processes. If 1 (the default), everything runs in
+        the current process. If None, one process per CPU is used. The
+        compiled kernels of each worker run on a single thread.
+    chunksize : int, optional
+        Number of elements sent to a worker at a time.
+
+    Yields
+    ------
+    object
+        The result of `function` for each element of `iterable`.
+
+    """
+    if processes == 1:
+        for item in iterable:
+            yield function(item)
+        return
+    pool = multiprocessing.Pool(processes, initializer=_init_worker)
+    try:
+        for result in pool.imap(function, iterable, chunksize):
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _render_spec(spec, cache=None):
+    if cache is not None:
+        return cache.from_points(**spec)
+    return Pattern.from_points(**spec)
+
+
+def render_batch(specs, processes=1, chunksize=1, reducers=(), cache=None):
+    """Renders a pattern for every spec in `specs`.
+
+    Parameters
+    ----------
+    specs : iterable of dict
+        Keyword arguments for :meth:`Pattern.from_points`.
+    processes : int or None, optional
+        Number of worker processes. See :func:`map_patterns`.
+    chunksize : int, optional
+        Number of specs sent to a worker at a time.
+    reducers : sequence, optional
+        Reducers from :mod:`toybox.analysis.reductions`, updated with each
+        pattern as it is produced.
+    cache : :class:`toybox.toys.cache.PatternCache`, optional
+        If given, patterns are read from and written to this cache.
+
+    Yields
+    ------
+    Pattern
+        One pattern per spec, in order.
+
+    """
+    patterns = map_patterns(partial(_render_spec, cache=cache), specs,
+                            processes, chunksize)
+    return tap(patterns, *reducers)
+
+
+def _render_pyramid(spec, levels, factor=2, cache=None):
+    return _render_spec(spec, cache).pyramid(levels, factor)
+
+
+def render_pyramids(specs, levels, factor=2, processes=1, chunksize=1,
+                    cache=None):
+    """Renders every spec once at full resolution and bins it into a
+    multi-resolution pyramid.
+
+    Binning sums the pixels, as a detector does, so the total intensity is
+    the same at every level while peaks narrow in pixels. This is much
+    cheaper than rendering each level separately.
+
+    Parameters
+    ----------
+    specs : iterable of dict
+        Keyword arguments for :meth:`Pattern.from_points`, whose `shape` is
+        that of the finest level.
+    levels : int
+        Number of levels, including the full resolution.
+    factor : int, optional
+        Binning factor between successive levels.
+    processes : int or None, optional
+        Number of worker processes. See :func:`map_patterns`. Binning takes
+        place in the workers too.
+    chunksize : int, optional
+        Number of specs sent to a worker at a time.
+    cache : :class:`toybox.toys.cache.PatternCache`, optional
+        If given, full-resolution patterns are read from and written to this
+        cache.
+
+    Yields
+    ------
+    :obj:`list` of Pattern
+        The `levels` patterns of each spec, finest first.
+
+    """
+    return map_patterns(partial(_render_pyramid, levels=levels, factor=factor,
+                                cache=cache), specs, processes, chunksize)
+
+
+def add_noise(pattern, noise, random_state=None):
+    """Adds Gaussian noise to a pattern.
+
+    Parameters
+    ----------
+    pattern : array_like
+        The noise-free pattern.
+    noise : float
+        Standard deviation of the noise as a fraction of the pattern maximum.
+    random_state : :class:`numpy.random.RandomState`, optional
+        Source of randomness.
+
+    Returns
+    -------
+    Pattern
+        A noisy copy of `pattern`.
+
+    """
+    if random_state is None:
+        random_state = np.random.RandomState()
+    pattern = np.asarray(pattern)
+    if noise:
+        pattern = pattern + random_state.normal(
+            scale=noise * np.max(pattern), size=pattern.shape)
+    else:
+        pattern = pattern.copy()
+    return pattern.view(Pattern)
+
+
+def _noisy_frames(patterns, counts, noises, seed):
+    for i, (pattern, count, noise) in enumerate(zip(patterns, counts, noises)):
+        random_state = np.random.RandomState(None if seed is None else [seed, i])
+        for _ in range(count):
+            yield add_noise(pattern, noise, random_state)
+
+
+def generate(specs, seed=None, processes=1, chunksize=1, reducers=(),
+             cache=None):
+    """Generates noisy realisations of a series of patterns.
+
+    Each spec is rendered once, in parallel if requested, and then `count`
+    frames with independent noise are produced from it. The noise of spec `i`
+    is seeded with ``(seed, i)``, so the output does not depend on the number
+    of processes.
+
+    Parameters
+    ----------
+    specs : iterable of dict
+        Keyword arguments for :meth:`Pattern.from_points`, plus the optional
+        keys `count` (number of frames, defaults to 1) and `noise` (see
+        :func:`add_noise`, defaults to 0).
+    seed : int, optional
+        Seed for the noise.
+    processes : int or None, optional
+        Number of worker processes used for rendering.
+    chunksize : int, optional
+        Number of specs sent to a worker at a time.
+    reducers : sequence, optional
+        Reducers from :mod:`toybox.analysis.reductions`, updated with each
+        noisy frame as it is produced.
+    cache : :class:`toybox.toys.cache.PatternCache`, optional
+        If given, noise-free patterns are read from and written to this cache.
+
+    Yields
+    ------
+    Pattern
+        `count` frames for each spec, in order.
+
+    """
+    specs = [dict(spec) for spec in specs]
+    counts = [spec.pop('count', 1) for spec in specs]
+    noises = [spec.pop('noise', 0.) for spec in specs]
+    patterns = render_batch(specs, processes, chunksize, cache=cache)
+    return tap(_noisy_frames(patterns, counts, noises, seed), *reducers)
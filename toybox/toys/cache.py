@@ -0,0 +1,163 @@
+"""A persistent, content-addressed cache of rendered patterns.
+
+Each pattern is stored as a ``.npy`` file named after a hash of the
+canonical form of the points (see :attr:`Points.canonical`) and the
+rendering parameters it was made from, so identical patterns are
+rendered once and shared between jobs and processes. Cached patterns are
+memory-mapped on read rather than loaded. The cache is kept under a size
+budget by evicting the least recently used files.
+
+"""
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+from toybox.toys.core import Points, Pattern
+
+# Bump whenever rendering changes, so that stale patterns are never reused.
+CACHE_VERSION = 1
+
+
+class PatternCache:
+
+    def __init__(self, directory, max_bytes=2 ** 30):
+        """A directory of rendered patterns.
+
+        The cache is safe to share between processes: files are written
+        atomically, and a pattern evicted while another process reads it
+        remains readable until that process releases it.
+
+        Parameters
+        ----------
+        directory : str
+            Directory holding the cache. Created if it does not exist.
+        max_bytes : int
+            Size budget of the cache, in bytes. Once exceeded, the least
+            recently used patterns are evicted.
+
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, points, shape=(100, 100), scale=1.0, blur=1., mode='sample',
+            truncate=4.):
+        """The key of the pattern rendered from `points` with the given
+        parameters. See :meth:`Pattern.from_points`.
+
+        Returns
+        -------
+        str
+
+        """
+        if not isinstance(points, Points):
+            points = Points(points)
+        parameters = (CACHE_VERSION, tuple(int(s) for s in shape),
+                      float(scale), float(blur), str(mode), float(truncate))
+        digest = hashlib.sha1(repr(parameters).encode())
+        digest.update(str(points.symmetry).encode())
+        digest.update(points.canonical.tobytes())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.npy')
+
+    def get(self, key):
+        """Reads a pattern from the cache.
+
+        Parameters
+        ----------
+        key : str
+
+        Returns
+        -------
+        Pattern or None
+            A read-only memory map of the pattern, or None if it is not
+            cached.
+
+        """
+        path = self._path(key)
+        try:
+            pattern = np.load(path, mmap_mode='r')
+            os.utime(path)  # Marks the pattern as recently used.
+        except (IOError, OSError):
+            return None
+        return pattern.view(Pattern)
+
+    def put(self, key, pattern):
+        """Writes a pattern to the cache, evicting others if needed."""
+        handle, temporary = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                np.save(f, np.asarray(pattern))
+            os.replace(temporary, self._path(key))
+        except BaseException:
+            os.remove(temporary)
+            raise
+        self.evict()
+
+    def from_points(self, points, shape=(100, 100), scale=1.0, blur=1.,
+                    mode='sample', truncate=4.):
+        """Cached counterpart of :meth:`Pattern.from_points`.
+
+        Returns
+        -------
+        Pattern
+            A read-only memory map if the pattern was already cached.
+
+        """
+        if not isinstance(points, Points):
+            points = Points(points)
+        key = self.key(points, shape, scale, blur, mode, truncate)
+        pattern = self.get(key)
+        if pattern is None:
+            pattern = Pattern.from_points(points, shape, scale, blur, mode,
+                                          truncate)
+            self.put(key, pattern)
+        return pattern
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.npy'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:  # Evicted by another process.
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        return entries
+
+    @property
+    def nbytes(self):
+        """:obj:`int` The total size of the cached patterns, in bytes."""
+        return sum(size for _, size, _ in self._entries())
+
+    def __len__(self):
+        return len(self._entries())
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    def evict(self, max_bytes=None):
+        """Removes the least recently used patterns until the cache fits in
+        `max_bytes`, which defaults to the budget of the cache.
+
+        """
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Removes every pattern from the cache."""
+        self.evict(0)
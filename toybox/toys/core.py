@@ -1,10 +1,24 @@
+from functools import lru_cache
+
 import numpy as np
-from matplotlib import pyplot as plt
-from scipy.stats import multivariate_normal
-from skimage import filters
-from toybox.symmetry.operators import propagate
+from toybox.analysis.radial import radial_profile
+from toybox.profiling import stage
+from toybox.symmetry.operators import propagate, generate_group, \
+    image_representatives, group_orbits
 from toybox.symmetry.parsers import parse_hermann_mauguin
-from toybox.tools import check_points, check_point, equivalent
+from toybox.toys.rendering import render, spot_covariances, bin_frames, \
+    pyramid
+from toybox.tools import check_points, check_point
+
+DEFAULT_SPOT = (1., 1., 0.)
+
+
+@lru_cache(maxsize=None)
+def _symmetry_group(symmetry):
+    """The matrices of the point group of `symmetry`, as a read-only array."""
+    group = generate_group(*parse_hermann_mauguin(symmetry))
+    group.flags.writeable = False
+    return group
 
 
 class Points:
@@ -13,6 +27,7 @@ class Points:
                  starting_points=None,
                  symmetry=1,
                  auto_zero=True,
+                 spots=None,
                  ):
         """A series of points related by symmetry.
 
@@ -28,19 +43,100 @@ class Points:
             Symmetry to apply to the points. Defaults to int:1 i.e. no symmetry.
         auto_zero : bool
             If True, automatically appends (0., 0., None) to the starting_points.
+        spots : array_like, optional
+            (`n_points`, 3)
+            Shape of the spot of each starting point, in the format
+            (sigma_x, sigma_y, theta): standard deviations in pixels along the
+            spot's principal axes and the angle in degrees of the first axis
+            to the x-axis. Defaults to circular spots with sigma 1.
 
         """
 
+        self._cache = {}
+        self._symmetry = symmetry
         if starting_points is not None:
-            starting_points = check_points(starting_points)
-            self.starting_points = np.array(starting_points)
+            starting_points = np.array(check_points(starting_points))
+            if spots is None:
+                spots = np.tile(DEFAULT_SPOT, (len(starting_points), 1))
+            spots = np.array(spots, dtype=float).reshape(-1, 3)
+            if len(spots) != len(starting_points):
+                raise ValueError("There must be one spot per starting point.")
+            self._set_starting_points(starting_points, spots)
         else:
-            self.starting_points = None
+            self._set_starting_points(None, None)
         if auto_zero:
             self.append_point((0., 0.))
-        self.symmetry = symmetry
 
-    def append_point(self, point):
+    def _set_starting_points(self, starting_points, spots):
+        # Derived quantities are cached, so the inputs are made read-only to
+        # stop them from being changed behind the cache's back.
+        for array in (starting_points, spots):
+            if array is not None:
+                array.flags.writeable = False
+        self._starting_points = starting_points
+        self._spots = spots
+        self._cache = {}
+
+    @property
+    def starting_points(self):
+        """:class:`numpy.ndarray` (n_points, 3) The points from which the
+        pattern is generated.
+
+        The array is read-only, so that the cached :attr:`points` and
+        :attr:`canonical` form cannot go stale. To edit it, assign an edited
+        copy::
+
+            starting_points = points.starting_points.copy()
+            starting_points[0, 2] = 2.
+            points.starting_points = starting_points
+
+        The :attr:`spots` are kept, so the new array must have as many rows
+        as the old one. To change the number of points, assign to
+        :attr:`points`, which resets every spot, or use
+        :meth:`append_point`.
+
+        """
+        return self._starting_points
+
+    @starting_points.setter
+    def starting_points(self, starting_points):
+        if self.spots is None:
+            self.points = starting_points
+            return
+        starting_points = np.array(check_points(starting_points))
+        if len(starting_points) != len(self.spots):
+            raise ValueError("There must be one spot per starting point.")
+        self._set_starting_points(starting_points, self.spots)
+
+    @property
+    def spots(self):
+        """:class:`numpy.ndarray` (n_points, 3) The spot of each starting
+        point. Read-only; assign a new array to change them.
+
+        """
+        return self._spots
+
+    @spots.setter
+    def spots(self, spots):
+        spots = np.array(spots, dtype=float).reshape(-1, 3)
+        if len(spots) != len(self.starting_points):
+            raise ValueError("There must be one spot per starting point.")
+        self._set_starting_points(self.starting_points, spots)
+
+    @property
+    def symmetry(self):
+        """:obj:`int` or :obj:`str` The symmetry of the points, in
+        Hermann-Mauguin notation.
+
+        """
+        return self._symmetry
+
+    @symmetry.setter
+    def symmetry(self, symmetry):
+        self._symmetry = symmetry
+        self._cache = {}
+
+    def append_point(self, point, spot=DEFAULT_SPOT):
         """Adds a point to the pattern.
 
         Parameters
@@ -48,13 +144,19 @@ class Points:
         point : array_like
             (x, y, [intensity])
             Coordinates of the point to add.
+        spot : array_like, optional
+            (sigma_x, sigma_y, theta)
+            Shape of the spot of the point. See :class:`Points`.
 
         """
         point = check_point(point)
+        spot = np.array(spot, dtype=float).reshape(1, 3)
         if self.starting_points is None:
-            self.starting_points = np.array(point).reshape(1, -1)
+            self._set_starting_points(np.array(point).reshape(1, -1), spot)
         else:
-            self.starting_points = np.vstack((self.starting_points, point))
+            self._set_starting_points(
+                np.vstack((self.starting_points, point)),
+                np.vstack((self.spots, spot)))
         return self
 
     @property
@@ -63,13 +165,149 @@ class Points:
         propagating the starting points through the specified symmetry.
 
         """
-        operations = parse_hermann_mauguin(self.symmetry)
-        points = propagate(self.starting_points, *operations)
-        return points
+        if 'points' not in self._cache:
+            operations = parse_hermann_mauguin(self.symmetry)
+            points = propagate(self.starting_points, *operations)
+            points.flags.writeable = False
+            self._cache['points'] = points
+        return self._cache['points']
 
     @points.setter
     def points(self, points):
-        self.starting_points = check_points(points)
+        points = np.array(check_points(points))
+        self._set_starting_points(points,
+                                  np.tile(DEFAULT_SPOT, (len(points), 1)))
+
+    @property
+    def covariances(self):
+        """:class:`numpy.ndarray` (n_points, 2, 2) The covariance matrix of
+        the spot of each of the :attr:`points`, in square pixels.
+
+        The spot of each starting point is carried through the symmetry
+        operations along with its position. Where several operations map
+        onto the same point, their spots are averaged.
+
+        """
+        if 'covariances' in self._cache:
+            return self._cache['covariances']
+        points = self.positions
+        if np.all(self.spots == DEFAULT_SPOT):
+            covariances = np.tile(np.eye(2), (len(points), 1, 1))
+        else:
+            from scipy.spatial import cKDTree
+            images, image_covariances = self._images()
+            images = images.reshape(-1, 2)
+            image_covariances = image_covariances.reshape(-1, 2, 2)
+            matches = cKDTree(images).query_ball_point(points, r=1e-6)
+            covariances = np.array([image_covariances[match].mean(axis=0)
+                                    for match in matches])
+        covariances.flags.writeable = False
+        self._cache['covariances'] = covariances
+        return covariances
+
+    def _images(self, indices=slice(None)):
+        """The images of the starting points at `indices`, and of their spot
+        covariances, under every element of the symmetry group, each of
+        shape (n_elements, n_points, ...).
+
+        """
+        group = _symmetry_group(str(self.symmetry))
+        starting_positions = self.starting_points[indices, :2].astype(float)
+        starting_positions = starting_positions.reshape(-1, 2)
+        images = np.einsum('gij,nj->gni', group, starting_positions)
+        spots = spot_covariances(self.spots[indices])
+        image_covariances = np.einsum('gij,njk,glk->gnil', group, spots, group)
+        return images, image_covariances
+
+    def orbit(self, index):
+        """The points generated from a single starting point by the symmetry.
+
+        Parameters
+        ----------
+        index : int
+            Index of the starting point.
+
+        Returns
+        -------
+        positions : :class:`numpy.ndarray`
+            (n_images, 2)
+            The distinct images of the starting point, rounded as in
+            :func:`toybox.tools.clean_points`.
+        covariances : :class:`numpy.ndarray`
+            (n_images, 2, 2)
+            The covariance of the spot at each image. See :attr:`covariances`.
+
+        """
+        images, image_covariances = self._images(index)
+        images = np.round(images[:, 0], 9) + 0.
+        image_covariances = image_covariances[:, 0]
+        order = np.lexsort(images.T[::-1])
+        images = images[order]
+        starts = np.flatnonzero(np.append(
+            True, np.any(images[1:] != images[:-1], axis=1)))
+        counts = np.diff(np.append(starts, len(images)))
+        covariances = (np.add.reduceat(image_covariances[order], starts)
+                       / counts[:, np.newaxis, np.newaxis])
+        return images[starts], covariances
+
+    @property
+    def canonical(self):
+        """:class:`numpy.ndarray` (n_orbits, 6) A canonical form of the points.
+
+        Each row describes one orbit of the symmetry group by its
+        representative, the image of a starting point that comes first in
+        lexicographic order, as (x, y, intensity, c_xx, c_xy, c_yy), where
+        c is the covariance of the representative's spot. Coordinates are
+        rounded to 9 decimal places, as in :func:`toybox.tools.clean_points`,
+        unknown intensities are NaN and the rows are sorted. Two sets of
+        points with the same symmetry generate the same pattern if, and only
+        if, they have the same canonical form.
+
+        """
+        if 'canonical' in self._cache:
+            return self._cache['canonical']
+        if self.starting_points is None:
+            canonical = np.empty((0, 6))
+        else:
+            images, image_covariances = self._images()
+            images = np.round(images, 9) + 0.  # Turns -0. into 0.
+            representatives, _ = image_representatives(
+                images.transpose(1, 0, 2))
+            # Points on a symmetry element are their own image under several
+            # elements, whose spots are averaged as in :attr:`covariances`.
+            on_representative = np.all(images == representatives, axis=2)
+            covariances = (np.einsum('gn,gnij->nij', on_representative,
+                                     image_covariances)
+                           / on_representative.sum(axis=0)[:, None, None])
+            intensities = np.array(
+                [np.nan if i is None else i for i in self.starting_points[:, 2]],
+                dtype=float)
+            canonical = np.column_stack((
+                representatives, intensities,
+                np.round(covariances.reshape(-1, 4)[:, [0, 1, 3]], 9) + 0.))
+            canonical[np.isnan(canonical)] = np.nan  # One bit pattern.
+            canonical = canonical[np.lexsort(canonical.T[::-1])]
+            # An orbit given by more than one of its points is kept once.
+            same = (canonical[1:] == canonical[:-1]) | (
+                np.isnan(canonical[1:]) & np.isnan(canonical[:-1]))
+            canonical = canonical[np.append(True, ~np.all(same, axis=1))]
+        canonical.flags.writeable = False
+        self._cache['canonical'] = canonical
+        return canonical
+
+    @property
+    def orbit_labels(self):
+        """:class:`numpy.ndarray` (n_points,) The index of the orbit of each
+        of the :attr:`points`. See
+        :func:`toybox.symmetry.operators.group_orbits`.
+
+        """
+        if 'orbit_labels' not in self._cache:
+            labels, _ = group_orbits(self.positions,
+                                     _symmetry_group(str(self.symmetry)))
+            labels.flags.writeable = False
+            self._cache['orbit_labels'] = labels
+        return self._cache['orbit_labels']
 
     @property
     def positions(self):
@@ -83,7 +321,9 @@ class Points:
 
     @intensities.setter
     def intensities(self, intensities):
-        self.starting_points[:, 2] = intensities
+        starting_points = self.starting_points.copy()
+        starting_points[:, 2] = intensities
+        self._set_starting_points(starting_points, self.spots)
 
     def to_shape(self, shape, scale=1.0):
         """Scales and translates the points into a bounding box of size `shape`.
@@ -114,10 +354,28 @@ class Points:
                                                        self.points)
 
     def __eq__(self, other):
-        if equivalent(self.points, other.points):
-            return True
-        else:
-            return False
+        """Points are equal if they have the same symmetry and the same
+        :attr:`canonical` form, i.e. if they generate the same pattern.
+
+        """
+        if not isinstance(other, Points):
+            return NotImplemented
+        return (str(self.symmetry) == str(other.symmetry)
+                and self.canonical.tobytes() == other.canonical.tobytes())
+
+    def __hash__(self):
+        """Hashes the symmetry and the :attr:`canonical` form, consistently
+        with :meth:`__eq__`. The hash is cached, so it costs O(1) after the
+        first call.
+
+        Points can be changed after creation, which changes their hash. Do
+        not change points while they are in a set or a dict key.
+
+        """
+        if 'hash' not in self._cache:
+            self._cache['hash'] = hash((str(self.symmetry),
+                                        self.canonical.tobytes()))
+        return self._cache['hash']
 
 
 class Pattern(np.ndarray):
@@ -129,7 +387,8 @@ class Pattern(np.ndarray):
     """
 
     @classmethod
-    def from_points(cls, points, shape=(100, 100), scale=1.0, blur=1.):
+    def from_points(cls, points, shape=(100, 100), scale=1.0, blur=1.,
+                    mode='sample', truncate=4.):
         """Creates a pattern from a set of points.
 
         Currently only Gaussian peaks are implemented.
@@ -143,6 +402,14 @@ class Pattern(np.ndarray):
             Maximum extent of the points. Should be less than 1.
         blur : float
             Level of gaussian blur to apply to the pattern.
+        mode : str
+            How peaks are rendered. 'sample' evaluates each peak at the
+            pixel centres, 'area' integrates each peak over the area of every
+            pixel, which avoids aliasing of narrow peaks. 'area' requires
+            spots aligned with the axes.
+        truncate : float
+            Each peak is only evaluated within this many standard deviations
+            of its centre.
 
         Returns
         -------
@@ -150,19 +417,47 @@ class Pattern(np.ndarray):
             An array simulating a diffraction pattern.
 
         """
+        if mode not in ('sample', 'area'):
+            raise ValueError("Invalid rendering mode: {}".format(mode))
+        # Heavy dependencies are imported on first use to keep imports fast.
+        from skimage import filters
         if not isinstance(points, Points):
             points = Points(points)
         positions = points.to_shape(shape, scale)
-        dat = np.zeros(shape)
-        x, y = np.mgrid[0: shape[0], 0: shape[1]]
-        pos = np.empty(x.shape + (2,))
-        pos[:, :, 0] = x
-        pos[:, :, 1] = y
-        for position, intensity in zip(positions, points.intensities):
-            dat += intensity * multivariate_normal.pdf(pos, mean=position, cov=1)
-        dat = filters.gaussian(dat, sigma=blur)
+        intensities = points.intensities
+        covariances = points.covariances
+        with stage('render'):
+            dat = render(positions, intensities, shape, truncate=truncate,
+                         mode=mode, covariances=covariances)
+        with stage('blur'):
+            dat = filters.gaussian(dat, sigma=blur)
         return dat.view(cls)
 
+    def bin(self, factor=2):
+        """Sums blocks of `factor` by `factor` pixels.
+
+        See :func:`toybox.toys.rendering.bin_frames`.
+
+        """
+        return bin_frames(self, factor).view(Pattern)
+
+    def pyramid(self, levels, factor=2):
+        """Bins the pattern into a series of coarser resolutions, finest
+        first.
+
+        See :func:`toybox.toys.rendering.pyramid`.
+
+        """
+        return [level.view(Pattern) for level in pyramid(self, levels, factor)]
+
+    def radial_profile(self, centre=None, nbins=None, average=True):
+        """Integrates the pattern over rings about `centre`.
+
+        See :func:`toybox.analysis.radial.radial_profile`.
+
+        """
+        return radial_profile(self, centre, nbins, average)
+
     def plot(self, colorbar=False, cmap='gray'):
         """Plots the pattern using :mod:`matplotlib`.
 
@@ -175,6 +470,7 @@ class Pattern(np.ndarray):
             map name.
 
         """
+        from matplotlib import pyplot as plt
         plt.imshow(self, interpolation='none', cmap=cmap)
         if colorbar:
             plt.colorbar()
\ No newline at end of file
@@ -1,9 +1,11 @@
-import collections
+import collections.abc
 import numpy as np
 from toybox.toys.core import Pattern
+from toybox.toys.rendering import blend
+from toybox.toys.sparse import SparsePattern
 
 
-class BiCrystal(collections.MutableSequence):
+class BiCrystal(collections.abc.MutableSequence):
 
     def __init__(self, pattern1, pattern2, profile=np.linspace(0, 1, 11)):
         self.pattern_1 = pattern1
@@ -24,15 +26,30 @@ class BiCrystal(collections.MutableSequence):
     def profile_i(self):
         return 1. - self.profile
 
+    @property
+    def sparse(self):
+        sparse_1 = isinstance(self.pattern_1, SparsePattern)
+        if sparse_1 != isinstance(self.pattern_2, SparsePattern):
+            raise ValueError("Cannot blend a sparse and a dense pattern.")
+        return sparse_1
+
     @property
     def patterns(self):
-        return np.array([p * self.pattern_2 + q * self.pattern_1 for p, q in zip(self.profile, self.profile_i)])
+        if self.sparse:
+            return [self.pattern_1.blend(self.pattern_2, p) for p in self.profile]
+        return np.asarray(self[:])
 
     def __len__(self):
         return len(self.profile)
 
     def __getitem__(self, item):
-        return self.patterns[item].view(Pattern)
+        profile = self.profile[item]
+        if self.sparse:
+            if np.ndim(profile):
+                return [self.pattern_1.blend(self.pattern_2, p) for p in profile]
+            return self.pattern_1.blend(self.pattern_2, profile)
+        # Only the requested frames are computed.
+        return blend(self.pattern_1, self.pattern_2, profile).view(Pattern)
 
     def __setitem__(self, key, value):
         if value > 1 or value < 0:
@@ -46,19 +63,135 @@ class BiCrystal(collections.MutableSequence):
         self.profile = np.insert(self.profile, index, value)
 
 
+class Mixture(collections.abc.MutableSequence):
+
+    def __init__(self, phases, weights):
+        """A map of mixtures of several phases, such as the grains meeting at
+        a grain boundary or a triple junction.
+
+        The pattern at every position of the map is the sum of the patterns
+        of the phases weighted by their fractions there. As a sequence, a
+        mixture runs along the first axis of `weights`, which can be edited
+        like the profile of a :class:`BiCrystal`.
+
+        Parameters
+        ----------
+        phases : array_like
+            (n_phases,) + pattern shape
+            The pattern of each phase.
+        weights : array_like
+            (..., n_phases)
+            The fraction of each phase at every position of the map. Each
+            set of fractions must sum to 1.
+
+        """
+        self.phases = np.asarray(phases, dtype=float)
+        self.weights = weights
+
+    @classmethod
+    def from_labels(cls, phases, labels):
+        """Creates a mixture with a single phase at every position.
+
+        Parameters
+        ----------
+        phases : array_like
+            (n_phases,) + pattern shape
+            The pattern of each phase.
+        labels : array_like
+            (...)
+            The index of the phase at every position.
+
+        Returns
+        -------
+        Mixture
+
+        """
+        phases = np.asarray(phases, dtype=float)
+        return cls(phases, np.eye(len(phases))[np.asarray(labels)])
 
+    @property
+    def weights(self):
+        """:class:`numpy.ndarray` `map_shape` + (`n_phases`,) The fraction
+        of each phase at every position.
+
+        """
+        return self._weights
+
+    @weights.setter
+    def weights(self, weights):
+        weights = np.array(weights, dtype=float)
+        self._check(weights)
+        self._weights = weights
+
+    def _check(self, weights):
+        if np.shape(weights)[-1:] != (len(self.phases),):
+            raise ValueError("There must be one weight per phase.")
+        if not np.size(weights):
+            return
+        if np.max(weights) > 1 or np.min(weights) < 0:
+            raise ValueError("Weights must be between 0 and 1.")
+        if not np.allclose(np.sum(weights, axis=-1), 1.):
+            raise ValueError("Weights must sum to 1.")
 
+    @property
+    def n_phases(self):
+        """:obj:`int` The number of phases."""
+        return len(self.phases)
 
+    @property
+    def map_shape(self):
+        """:obj:`tuple` The shape of the map."""
+        return self.weights.shape[:-1]
+
+    def to_array(self):
+        """Computes the pattern at every position at once.
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            `map_shape` + pattern shape
+
+        """
+        return np.tensordot(self.weights, self.phases, axes=1)
+
+    def chunks(self, chunksize=64):
+        """Computes the patterns a few positions at a time, so that the whole
+        map is never held in memory.
+
+        Parameters
+        ----------
+        chunksize : int
+            Number of positions per chunk.
+
+        Yields
+        ------
+        :class:`numpy.ndarray`
+            (n,) + pattern shape
+            The patterns of the next `n` positions of the map, in C order.
+
+        """
+        weights = self.weights.reshape(-1, self.n_phases)
+        for start in range(0, len(weights), chunksize):
+            yield np.tensordot(weights[start: start + chunksize],
+                               self.phases, axes=1)
 
+    def __len__(self):
+        return len(self.weights)
 
+    def __getitem__(self, item):
+        # Only the requested patterns are computed.
+        return np.tensordot(self.weights[item], self.phases,
+                            axes=1).view(Pattern)
 
+    def __setitem__(self, key, value):
+        value = np.asarray(value, dtype=float)
+        self._check(value)
+        self.weights[key] = value
 
+    def __delitem__(self, key):
+        self.weights = np.delete(self.weights, key, axis=0)
 
-
-
-
-
-
-
-
-
+    def insert(self, index, value):
+        value = np.asarray(value, dtype=float)
+        self._check(value)
+        self.weights = np.insert(self.weights, index, value, axis=0)
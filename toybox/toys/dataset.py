@@ -0,0 +1,197 @@
+"""Randomised training data, generated ahead of time in worker processes.
+
+Workers write batches of patterns straight into a ring buffer of fixed-size
+slots in shared memory. The consumer receives views of those slots, so no
+pattern is pickled or copied on its way from a worker to the consumer, and
+memory use is bounded by the number of slots.
+
+"""
+import multiprocessing
+import queue
+
+import numpy as np
+from toybox.toys.batch import add_noise, _init_worker
+from toybox.toys.core import Points, Pattern
+
+SYMMETRIES = (1, 2, 3, 4, 6, 'm', '2mm', '3m', '4mm', '6mm')
+
+
+def random_points(random_state, symmetry, n_points):
+    """Creates a :class:`Points` with `n_points` random starting points in
+    the unit disc, plus a central point.
+
+    """
+    radii = random_state.uniform(0.2, 1., n_points)
+    angles = random_state.uniform(0., 2 * np.pi, n_points)
+    starting_points = np.column_stack((
+        np.round(radii * np.cos(angles), 6),
+        np.round(radii * np.sin(angles), 6),
+        random_state.uniform(0.1, 1., n_points)))
+    starting_points = np.vstack(([0., 0., 1.], starting_points))
+    return Points(starting_points, symmetry=symmetry, auto_zero=False)
+
+
+def _generate_batch(config, batch_number, patterns, labels):
+    """Fills `patterns` and `labels` with the randomised batch `batch_number`.
+
+    The batch only depends on the seed and `batch_number`.
+
+    """
+    random_state = np.random.RandomState([config['seed'], batch_number])
+    symmetries = config['symmetries']
+    for i in range(len(patterns)):
+        label = random_state.randint(len(symmetries))
+        n_points = random_state.randint(config['n_points'][0],
+                                        config['n_points'][1] + 1)
+        points = random_points(random_state, symmetries[label], n_points)
+        pattern = Pattern.from_points(points, shape=config['shape'],
+                                      scale=config['scale'],
+                                      blur=random_state.uniform(*config['blur']))
+        patterns[i] = add_noise(pattern, random_state.uniform(*config['noise']),
+                                random_state)
+        labels[i] = label
+
+
+def _slots(buffer, label_buffer, config):
+    """Views the shared buffers as arrays of slots."""
+    patterns = np.frombuffer(buffer, dtype=config['dtype'])
+    patterns = patterns.reshape((-1, config['batch_size']) + config['shape'])
+    labels = np.frombuffer(label_buffer, dtype=np.int64)
+    return patterns, labels.reshape(-1, config['batch_size'])
+
+
+def _worker(buffer, label_buffer, config, tasks, done):
+    _init_worker()
+    patterns, labels = _slots(buffer, label_buffer, config)
+    for batch_number, slot in iter(tasks.get, None):
+        _generate_batch(config, batch_number, patterns[slot], labels[slot])
+        done.put((batch_number, slot))
+
+
+class PatternDataset:
+
+    def __init__(self, shape=(64, 64), batch_size=32, n_batches=None,
+                 symmetries=SYMMETRIES, n_points=(1, 5), blur=(0.5, 2.),
+                 noise=(0., 0.05), scale=0.9, seed=0, processes=2, n_slots=4,
+                 dtype=np.float32):
+        """An iterable of batches of random patterns, for training models.
+
+        Iterating yields ``(patterns, labels)`` tuples, where `patterns` has
+        shape (`batch_size`,) + `shape` and `labels` holds the index in
+        `symmetries` of the symmetry of each pattern. Both are views of
+        shared memory and are only valid until the next batch is requested;
+        copy them to keep them.
+
+        Parameters
+        ----------
+        shape : :obj:`tuple` of :obj:`int`
+            Shape of each pattern.
+        batch_size : int
+            Number of patterns per batch.
+        n_batches : int, optional
+            Number of batches to produce. If None, iteration never stops.
+        symmetries : sequence
+            Symmetries to choose from, in Hermann-Mauguin notation.
+        n_points : :obj:`tuple` of :obj:`int`
+            Inclusive range of the number of random starting points.
+        blur, noise : :obj:`tuple` of :obj:`float`
+            Ranges from which the blur and noise of each pattern are drawn.
+        scale : float
+            See :meth:`Pattern.from_points`.
+        seed : int
+            Seed. Batch `i` only depends on `seed` and `i`, whatever the
+            number of processes.
+        processes : int
+            Number of worker processes. If 0, batches are generated in the
+            consuming process.
+        n_slots : int
+            Number of batches held in the ring buffer. This bounds both the
+            memory use and how far the workers can run ahead.
+        dtype : :class:`numpy.dtype`
+            Data type of the patterns.
+
+        """
+        self.n_batches = n_batches
+        self.processes = processes
+        self.n_slots = n_slots
+        self.config = {
+            'shape': tuple(shape), 'batch_size': batch_size,
+            'symmetries': tuple(symmetries), 'n_points': tuple(n_points),
+            'blur': tuple(blur), 'noise': tuple(noise), 'scale': scale,
+            'seed': seed, 'dtype': np.dtype(dtype),
+        }
+
+    def __len__(self):
+        if self.n_batches is None:
+            raise TypeError("The dataset is infinite.")
+        return self.n_batches
+
+    def _batch_numbers(self):
+        n = 0
+        while self.n_batches is None or n < self.n_batches:
+            yield n
+            n += 1
+
+    def __iter__(self):
+        if self.processes:
+            return self._iter_parallel()
+        return self._iter_serial()
+
+    def _iter_serial(self):
+        config = self.config
+        patterns = np.empty((config['batch_size'],) + config['shape'],
+                            dtype=config['dtype'])
+        labels = np.empty(config['batch_size'], dtype=np.int64)
+        for batch_number in self._batch_numbers():
+            _generate_batch(config, batch_number, patterns, labels)
+            yield patterns, labels
+
+    def _iter_parallel(self):
+        config = self.config
+        slot_size = config['batch_size'] * int(np.prod(config['shape']))
+        buffer = multiprocessing.RawArray(
+            'b', self.n_slots * slot_size * config['dtype'].itemsize)
+        label_buffer = multiprocessing.RawArray(
+            'b', self.n_slots * config['batch_size'] * 8)
+        patterns, labels = _slots(buffer, label_buffer, config)
+        tasks = multiprocessing.Queue()
+        done = multiprocessing.Queue()
+        workers = [multiprocessing.Process(
+            target=_worker, args=(buffer, label_buffer, config, tasks, done),
+            daemon=True) for _ in range(self.processes)]
+        for worker in workers:
+            worker.start()
+
+        # Every outstanding batch owns a slot, so batches can complete in any
+        # order without the workers ever waiting for the consumer.
+        batch_numbers = self._batch_numbers()
+        issued = 0
+        for slot, batch_number in zip(range(self.n_slots), batch_numbers):
+            tasks.put((batch_number, slot))
+            issued += 1
+        ready = {}
+        try:
+            expected = 0
+            while expected < issued:
+                while expected not in ready:
+                    try:
+                        batch_number, slot = done.get(timeout=1.)
+                    except queue.Empty:
+                        if not all(worker.is_alive() for worker in workers):
+                            raise RuntimeError("A worker process died.")
+                        continue
+                    ready[batch_number] = slot
+                slot = ready.pop(expected)
+                yield patterns[slot], labels[slot]
+                expected += 1
+                batch_number = next(batch_numbers, None)
+                if batch_number is not None:
+                    tasks.put((batch_number, slot))
+                    issued += 1
+        finally:
+            for worker in workers:
+                worker.terminate()
+            for worker in workers:
+                worker.join()
+            tasks.close()
+            done.close()
@@ -0,0 +1,175 @@
+"""Patterns that are updated in place as their points change.
+
+An :class:`IncrementalPattern` keeps the window rendered around every image
+of every starting point. Changing a starting point only touches the windows
+of its own orbit, so nudging one point of a large pattern costs a few small
+window updates instead of a full :meth:`Pattern.from_points`.
+
+"""
+import numpy as np
+from toybox.toys.core import DEFAULT_SPOT, Points, Pattern
+from toybox.toys.rendering import known_intensities, peak_windows
+
+
+class IncrementalPattern:
+
+    def __init__(self, points, shape=(100, 100), scale=1.0, blur=1.,
+                 mode='sample', truncate=4.):
+        """A rendered pattern that can be edited one starting point at a time.
+
+        As in :meth:`SparsePattern.from_points`, the blur is folded into the
+        covariance of each peak, so the pattern matches
+        :meth:`Pattern.from_points` away from the edges and up to truncation.
+        Each starting point is rendered with its whole orbit, so repeated
+        starting points add up rather than being merged.
+
+        Parameters
+        ----------
+        points : Points, array_like
+            Positions and intensities of the points in the array. Every
+            intensity must be known.
+        shape, scale, blur, mode, truncate
+            See :meth:`Pattern.from_points`.
+
+        """
+        if not isinstance(points, Points):
+            points = Points(points)
+        self.shape = tuple(shape)
+        self.scale = scale
+        self.blur = blur
+        self.mode = mode
+        self.truncate = truncate
+        self.points = points
+        self.refresh()
+
+    @property
+    def pattern(self):
+        """:class:`Pattern` The current pattern. This is a view of the
+        buffer that is updated in place; copy it to keep it.
+
+        """
+        return self.data.view(Pattern)
+
+    def _distance(self, starting_points):
+        # Every image of a point is as far from the origin as the point
+        # itself, so the extent of the pattern only depends on the starting
+        # points. See :meth:`Points.to_shape`.
+        positions = starting_points[:, :2].astype(float)
+        return np.sqrt(np.max(np.sum(np.square(positions), axis=1)))
+
+    def _windows(self, index):
+        """Renders the orbit of starting point `index` at unit intensity.
+
+        Returns
+        -------
+        list of tuple
+            (row slice, column slice, values) of each peak, clipped to the
+            pattern.
+
+        """
+        positions, covariances = self.points.orbit(index)
+        offset = np.array(self.shape) / 2
+        positions = positions / self.distance * self.scale * offset + offset
+        covariances = covariances + self.blur ** 2 * np.eye(2)
+        rows, cols, values = peak_windows(positions, np.ones(len(positions)),
+                                          truncate=self.truncate,
+                                          mode=self.mode,
+                                          covariances=covariances)
+        windows = []
+        for peak_rows, peak_cols, peak_values in zip(rows, cols, values):
+            r0, c0 = max(peak_rows[0], 0), max(peak_cols[0], 0)
+            r1 = min(peak_rows[-1] + 1, self.shape[0])
+            c1 = min(peak_cols[-1] + 1, self.shape[1])
+            if r0 >= r1 or c0 >= c1:
+                continue
+            peak_values = peak_values[r0 - peak_rows[0]: r1 - peak_rows[0],
+                                      c0 - peak_cols[0]: c1 - peak_cols[0]]
+            windows.append((slice(r0, r1), slice(c0, c1), peak_values))
+        return windows
+
+    def _add(self, index, weight):
+        """Adds `weight` times the orbit of starting point `index`."""
+        for rows, cols, values in self.windows[index]:
+            self.data[rows, cols] += weight * values
+
+    def refresh(self):
+        """Renders the whole pattern from scratch.
+
+        This also clears the rounding errors that build up over many
+        updates.
+
+        Raises
+        ------
+        ValueError
+            If an intensity is unknown. See
+            :func:`toybox.toys.rendering.known_intensities`.
+
+        """
+        if self.mode not in ('sample', 'area'):
+            raise ValueError("Invalid rendering mode: {}".format(self.mode))
+        intensities = known_intensities(self.points.starting_points[:, 2])
+        self.distance = self._distance(self.points.starting_points)
+        self.data = np.zeros(self.shape)
+        self.windows = [self._windows(i)
+                        for i in range(len(self.points.starting_points))]
+        for i, intensity in enumerate(intensities):
+            self._add(i, intensity)
+        return self
+
+    def _replace(self, starting_points, spots):
+        self.points = Points(starting_points, symmetry=self.points.symmetry,
+                             auto_zero=False, spots=spots)
+
+    def set_intensity(self, index, intensity):
+        """Changes the intensity of starting point `index` and its images."""
+        intensity, = known_intensities(intensity)
+        old = float(self.points.starting_points[index, 2])
+        starting_points = self.points.starting_points.copy()
+        starting_points[index, 2] = intensity
+        self._replace(starting_points, self.points.spots)
+        self._add(index, intensity - old)
+        return self
+
+    def move_point(self, index, position):
+        """Moves starting point `index`, and its images, to `position`.
+
+        If the move changes the extent of the pattern, the whole pattern is
+        rendered again.
+
+        """
+        starting_points = self.points.starting_points.copy()
+        starting_points[index, :2] = position
+        self._add(index, -float(starting_points[index, 2]))
+        self._replace(starting_points, self.points.spots)
+        if not np.isclose(self._distance(starting_points), self.distance):
+            return self.refresh()
+        self.windows[index] = self._windows(index)
+        self._add(index, float(starting_points[index, 2]))
+        return self
+
+    def append_point(self, point, spot=DEFAULT_SPOT):
+        """Adds a starting point and its images.
+
+        If the new point lies further from the origin than any other, the
+        whole pattern is rendered again.
+
+        Parameters
+        ----------
+        point : array_like
+            (x, y, intensity)
+        spot : array_like, optional
+            (sigma_x, sigma_y, theta). See :class:`Points`.
+
+        """
+        points = Points(self.points.starting_points,
+                        symmetry=self.points.symmetry, auto_zero=False,
+                        spots=self.points.spots)
+        points.append_point(point, spot)
+        known_intensities(points.starting_points[-1, 2])
+        self.points = points
+        if self._distance(self.points.starting_points) > self.distance:
+            return self.refresh()
+        self.windows.append(self._windows(len(self.windows)))
+        self._add(len(self.windows) - 1,
+                  float(self.points.starting_points[-1, 2]))
+        return self
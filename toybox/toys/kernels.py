@@ -0,0 +1,190 @@
+"""Compiled rendering kernels.
+
+These are multi-threaded counterparts of the NumPy code in
+:mod:`toybox.toys.rendering`, compiled with :mod:`numba`. They are only used
+if numba is installed; see :func:`toybox.toys.rendering.set_backend`.
+
+Scatter-adds are split between threads by rows: the frame is cut into bands
+of rows and each band draws the part of every peak that falls within it, so
+that threads never write to the same pixel and no scratch frames are needed.
+
+"""
+import threading
+from contextlib import contextmanager
+from math import erf, exp, sqrt
+
+import numba
+import numpy as np
+
+# The workqueue threading layer must not be entered by two threads at once,
+# so calls from several threads, e.g. an executor, take turns under it.
+_lock = threading.Lock()
+
+
+def _serialised():
+    """Whether kernel calls must take turns, i.e. whether the threading
+    layer is, or may turn out to be, workqueue.
+
+    """
+    try:
+        return numba.threading_layer() == 'workqueue'
+    except ValueError:
+        # No parallel kernel has run yet, so the layer is not chosen, and
+        # may be workqueue unless a thread-safe layer was asked for.
+        return numba.config.THREADING_LAYER not in ('tbb', 'omp',
+                                                    'threadsafe')
+
+
+@contextmanager
+def _launch():
+    if _serialised():
+        with _lock:
+            yield
+    else:
+        yield
+
+
+def _n_bands(n_rows):
+    # Found outside of the compiled functions so that they can be cached.
+    # Several bands per thread even out the work when peaks are clustered.
+    return max(1, min(4 * numba.get_num_threads(), n_rows))
+
+
+@numba.njit(cache=True)
+def _band(band, n_bands, n_rows):
+    """The first and last rows, exclusive, of a band."""
+    return band * n_rows // n_bands, (band + 1) * n_rows // n_bands
+
+
+@numba.njit(parallel=True, cache=True)
+def _splat(rows, cols, values, n_rows, n_cols, n_bands):
+    n_peaks = values.shape[0]
+    frame = np.zeros((n_rows, n_cols))
+    for band in numba.prange(n_bands):
+        lo, hi = _band(band, n_bands, n_rows)
+        for p in range(n_peaks):
+            for i in range(rows.shape[1]):
+                r = rows[p, i]
+                if r < lo or r >= hi:
+                    continue
+                for j in range(cols.shape[1]):
+                    c = cols[p, j]
+                    if 0 <= c < n_cols:
+                        frame[r, c] += values[p, i, j]
+    return frame
+
+
+@numba.njit(parallel=True, cache=True)
+def _render_sample(positions, intensities, inverses, norms, radius, n_rows,
+                   n_cols, n_bands):
+    n_peaks = positions.shape[0]
+    frame = np.zeros((n_rows, n_cols))
+    for band in numba.prange(n_bands):
+        lo, hi = _band(band, n_bands, n_rows)
+        for p in range(n_peaks):
+            r0 = int(np.rint(positions[p, 0]))
+            first, last = max(r0 - radius, lo), min(r0 + radius + 1, hi)
+            if first >= last:
+                continue
+            c0 = int(np.rint(positions[p, 1]))
+            a = inverses[p, 0, 0]
+            b = inverses[p, 0, 1] + inverses[p, 1, 0]
+            d = inverses[p, 1, 1]
+            scale = intensities[p] * norms[p]
+            for r in range(first, last):
+                dx = r - positions[p, 0]
+                for c in range(max(c0 - radius, 0),
+                               min(c0 + radius + 1, n_cols)):
+                    dy = c - positions[p, 1]
+                    quadratic = a * dx * dx + b * dx * dy + d * dy * dy
+                    frame[r, c] += scale * exp(-0.5 * quadratic)
+    return frame
+
+
+@numba.njit(parallel=True, cache=True)
+def _render_area(positions, intensities, sigmas, radius, n_rows, n_cols,
+                 n_bands):
+    n_peaks = positions.shape[0]
+    width = 2 * radius + 1
+    frame = np.zeros((n_rows, n_cols))
+    for band in numba.prange(n_bands):
+        lo, hi = _band(band, n_bands, n_rows)
+        row_profile = np.empty(width)
+        col_profile = np.empty(width)
+        for p in range(n_peaks):
+            r0 = int(np.rint(positions[p, 0])) - radius
+            if r0 + width <= lo or r0 >= hi:
+                continue
+            c0 = int(np.rint(positions[p, 1])) - radius
+            row_scale = 1. / (sigmas[p, 0] * sqrt(2.))
+            col_scale = 1. / (sigmas[p, 1] * sqrt(2.))
+            for k in range(width):
+                distance = r0 + k - positions[p, 0]
+                row_profile[k] = 0.5 * (erf((distance + 0.5) * row_scale)
+                                        - erf((distance - 0.5) * row_scale))
+                distance = c0 + k - positions[p, 1]
+                col_profile[k] = 0.5 * (erf((distance + 0.5) * col_scale)
+                                        - erf((distance - 0.5) * col_scale))
+            for i in range(max(lo - r0, 0), min(hi - r0, width)):
+                r = r0 + i
+                for j in range(width):
+                    c = c0 + j
+                    if 0 <= c < n_cols:
+                        frame[r, c] += (intensities[p] * row_profile[i]
+                                        * col_profile[j])
+    return frame
+
+
+def splat(rows, cols, values, n_rows, n_cols):
+    """Compiled counterpart of :func:`toybox.toys.rendering.accumulate`."""
+    with _launch():
+        return _splat(rows, cols, values, n_rows, n_cols,
+                      _n_bands(n_rows))
+
+
+def render_sample(positions, intensities, inverses, norms, radius, n_rows,
+                  n_cols):
+    """Samples Gaussian peaks at the pixel centres within a window of
+    `radius` pixels around each peak.
+
+    `inverses` and `norms` are the inverse covariance and the normalisation
+    of each peak.
+
+    """
+    with _launch():
+        return _render_sample(positions, intensities, inverses, norms, radius,
+                              n_rows, n_cols, _n_bands(n_rows))
+
+
+def render_area(positions, intensities, sigmas, radius, n_rows, n_cols):
+    """Integrates axis-aligned Gaussian peaks over the area of each pixel
+    within a window of `radius` pixels around each peak.
+
+    `sigmas` holds the standard deviations of each peak along each axis.
+
+    """
+    with _launch():
+        return _render_area(positions, intensities, sigmas, radius, n_rows,
+                            n_cols, _n_bands(n_rows))
+
+
+def blend(pattern1, pattern2, weights):
+    """Compiled counterpart of :func:`toybox.toys.rendering.blend` for a
+    one-dimensional array of weights.
+
+    """
+    with _launch():
+        return _blend(pattern1, pattern2, weights)
+
+
+@numba.njit(parallel=True, cache=True)
+def _blend(pattern1, pattern2, weights):
+    n_rows, n_cols = pattern1.shape
+    frames = np.empty((weights.shape[0], n_rows, n_cols))
+    for k in numba.prange(weights.shape[0] * n_rows):
+        f = k // n_rows
+        r = k % n_rows
+        w = weights[f]
+        for c in range(n_cols):
+            frames[f, r, c] = (1. - w) * pattern1[r, c] + w * pattern2[r, c]
+    return frames
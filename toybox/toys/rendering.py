@@ -0,0 +1,516 @@
+"""Vectorised rendering of Gaussian peaks into pixel arrays.
+
+Every peak is only evaluated within a square window of pixels around its
+centre, so the cost of rendering scales with the number of peaks rather than
+with the size of the frame.
+
+If :mod:`numba` is installed, :func:`render`, :func:`accumulate` and
+:func:`blend` use the multi-threaded kernels of :mod:`toybox.toys.kernels`.
+Use :func:`set_backend` to choose the backend explicitly.
+
+"""
+from math import ceil, sqrt, pi
+
+import numpy as np
+
+BACKENDS = ('auto', 'numpy', 'numba')
+_backend = 'auto'
+_kernels = []  # The compiled kernels once imported, or None if unavailable.
+
+
+def set_backend(backend, threading_layer=None):
+    """Chooses how peaks are rendered.
+
+    Parameters
+    ----------
+    backend : str
+        'numba' uses compiled kernels, 'numpy' uses vectorised NumPy and
+        'auto', the default, uses numba if it is installed.
+    threading_layer : str, optional
+        Sets numba's threading layer, e.g. 'workqueue', 'omp' or 'tbb', for
+        the whole process, like the ``NUMBA_THREADING_LAYER`` environment
+        variable. It only takes effect before the first compiled kernel
+        runs. Choose 'workqueue' if patterns are rendered both here and in
+        worker processes forked afterwards (``processes > 1``), which the
+        'tbb' and 'omp' layers do not survive reliably.
+
+    Raises
+    ------
+    ImportError
+        If `backend` is 'numba', or a threading layer is given, but numba is
+        not installed.
+
+    """
+    global _backend
+    if backend not in BACKENDS:
+        raise ValueError("Invalid backend: {}. Choose from {}.".format(
+            backend, ", ".join(BACKENDS)))
+    if ((backend == 'numba' or threading_layer is not None)
+            and _import_kernels() is None):
+        raise ImportError("The numba backend requires numba.")
+    if threading_layer is not None:
+        import numba
+        numba.config.THREADING_LAYER = threading_layer
+    _backend = backend
+
+
+def get_backend():
+    """:obj:`str` The backend in use, 'numpy' or 'numba'."""
+    return 'numpy' if _compiled() is None else 'numba'
+
+
+def _import_kernels():
+    # Numba is slow to import, so it is only imported on first use.
+    if not _kernels:
+        try:
+            from toybox.toys import kernels
+        except ImportError:
+            kernels = None
+        _kernels.append(kernels)
+    return _kernels[0]
+
+
+def _compiled():
+    """The compiled kernels, or None if the NumPy backend is in use."""
+    if _backend == 'numpy':
+        return None
+    return _import_kernels()
+
+
+def known_intensities(intensities):
+    """Converts intensities to floats, checking that every one is known.
+
+    Raises
+    ------
+    ValueError
+        If an intensity is unknown, i.e. None or NaN, such as that of the
+        origin appended by ``Points(auto_zero=True)``.
+
+    """
+    intensities = np.asarray(intensities, dtype=float).reshape(-1)
+    if np.any(np.isnan(intensities)):
+        raise ValueError("Every intensity must be known to render peaks. "
+                         "Give the origin an intensity or use "
+                         "auto_zero=False.")
+    return intensities
+
+
+def window_radius(sigma, truncate=4.):
+    """Half-width, in pixels, of the window needed for a peak of width
+    `sigma` truncated at `truncate` standard deviations.
+
+    """
+    return int(ceil(truncate * sigma + 0.5))
+
+
+def window_indices(centres, radius):
+    """Pixel indices of the windows around a series of 1-d peak centres.
+
+    Parameters
+    ----------
+    centres : array_like
+        (n_peaks,)
+        Peak centres, in pixels.
+    radius : int
+        Half-width of each window.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        (n_peaks, 2 * `radius` + 1)
+        Integer pixel indices, centred on the nearest pixel to each peak.
+
+    """
+    offsets = np.arange(-radius, radius + 1)
+    return np.round(centres).astype(int)[:, np.newaxis] + offsets
+
+
+def integrated_profile(indices, centres, sigma=1.):
+    """Integrates 1-d Gaussians over the extent of each pixel.
+
+    The integral over pixel `i` is the difference of the Gaussian cumulative
+    distribution function at `i` + 0.5 and `i` - 0.5.
+
+    Parameters
+    ----------
+    indices : array_like
+        (n_peaks, n_pixels)
+        Pixel indices, as returned by :func:`window_indices`.
+    centres : array_like
+        (n_peaks,)
+        Peak centres, in pixels.
+    sigma : float or array_like
+        Standard deviation of the Gaussians, in pixels, either shared or one
+        per peak.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        (n_peaks, n_pixels)
+        The fraction of each peak falling within each pixel.
+
+    """
+    from scipy.special import erf
+    sigma = np.asarray(sigma, dtype=float)
+    if sigma.ndim:
+        sigma = sigma[:, np.newaxis]
+    distances = (indices - np.asarray(centres)[:, np.newaxis]) / (sigma * sqrt(2))
+    half_pixel = 0.5 / (sigma * sqrt(2))
+    return 0.5 * (erf(distances + half_pixel) - erf(distances - half_pixel))
+
+
+def sampled_profile(indices, centres, sigma=1.):
+    """Evaluates 1-d Gaussian probability densities at pixel centres.
+
+    Parameters
+    ----------
+    indices : array_like
+        (n_peaks, n_pixels)
+        Pixel indices, as returned by :func:`window_indices`.
+    centres : array_like
+        (n_peaks,)
+        Peak centres, in pixels.
+    sigma : float
+        Standard deviation of the Gaussians, in pixels.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        (n_peaks, n_pixels)
+        The density of each peak at each pixel centre.
+
+    """
+    distances = (indices - np.asarray(centres)[:, np.newaxis]) / sigma
+    return np.exp(-0.5 * np.square(distances)) / (sigma * sqrt(2 * pi))
+
+
+def spot_covariances(spots):
+    """Converts spot shapes into covariance matrices.
+
+    Parameters
+    ----------
+    spots : array_like
+        (n_peaks, 3)
+        Spot shapes as (sigma_x, sigma_y, theta): the standard deviations, in
+        pixels, along the spot's principal axes, and the angle in degrees
+        between the first principal axis and the x-axis.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        (n_peaks, 2, 2)
+        The covariance matrix of each spot.
+
+    """
+    spots = np.asarray(spots, dtype=float).reshape(-1, 3)
+    theta = np.radians(spots[:, 2])
+    cos, sin = np.cos(theta), np.sin(theta)
+    rotations = np.array([[cos, -sin], [sin, cos]]).transpose(2, 0, 1)
+    variances = np.square(spots[:, :2])
+    return np.einsum('nij,nj,nkj->nik', rotations, variances, rotations)
+
+
+def covariance_spots(covariances):
+    """Converts covariance matrices into spot shapes.
+
+    This is the inverse of :func:`spot_covariances`, with the principal axes
+    in increasing order of standard deviation.
+
+    Parameters
+    ----------
+    covariances : array_like
+        (n_peaks, 2, 2)
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        (n_peaks, 3)
+        Spot shapes as (sigma_x, sigma_y, theta).
+
+    """
+    covariances = np.asarray(covariances, dtype=float).reshape(-1, 2, 2)
+    variances, axes = np.linalg.eigh(covariances)
+    theta = np.degrees(np.arctan2(axes[:, 1, 0], axes[:, 0, 0]))
+    return np.column_stack((np.sqrt(np.maximum(variances, 0.)), theta))
+
+
+def inverse_covariances(covariances):
+    """Inverts a stack of 2x2 covariance matrices in closed form.
+
+    Returns
+    -------
+    inverses : :class:`numpy.ndarray`
+        (n_peaks, 2, 2)
+    determinants : :class:`numpy.ndarray`
+        (n_peaks,)
+
+    """
+    a = covariances[:, 0, 0]
+    b = covariances[:, 0, 1]
+    c = covariances[:, 1, 0]
+    d = covariances[:, 1, 1]
+    determinants = a * d - b * c
+    inverses = np.array([[d, -b], [-c, a]]).transpose(2, 0, 1)
+    return inverses / determinants[:, np.newaxis, np.newaxis], determinants
+
+
+def covariance_radius(covariances, truncate=4.):
+    """Half-width, in pixels, of a window that holds every one of a series
+    of peaks, truncated at `truncate` standard deviations along their
+    widest axis.
+
+    """
+    half_trace = 0.5 * (covariances[:, 0, 0] + covariances[:, 1, 1])
+    determinants = (covariances[:, 0, 0] * covariances[:, 1, 1]
+                    - covariances[:, 0, 1] * covariances[:, 1, 0])
+    largest = half_trace + np.sqrt(np.maximum(
+        np.square(half_trace) - determinants, 0.))
+    return window_radius(sqrt(largest.max()) if largest.size else 0., truncate)
+
+
+def peak_windows(positions, intensities, sigma=1., truncate=4.,
+                 mode='area', covariances=None):
+    """Evaluates Gaussian peaks within a window around each peak.
+
+    Parameters
+    ----------
+    positions : array_like
+        (n_peaks, 2)
+        Peak centres, in pixels.
+    intensities : array_like
+        (n_peaks,)
+        Integrated intensity of each peak.
+    sigma : float
+        Standard deviation of isotropic peaks, in pixels.
+    truncate : float
+        Peaks are evaluated up to this many standard deviations away along
+        their widest axis.
+    mode : str
+        'area' integrates each peak over the area of every pixel, 'sample'
+        evaluates its density at the pixel centres.
+    covariances : array_like, optional
+        (n_peaks, 2, 2)
+        Covariance matrix of each peak, in square pixels. Overrides `sigma`.
+        In 'area' mode, the peaks must be aligned with the axes.
+
+    Returns
+    -------
+    rows, cols : :class:`numpy.ndarray`
+        (n_peaks, n_pixels)
+        Pixel indices of each window along each axis. These may fall outside
+        the frame.
+    values : :class:`numpy.ndarray`
+        (n_peaks, n_pixels, n_pixels)
+        The rendered windows.
+
+    """
+    if mode not in ('area', 'sample'):
+        raise ValueError("Invalid rendering mode: {}".format(mode))
+    positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+    intensities = known_intensities(intensities)
+    if covariances is None:
+        radius = window_radius(sigma, truncate)
+    else:
+        covariances = np.asarray(covariances, dtype=float).reshape(-1, 2, 2)
+        radius = covariance_radius(covariances, truncate)
+    rows = window_indices(positions[:, 0], radius)
+    cols = window_indices(positions[:, 1], radius)
+
+    if covariances is None:
+        profile = integrated_profile if mode == 'area' else sampled_profile
+        values = (profile(rows, positions[:, 0], sigma)[:, :, np.newaxis]
+                  * profile(cols, positions[:, 1], sigma)[:, np.newaxis, :])
+    elif mode == 'area':
+        if not np.allclose(covariances[:, 0, 1], 0.):
+            raise ValueError("Area rendering requires axis-aligned peaks.")
+        sigmas = np.sqrt(covariances[:, [0, 1], [0, 1]])
+        values = (integrated_profile(rows, positions[:, 0], sigmas[:, 0])[:, :, np.newaxis]
+                  * integrated_profile(cols, positions[:, 1], sigmas[:, 1])[:, np.newaxis, :])
+    else:
+        inverses, determinants = inverse_covariances(covariances)
+        inverses = inverses[:, :, :, np.newaxis, np.newaxis]
+        dx = (rows - positions[:, 0:1])[:, :, np.newaxis]
+        dy = (cols - positions[:, 1:2])[:, np.newaxis, :]
+        quadratic = (inverses[:, 0, 0] * np.square(dx)
+                     + (inverses[:, 0, 1] + inverses[:, 1, 0]) * dx * dy
+                     + inverses[:, 1, 1] * np.square(dy))
+        norms = 1. / (2 * pi * np.sqrt(determinants))
+        values = norms[:, np.newaxis, np.newaxis] * np.exp(-0.5 * quadratic)
+    values *= intensities[:, np.newaxis, np.newaxis]
+    return rows, cols, values
+
+
+def accumulate(rows, cols, values, shape):
+    """Sums windows of values into a dense frame.
+
+    Parameters
+    ----------
+    rows, cols : array_like
+        (n_peaks, n_rows), (n_peaks, n_cols)
+        Pixel indices of each window along each axis.
+    values : array_like
+        (n_peaks, n_rows, n_cols)
+        The values to add to the frame.
+    shape : :obj:`tuple` of :obj:`int`
+        Shape of the frame. Values falling outside it are discarded.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        The dense frame.
+
+    """
+    kernels = _compiled()
+    if kernels is not None:
+        return kernels.splat(np.asarray(rows, dtype=np.intp),
+                             np.asarray(cols, dtype=np.intp),
+                             np.asarray(values, dtype=float), *shape)
+    rows = np.broadcast_to(np.asarray(rows)[:, :, np.newaxis], values.shape)
+    cols = np.broadcast_to(np.asarray(cols)[:, np.newaxis, :], values.shape)
+    inside = (rows >= 0) & (rows < shape[0]) & (cols >= 0) & (cols < shape[1])
+    flat = rows[inside] * shape[1] + cols[inside]
+    frame = np.bincount(flat, weights=values[inside],
+                        minlength=shape[0] * shape[1])
+    return frame.reshape(shape)
+
+
+def render(positions, intensities, shape, sigma=1., truncate=4., mode='area',
+           covariances=None):
+    """Renders Gaussian peaks into a frame.
+
+    This is equivalent to :func:`peak_windows` followed by
+    :func:`accumulate`, but the compiled backend draws every peak straight
+    into the frame.
+
+    Parameters
+    ----------
+    positions, intensities, sigma, truncate, mode, covariances
+        See :func:`peak_windows`.
+    shape : :obj:`tuple` of :obj:`int`
+        Shape of the frame.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        The rendered frame.
+
+    """
+    kernels = _compiled()
+    if kernels is None:
+        rows, cols, values = peak_windows(positions, intensities, sigma,
+                                          truncate, mode, covariances)
+        return accumulate(rows, cols, values, shape)
+    if mode not in ('area', 'sample'):
+        raise ValueError("Invalid rendering mode: {}".format(mode))
+    positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+    intensities = known_intensities(intensities)
+    if covariances is None:
+        covariances = np.tile(sigma ** 2 * np.eye(2), (len(positions), 1, 1))
+    covariances = np.asarray(covariances, dtype=float).reshape(-1, 2, 2)
+    radius = covariance_radius(covariances, truncate)
+    if mode == 'area':
+        if not np.allclose(covariances[:, 0, 1], 0.):
+            raise ValueError("Area rendering requires axis-aligned peaks.")
+        sigmas = np.sqrt(covariances[:, [0, 1], [0, 1]])
+        return kernels.render_area(positions, intensities, sigmas, radius,
+                                   *shape)
+    inverses, determinants = inverse_covariances(covariances)
+    norms = 1. / (2 * pi * np.sqrt(determinants))
+    return kernels.render_sample(positions, intensities, inverses, norms,
+                                 radius, *shape)
+
+
+def blend(pattern1, pattern2, weights):
+    """Linearly blends between two patterns.
+
+    Parameters
+    ----------
+    pattern1, pattern2 : array_like
+        (height, width)
+    weights : float or array_like
+        Fraction of `pattern2` in each blended frame, between 0 and 1.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        (..., height, width)
+        (1 - `weights`) * `pattern1` + `weights` * `pattern2`, with the
+        shape of `weights` leading.
+
+    """
+    weights = np.asarray(weights, dtype=float)
+    kernels = _compiled()
+    if kernels is not None:
+        frames = kernels.blend(np.asarray(pattern1, dtype=float),
+                               np.asarray(pattern2, dtype=float),
+                               weights.reshape(-1))
+        return frames.reshape(weights.shape + frames.shape[1:])
+    weights = weights[..., np.newaxis, np.newaxis]
+    return weights * pattern2 + (1. - weights) * pattern1
+
+
+def bin_frames(frames, factor=2):
+    """Sums blocks of `factor` by `factor` pixels, as binning on a detector.
+
+    Rows and columns left over at the bottom and right edges are dropped.
+
+    Parameters
+    ----------
+    frames : array_like
+        (..., height, width)
+    factor : int
+        Side of the blocks, in pixels. At least 1.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        (..., height // `factor`, width // `factor`)
+        Summed as 64-bit integers for integer frames, so that the counts
+        of uint8 or uint16 detectors do not wrap around, and as floats
+        otherwise.
+
+    """
+    if int(factor) != factor or factor < 1:
+        raise ValueError("The binning factor must be a positive integer, "
+                         "not {}.".format(factor))
+    factor = int(factor)
+    frames = np.asarray(frames)
+    wide = np.int64 if frames.dtype.kind in 'biu' else float
+    height, width = frames.shape[-2] // factor, frames.shape[-1] // factor
+    frames = frames[..., :height * factor, :width * factor]
+    # Adding strided slices is several times faster than reshaping into
+    # blocks and summing over two axes of the reshaped view.
+    rows = frames[..., ::factor, :].astype(np.result_type(frames, wide))
+    for i in range(1, factor):
+        rows += frames[..., i::factor, :]
+    binned = rows[..., ::factor].copy()
+    for i in range(1, factor):
+        binned += rows[..., i::factor]
+    return binned
+
+
+def pyramid(frames, levels, factor=2):
+    """Bins frames repeatedly into a series of coarser resolutions.
+
+    Each level is binned from the one before it, so every pixel of the
+    original frames is only read once.
+
+    Parameters
+    ----------
+    frames : array_like
+        (..., height, width)
+    levels : int
+        Number of levels, including the original frames.
+    factor : int
+        Binning factor between successive levels.
+
+    Returns
+    -------
+    :obj:`list` of :class:`numpy.ndarray`
+        The frames at each level, finest first.
+
+    """
+    result = [np.asarray(frames)]
+    for _ in range(levels - 1):
+        result.append(bin_frames(result[-1], factor))
+    return result
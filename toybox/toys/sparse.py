@@ -0,0 +1,173 @@
+"""A sparse representation of toy patterns.
+
+Most pixels of a toy pattern are close to zero. A :class:`SparsePattern`
+keeps only the pixels in a window around each peak, in coordinate (COO)
+format, so its memory use scales with the number of peaks rather than with
+the size of the detector.
+
+"""
+import numpy as np
+from toybox.toys.core import Points, Pattern
+from toybox.toys.rendering import peak_windows
+
+
+class SparsePattern:
+
+    # Stop numpy from treating sparse patterns as arrays in arithmetic, so
+    # that ``scalar * sparse`` uses :meth:`__rmul__`. This needs numpy 1.13.
+    __array_ufunc__ = None
+    __array_priority__ = 1000
+
+    def __init__(self, shape, rows=(), cols=(), data=()):
+        """A pattern stored as a list of (row, column, value) entries.
+
+        Entries outside the pattern are discarded. Repeated entries are
+        allowed and are summed when the pattern is densified.
+
+        Parameters
+        ----------
+        shape : :obj:`tuple` of :obj:`int`
+            Shape of the equivalent dense pattern.
+        rows, cols : array_like
+            (n_entries,)
+            Pixel indices of each entry.
+        data : array_like
+            (n_entries,)
+            Value of each entry.
+
+        """
+        self.shape = tuple(int(s) for s in shape)
+        rows = np.asarray(rows, dtype=np.intp).ravel()
+        cols = np.asarray(cols, dtype=np.intp).ravel()
+        data = np.asarray(data, dtype=float).ravel()
+        if not rows.shape == cols.shape == data.shape:
+            raise ValueError("rows, cols and data must be the same length.")
+        inside = ((rows >= 0) & (rows < self.shape[0])
+                  & (cols >= 0) & (cols < self.shape[1]))
+        self.rows = rows[inside]
+        self.cols = cols[inside]
+        self.data = data[inside]
+
+    @classmethod
+    def from_points(cls, points, shape=(100, 100), scale=1.0, blur=1.,
+                    mode='sample', truncate=4.):
+        """Creates a sparse pattern from a set of points without densifying.
+
+        The Gaussian blur of :meth:`Pattern.from_points` is folded into the
+        covariance of each peak, so the result matches the dense pattern away
+        from the edges and up to truncation.
+
+        Parameters
+        ----------
+        points : Points, array_like
+            Positions and intensities of the points in the array.
+        shape : :obj:`tuple` of :obj:`int`
+            Shape of the equivalent dense pattern.
+        scale : float
+            Maximum extent of the points. Should be less than 1.
+        blur : float
+            Level of gaussian blur to apply to the pattern.
+        mode : str
+            'sample' or 'area'. See :meth:`Pattern.from_points`.
+        truncate : float
+            Peaks are kept up to this many standard deviations away.
+
+        Returns
+        -------
+        SparsePattern
+
+        """
+        if not isinstance(points, Points):
+            points = Points(points)
+        positions = points.to_shape(shape, scale)
+        covariances = points.covariances + blur ** 2 * np.eye(2)
+        rows, cols, values = peak_windows(positions, points.intensities,
+                                          truncate=truncate, mode=mode,
+                                          covariances=covariances)
+        rows = np.broadcast_to(rows[:, :, np.newaxis], values.shape)
+        cols = np.broadcast_to(cols[:, np.newaxis, :], values.shape)
+        return cls(shape, rows, cols, values)
+
+    @classmethod
+    def from_dense(cls, pattern, threshold=0.):
+        """Creates a sparse pattern from the pixels of a dense pattern whose
+        magnitude exceeds `threshold`.
+
+        """
+        pattern = np.asarray(pattern)
+        rows, cols = np.nonzero(np.abs(pattern) > threshold)
+        return cls(pattern.shape, rows, cols, pattern[rows, cols])
+
+    @property
+    def nnz(self):
+        """:obj:`int` The number of stored entries."""
+        return self.data.size
+
+    @property
+    def nbytes(self):
+        """:obj:`int` The memory used by the stored entries, in bytes."""
+        return self.rows.nbytes + self.cols.nbytes + self.data.nbytes
+
+    def coalesce(self):
+        """Returns an equivalent sparse pattern with repeated entries summed."""
+        flat = self.rows * self.shape[1] + self.cols
+        unique, inverse = np.unique(flat, return_inverse=True)
+        data = np.bincount(inverse, weights=self.data)
+        return SparsePattern(self.shape, unique // self.shape[1],
+                             unique % self.shape[1], data)
+
+    def to_dense(self):
+        """Densifies the pattern.
+
+        Returns
+        -------
+        Pattern
+
+        """
+        flat = self.rows * self.shape[1] + self.cols
+        dense = np.bincount(flat, weights=self.data,
+                            minlength=self.shape[0] * self.shape[1])
+        return dense.reshape(self.shape).view(Pattern)
+
+    def blend(self, other, weight):
+        """Linearly blends this pattern into `other`.
+
+        Parameters
+        ----------
+        other : SparsePattern
+        weight : float
+            Fraction of `other` in the result, between 0 and 1.
+
+        Returns
+        -------
+        SparsePattern
+            (1 - `weight`) * self + `weight` * `other`
+
+        """
+        return (1. - weight) * self + weight * other
+
+    def __add__(self, other):
+        if isinstance(other, SparsePattern):
+            if other.shape != self.shape:
+                raise ValueError("Cannot add patterns of shape {} and {}."
+                                 .format(self.shape, other.shape))
+            return SparsePattern(self.shape,
+                                 np.concatenate((self.rows, other.rows)),
+                                 np.concatenate((self.cols, other.cols)),
+                                 np.concatenate((self.data, other.data)))
+        if np.isscalar(other) and other == 0:  # Allows the use of sum().
+            return self
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __mul__(self, other):
+        if np.isscalar(other):
+            return SparsePattern(self.shape, self.rows, self.cols,
+                                 self.data * other)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __repr__(self):
+        return "SparsePattern(shape={}, nnz={})".format(self.shape, self.nnz)
@@ -0,0 +1,174 @@
+"""Strain maps: the pattern of a reference crystal at every position of a
+scan, deformed by a local 2x2 tensor.
+
+The reference positions are deformed by every distinct tensor at once with a
+single batched matrix product. Scan positions with the same tensor, such as
+the whole of an unstrained region, share a single rendered pattern.
+
+"""
+import numpy as np
+from toybox.tools import unique_rows
+from toybox.toys.batch import render_batch
+from toybox.toys.core import DEFAULT_SPOT, Points
+from toybox.toys.rendering import covariance_spots, known_intensities
+
+
+def deform(positions, tensors):
+    """Applies a stack of 2x2 tensors to a set of positions.
+
+    Parameters
+    ----------
+    positions : array_like
+        (n_points, 2)
+    tensors : array_like
+        (..., 2, 2)
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        (..., n_points, 2)
+        The positions deformed by every tensor.
+
+    """
+    positions = np.asarray(positions, dtype=float)
+    tensors = np.asarray(tensors, dtype=float)
+    return np.matmul(positions, np.swapaxes(tensors, -1, -2))
+
+
+class StrainMap:
+
+    def __init__(self, points, tensors, shape=(100, 100), scale=1.0, blur=1.,
+                 mode='sample', truncate=4.):
+        """A scan over a strained crystal.
+
+        The pattern at each scan position is that of `points` with its
+        positions deformed by the local tensor. Every pattern is drawn at the
+        pixel size of the reference pattern, so that, for example, a
+        uniform expansion of the reflections spreads the pattern out. The
+        spots keep their shape, which is set by the probe rather than by the
+        crystal.
+
+        Parameters
+        ----------
+        points : Points, array_like
+            The reference positions and intensities. Every intensity must be
+            known, and at least one point must lie away from the origin.
+        tensors : array_like
+            (scan_y, scan_x, 2, 2)
+            The tensor applied to the (x, y) coordinates of the points at
+            each scan position. The identity leaves the pattern unstrained.
+            For a real-space deformation gradient F, the reflections deform
+            by the inverse transpose of F. Every tensor must be invertible.
+        shape, scale, blur, mode, truncate
+            See :meth:`Pattern.from_points`. `scale` applies to the
+            reference pattern.
+
+        """
+        if not isinstance(points, Points):
+            points = Points(points)
+        known_intensities(points.intensities)
+        positions = points.positions.astype(float)
+        if not len(positions) or not np.any(positions):
+            raise ValueError("The reference needs a point away from the "
+                             "origin to set the scale of the patterns.")
+        tensors = np.array(tensors, dtype=float)
+        if tensors.ndim != 4 or tensors.shape[2:] != (2, 2):
+            raise ValueError("Tensors must have shape (scan_y, scan_x, 2, 2).")
+        if np.any(np.abs(np.linalg.det(tensors)) < 1e-12):
+            raise ValueError("Tensors must be invertible.")
+        tensors.flags.writeable = False
+        self.points = points
+        self.tensors = tensors
+        self.shape = tuple(shape)
+        self.scale = scale
+        self.blur = blur
+        self.mode = mode
+        self.truncate = truncate
+        self.unique_tensors, self.inverse = unique_rows(
+            tensors.reshape(-1, 2, 2))
+
+    @property
+    def scan_shape(self):
+        """:obj:`tuple` The shape of the scan."""
+        return self.tensors.shape[:2]
+
+    def __len__(self):
+        """The number of distinct patterns."""
+        return len(self.unique_tensors)
+
+    def strained_points(self):
+        """Deforms the reference points by every distinct tensor.
+
+        Returns
+        -------
+        list of Points
+            One set of points, without symmetry, per distinct tensor.
+
+        """
+        positions = self.points.positions.astype(float)
+        deformed = np.round(deform(positions, self.unique_tensors), 9)
+        intensities = known_intensities(self.points.intensities)
+        spots = None
+        if not np.all(self.points.spots == DEFAULT_SPOT):
+            spots = covariance_spots(self.points.covariances)
+        return [Points(np.column_stack((p, intensities)), auto_zero=False,
+                       spots=spots) for p in deformed]
+
+    def specs(self):
+        """The keyword arguments of :meth:`Pattern.from_points` for each
+        distinct pattern.
+
+        :meth:`Points.to_shape` fits the furthest point to `scale`, so the
+        scale of each pattern is stretched with its furthest point to keep
+        the pixel size of the reference.
+
+        """
+        reference = np.max(np.hypot(*self.points.positions.astype(float).T))
+        specs = []
+        for points in self.strained_points():
+            distance = np.max(np.hypot(*points.positions.T))
+            specs.append(dict(points=points, shape=self.shape,
+                              scale=self.scale * distance / reference,
+                              blur=self.blur, mode=self.mode,
+                              truncate=self.truncate))
+        return specs
+
+    def patterns(self, processes=1, chunksize=1, reducers=(), cache=None):
+        """Renders every distinct pattern.
+
+        Parameters
+        ----------
+        processes, chunksize, reducers, cache
+            See :func:`toybox.toys.batch.render_batch`.
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            (n_unique,) + `shape`
+            The pattern of each of the :attr:`unique_tensors`.
+
+        """
+        patterns = render_batch(self.specs(), processes, chunksize, reducers,
+                                cache)
+        return np.array(list(patterns))
+
+    def to_array(self, **kwargs):
+        """Renders the pattern at every scan position.
+
+        Parameters
+        ----------
+        kwargs
+            Any arguments of :meth:`patterns`.
+
+        Returns
+        -------
+        :class:`numpy.ndarray`
+            (scan_y, scan_x) + `shape`
+
+        """
+        patterns = self.patterns(**kwargs)
+        return patterns[self.inverse].reshape(self.scan_shape + self.shape)
+
+    def __repr__(self):
+        return "StrainMap of {} scan positions, {} distinct".format(
+            len(self.inverse), len(self))